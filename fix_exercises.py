@@ -22,6 +22,7 @@ def fix():
                 new_id = new_row[0]
                 print(f"Migrating logs to 'Reverse Pec Deck' (ID: {new_id})...")
                 c.execute("UPDATE workout_exercises SET exercise_id = ? WHERE exercise_id = ?", (new_id, row[0]))
+                c.execute("UPDATE learned_aliases SET exercise_id = ? WHERE exercise_id = ?", (new_id, row[0]))
             
             c.execute("DELETE FROM exercises WHERE id = ?", (row[0],))
             print("Deleted.")
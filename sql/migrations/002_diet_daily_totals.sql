@@ -0,0 +1,19 @@
+-- ============================================
+-- DIET DAILY TOTALS (Rollup of diet_logs, maintained by save_diet_logs)
+-- ============================================
+CREATE TABLE IF NOT EXISTS diet_daily_totals (
+    log_date DATE PRIMARY KEY,
+    entries INTEGER NOT NULL DEFAULT 0,
+    calories INTEGER NOT NULL DEFAULT 0,
+    protein INTEGER NOT NULL DEFAULT 0,
+    carbs INTEGER NOT NULL DEFAULT 0,
+    fats INTEGER NOT NULL DEFAULT 0
+);
+
+-- Backfill rollups for days logged before the table existed
+INSERT INTO diet_daily_totals (log_date, entries, calories, protein, carbs, fats)
+SELECT d.log_date, COUNT(*), SUM(COALESCE(d.calories, 0)), SUM(COALESCE(d.protein, 0)),
+       SUM(COALESCE(d.carbs, 0)), SUM(COALESCE(d.fats, 0))
+FROM diet_logs d
+WHERE NOT EXISTS (SELECT 1 FROM diet_daily_totals t WHERE t.log_date = d.log_date)
+GROUP BY d.log_date;
@@ -0,0 +1,15 @@
+-- ============================================
+-- FOOD CACHE (Nutrition memo built from confirmed diet_logs entries)
+-- ============================================
+CREATE TABLE IF NOT EXISTS food_cache (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    food_key TEXT NOT NULL,
+    quantity REAL NOT NULL,
+    food_raw TEXT,
+    calories INTEGER,
+    protein INTEGER,
+    carbs INTEGER,
+    fats INTEGER,
+    confirmations INTEGER NOT NULL DEFAULT 1,
+    UNIQUE (food_key, quantity)
+);
@@ -0,0 +1,9 @@
+-- ============================================
+-- IMPORT LOG (Content hashes of records brought in by `main.py import`)
+-- ============================================
+CREATE TABLE IF NOT EXISTS import_log (
+    content_hash TEXT PRIMARY KEY,
+    record_type TEXT NOT NULL CHECK(record_type IN ('workout', 'diet')),
+    record_date DATE,
+    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,8 @@
+-- ============================================
+-- CONTENT HASHES (Duplicate detection, see services/cleanup_logs.py)
+-- Legacy rows stay NULL until `cleanup_logs.py --apply` backfills them.
+-- ============================================
+ALTER TABLE workout_logs ADD COLUMN content_hash TEXT;
+ALTER TABLE diet_logs ADD COLUMN content_hash TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_workout_logs_hash ON workout_logs(content_hash);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_diet_logs_hash ON diet_logs(content_hash);
@@ -0,0 +1,17 @@
+-- ============================================
+-- LLM CALLS (Ledger of Gemini requests: latency, tokens, outcome)
+-- ============================================
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    call_date DATE NOT NULL,
+    called_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    service TEXT NOT NULL,
+    model TEXT,
+    prompt_tokens INTEGER,
+    response_tokens INTEGER,
+    latency_ms REAL,
+    outcome TEXT NOT NULL CHECK(outcome IN ('ok', 'error', 'cache')),
+    cached INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_calls_date ON llm_calls(call_date);
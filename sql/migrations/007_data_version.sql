@@ -0,0 +1,10 @@
+-- ============================================
+-- DATA VERSION (Change counters for cached pages, see services/data_version.py)
+-- Bumped in the same transaction as every write to workout or diet logs.
+-- ============================================
+CREATE TABLE IF NOT EXISTS data_version (
+    scope TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO data_version (scope, version) VALUES ('workout', 0), ('diet', 0);
@@ -0,0 +1,13 @@
+-- ============================================
+-- DRAFTS (Parsed-but-unconfirmed logs, see services/draft_store.py)
+-- payload is JSON. Times are unix seconds.
+-- ============================================
+CREATE TABLE IF NOT EXISTS drafts (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL CHECK(kind IN ('workout', 'diet')),
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_drafts_expires ON drafts(expires_at);
@@ -0,0 +1,10 @@
+-- ============================================
+-- API IDEMPOTENCY KEYS (One row per item accepted by POST /api/v1/batch)
+-- result is the JSON returned for the item, replayed when a client retries the key.
+-- ============================================
+CREATE TABLE IF NOT EXISTS api_idempotency (
+    idempotency_key TEXT PRIMARY KEY,
+    record_type TEXT NOT NULL CHECK(record_type IN ('workout', 'diet')),
+    result TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
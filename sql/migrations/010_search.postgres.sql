@@ -0,0 +1,11 @@
+-- ============================================
+-- FULL-TEXT SEARCH, Postgres version of 010_search.sql
+-- Stored tsvector columns (Postgres computes them on every write, so no
+-- triggers are needed) with GIN indexes.
+-- ============================================
+ALTER TABLE workout_logs ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(exercises_raw, ''))) STORED;
+ALTER TABLE diet_logs ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(food_raw, ''))) STORED;
+CREATE INDEX IF NOT EXISTS idx_workout_logs_search ON workout_logs USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_diet_logs_search ON diet_logs USING GIN (search_vector);
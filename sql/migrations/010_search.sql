@@ -0,0 +1,48 @@
+-- ============================================
+-- FULL-TEXT SEARCH (see services/search_service.py)
+-- External-content FTS5 indexes over the raw log text, kept in sync by
+-- triggers. Postgres uses 010_search.postgres.sql instead.
+-- ============================================
+CREATE VIRTUAL TABLE IF NOT EXISTS workout_search USING fts5(
+    exercises_raw,
+    content='workout_logs',
+    content_rowid='id',
+    tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS workout_search_insert AFTER INSERT ON workout_logs BEGIN
+    INSERT INTO workout_search (rowid, exercises_raw) VALUES (new.id, new.exercises_raw);
+END;
+
+CREATE TRIGGER IF NOT EXISTS workout_search_delete AFTER DELETE ON workout_logs BEGIN
+    INSERT INTO workout_search (workout_search, rowid, exercises_raw) VALUES ('delete', old.id, old.exercises_raw);
+END;
+
+CREATE TRIGGER IF NOT EXISTS workout_search_update AFTER UPDATE OF exercises_raw ON workout_logs BEGIN
+    INSERT INTO workout_search (workout_search, rowid, exercises_raw) VALUES ('delete', old.id, old.exercises_raw);
+    INSERT INTO workout_search (rowid, exercises_raw) VALUES (new.id, new.exercises_raw);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS diet_search USING fts5(
+    food_raw,
+    content='diet_logs',
+    content_rowid='id',
+    tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS diet_search_insert AFTER INSERT ON diet_logs BEGIN
+    INSERT INTO diet_search (rowid, food_raw) VALUES (new.id, new.food_raw);
+END;
+
+CREATE TRIGGER IF NOT EXISTS diet_search_delete AFTER DELETE ON diet_logs BEGIN
+    INSERT INTO diet_search (diet_search, rowid, food_raw) VALUES ('delete', old.id, old.food_raw);
+END;
+
+CREATE TRIGGER IF NOT EXISTS diet_search_update AFTER UPDATE OF food_raw ON diet_logs BEGIN
+    INSERT INTO diet_search (diet_search, rowid, food_raw) VALUES ('delete', old.id, old.food_raw);
+    INSERT INTO diet_search (rowid, food_raw) VALUES (new.id, new.food_raw);
+END;
+
+-- Index the rows logged before this migration
+INSERT INTO workout_search (workout_search) VALUES ('rebuild');
+INSERT INTO diet_search (diet_search) VALUES ('rebuild');
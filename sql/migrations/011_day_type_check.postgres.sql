@@ -0,0 +1,6 @@
+-- ============================================
+-- DAY TYPE CHECK, Postgres version of 011_day_type_check.sql
+-- ============================================
+ALTER TABLE workout_logs DROP CONSTRAINT IF EXISTS workout_logs_day_type_check;
+ALTER TABLE workout_logs ADD CONSTRAINT workout_logs_day_type_check
+    CHECK (day_type IN ('PUSH', 'PULL', 'LEGS', 'CARDIO', 'HYBRID'));
@@ -0,0 +1,38 @@
+-- ============================================
+-- DAY TYPE CHECK
+-- Databases created before CARDIO/HYBRID existed reject cardio-only
+-- sessions. SQLite cannot alter a CHECK constraint, so workout_logs is
+-- rebuilt (ids kept, so child rows and the search index stay valid) and
+-- its indexes and search triggers are recreated.
+-- Postgres uses 011_day_type_check.postgres.sql instead.
+-- ============================================
+CREATE TABLE workout_logs_rebuilt (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    workout_date DATE NOT NULL,
+    day_type TEXT CHECK(day_type IN ('PUSH', 'PULL', 'LEGS', 'CARDIO', 'HYBRID')),
+    exercises_raw TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    content_hash TEXT
+);
+
+INSERT INTO workout_logs_rebuilt (id, workout_date, day_type, exercises_raw, created_at, content_hash)
+SELECT id, workout_date, day_type, exercises_raw, created_at, content_hash FROM workout_logs;
+
+DROP TABLE workout_logs;
+ALTER TABLE workout_logs_rebuilt RENAME TO workout_logs;
+
+CREATE INDEX IF NOT EXISTS idx_workout_date ON workout_logs(workout_date);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_workout_logs_hash ON workout_logs(content_hash);
+
+CREATE TRIGGER IF NOT EXISTS workout_search_insert AFTER INSERT ON workout_logs BEGIN
+    INSERT INTO workout_search (rowid, exercises_raw) VALUES (new.id, new.exercises_raw);
+END;
+
+CREATE TRIGGER IF NOT EXISTS workout_search_delete AFTER DELETE ON workout_logs BEGIN
+    INSERT INTO workout_search (workout_search, rowid, exercises_raw) VALUES ('delete', old.id, old.exercises_raw);
+END;
+
+CREATE TRIGGER IF NOT EXISTS workout_search_update AFTER UPDATE OF exercises_raw ON workout_logs BEGIN
+    INSERT INTO workout_search (workout_search, rowid, exercises_raw) VALUES ('delete', old.id, old.exercises_raw);
+    INSERT INTO workout_search (rowid, exercises_raw) VALUES (new.id, new.exercises_raw);
+END;
@@ -0,0 +1,21 @@
+-- ============================================
+-- USER SCOPING, Postgres version of 012_user_scoping.sql
+-- ============================================
+ALTER TABLE workout_logs ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE diet_logs ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE drafts ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1;
+
+DROP INDEX IF EXISTS idx_workout_logs_hash;
+DROP INDEX IF EXISTS idx_diet_logs_hash;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_workout_logs_user_hash ON workout_logs(user_id, content_hash);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_diet_logs_user_hash ON diet_logs(user_id, content_hash);
+
+-- INCLUDE id makes the report's log lookups index-only scans
+DROP INDEX IF EXISTS idx_workout_date;
+DROP INDEX IF EXISTS idx_diet_date;
+CREATE INDEX IF NOT EXISTS idx_workout_logs_user_date ON workout_logs(user_id, workout_date, day_type) INCLUDE (id);
+CREATE INDEX IF NOT EXISTS idx_diet_logs_user_date ON diet_logs(user_id, log_date);
+
+ALTER TABLE diet_daily_totals ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE diet_daily_totals DROP CONSTRAINT IF EXISTS diet_daily_totals_pkey;
+ALTER TABLE diet_daily_totals ADD PRIMARY KEY (user_id, log_date);
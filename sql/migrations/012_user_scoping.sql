@@ -0,0 +1,41 @@
+-- ============================================
+-- USER SCOPING (see services/users.py)
+-- Every log belongs to a user. Rows written before this migration belong to
+-- user 1. Per-user indexes lead with user_id, then the date, so a user's
+-- history is read from their own index range however many users there are.
+-- Postgres uses 012_user_scoping.postgres.sql instead.
+-- ============================================
+ALTER TABLE workout_logs ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE diet_logs ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE drafts ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1;
+
+-- Duplicate detection is per user: two users may log the same text on the same day
+DROP INDEX IF EXISTS idx_workout_logs_hash;
+DROP INDEX IF EXISTS idx_diet_logs_hash;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_workout_logs_user_hash ON workout_logs(user_id, content_hash);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_diet_logs_user_hash ON diet_logs(user_id, content_hash);
+
+-- History reads (day_type included, so the log rows of a report never leave the index)
+DROP INDEX IF EXISTS idx_workout_date;
+DROP INDEX IF EXISTS idx_diet_date;
+CREATE INDEX IF NOT EXISTS idx_workout_logs_user_date ON workout_logs(user_id, workout_date, day_type);
+CREATE INDEX IF NOT EXISTS idx_diet_logs_user_date ON diet_logs(user_id, log_date);
+
+-- Daily rollup keyed by (user, day). WITHOUT ROWID stores rows in key order,
+-- so a user's summary is one contiguous range read.
+CREATE TABLE diet_daily_totals_rebuilt (
+    user_id INTEGER NOT NULL DEFAULT 1,
+    log_date DATE NOT NULL,
+    entries INTEGER NOT NULL DEFAULT 0,
+    calories INTEGER NOT NULL DEFAULT 0,
+    protein INTEGER NOT NULL DEFAULT 0,
+    carbs INTEGER NOT NULL DEFAULT 0,
+    fats INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, log_date)
+) WITHOUT ROWID;
+
+INSERT INTO diet_daily_totals_rebuilt (user_id, log_date, entries, calories, protein, carbs, fats)
+SELECT 1, log_date, entries, calories, protein, carbs, fats FROM diet_daily_totals;
+
+DROP TABLE diet_daily_totals;
+ALTER TABLE diet_daily_totals_rebuilt RENAME TO diet_daily_totals;
@@ -0,0 +1,15 @@
+-- ============================================
+-- LEARNED ALIASES (see services/learned_aliases.py)
+-- Text a user typed that fuzzy-matched an exercise and was then confirmed.
+-- The matcher treats these like the catalog's aliases (exact lookup), and
+-- reloads them when the 'aliases' data version moves.
+-- ============================================
+CREATE TABLE IF NOT EXISTS learned_aliases (
+    alias TEXT PRIMARY KEY,
+    exercise_id INTEGER NOT NULL,
+    confirmations INTEGER NOT NULL DEFAULT 1,
+    learned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (exercise_id) REFERENCES exercises(id)
+);
+
+INSERT OR IGNORE INTO data_version (scope, version) VALUES ('aliases', 0);
@@ -0,0 +1,6 @@
+-- ============================================
+-- PER-USER LEARNED ALIASES, Postgres version of 014_learned_aliases_user.sql
+-- ============================================
+ALTER TABLE learned_aliases ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE learned_aliases DROP CONSTRAINT IF EXISTS learned_aliases_pkey;
+ALTER TABLE learned_aliases ADD PRIMARY KEY (user_id, alias);
@@ -0,0 +1,21 @@
+-- ============================================
+-- PER-USER LEARNED ALIASES (see services/learned_aliases.py)
+-- What one user typed and confirmed only changes matching for that user.
+-- Aliases learned before this migration belong to user 1.
+-- Postgres uses 014_learned_aliases_user.postgres.sql instead.
+-- ============================================
+CREATE TABLE learned_aliases_rebuilt (
+    user_id INTEGER NOT NULL DEFAULT 1,
+    alias TEXT NOT NULL,
+    exercise_id INTEGER NOT NULL,
+    confirmations INTEGER NOT NULL DEFAULT 1,
+    learned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, alias),
+    FOREIGN KEY (exercise_id) REFERENCES exercises(id)
+);
+
+INSERT INTO learned_aliases_rebuilt (user_id, alias, exercise_id, confirmations, learned_at)
+SELECT 1, alias, exercise_id, confirmations, learned_at FROM learned_aliases;
+
+DROP TABLE learned_aliases;
+ALTER TABLE learned_aliases_rebuilt RENAME TO learned_aliases;
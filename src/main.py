@@ -9,27 +9,100 @@ import datetime
 import json
 from src.services.exercise_matcher import ExerciseMatcher
 from src.services.categorizer import WorkoutCategorizer
-from src.models.database import get_connection
+from src.models.database import get_connection, start_query_stats, end_query_stats, prepared
+from src.models.migrations import ensure_schema
+from src.services import metrics
+from src.services.profiling import Profile
+from src.services.users import DEFAULT_USER_ID
 
 def main():
     parser = argparse.ArgumentParser(description="Smart Workout Logger")
-    parser.add_argument("command", choices=["log", "history", "report"], help="Command to run")
+    parser.add_argument("command", choices=["log", "history", "report", "diet-summary", "import", "dedupe", "llm-stats", "search", "synth", "snapshot", "reclassify", "catalog"], help="Command to run")
+    parser.add_argument("file", nargs="?", help="File to import (CSV, JSONL or text) for import, quoted terms for search")
     parser.add_argument("--date", help="Date of workout (YYYY-MM-DD)", default=str(datetime.date.today()))
+    parser.add_argument("--days", type=int, default=14, help="Days to show in diet-summary / llm-stats")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel parse workers for import")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Records per commit for import")
+    parser.add_argument("--no-ai", action="store_true", help="Import without calling Gemini (local parsing only)")
+    parser.add_argument("--apply", action="store_true", help="dedupe / reclassify / catalog: make the changes (default is a dry run)")
+    parser.add_argument("--merge", action="store_true", help="dedupe: keep a duplicate's exercises if the kept log has none")
+    parser.add_argument("--kind", choices=["all", "workout", "diet"], default="all", help="search: which logs to search")
+    parser.add_argument("--page", type=int, default=1, help="search: result page (20 per page)")
+    parser.add_argument("--users", type=int, default=1, help="synth: lifters to generate")
+    parser.add_argument("--years", type=int, default=1, help="synth: years of history per lifter")
+    parser.add_argument("--seed", type=int, default=42, help="synth: random seed (same seed, same history)")
+    parser.add_argument("--start", default="2020-01-01", help="synth: first day of the history (YYYY-MM-DD)")
+    parser.add_argument("--rebuild", action="store_true", help="snapshot: re-export everything instead of appending")
+    parser.add_argument("--prune", action="store_true", help="catalog: delete exercises dropped from the catalog (unless logged)")
+    parser.add_argument("--since", help="reclassify: first workout date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="reclassify: last workout date (YYYY-MM-DD)")
+    parser.add_argument("--user", type=int,
+                        help=f"User whose logs to show, import or search (default {DEFAULT_USER_ID}; reclassify: every user)")
+    parser.add_argument("--timing", action="store_true", help="Print time spent in each stage (parse, match, DB...)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the command (cProfile + allocations) and save the results under profiles/")
     
     if len(sys.argv) == 1:
         parser.print_help()
         sys.exit(1)
         
     args = parser.parse_args()
+    user_id = args.user if args.user is not None else DEFAULT_USER_ID
+    
+    ensure_schema()
+    
+    if args.timing:
+        metrics.enable()
+    query_stats_token = start_query_stats(args.command)
+    profile = Profile(args.command).start() if args.profile else None
     
     if args.command == "log":
-        do_log_workout(args.date)
+        do_log_workout(args.date, user_id)
     elif args.command == "history":
-        do_show_history()
+        do_show_history(user_id)
     elif args.command == "report":
-        do_show_report()
+        do_show_report(user_id)
+    elif args.command == "diet-summary":
+        do_show_diet_summary(args.days, user_id)
+    elif args.command == "import":
+        if not args.file:
+            parser.error("import requires a file path")
+        do_import(args.file, args, user_id)
+    elif args.command == "dedupe":
+        from src.services.cleanup_logs import cleanup
+        cleanup(apply=args.apply, merge=args.merge)
+    elif args.command == "llm-stats":
+        do_show_llm_stats(args.days)
+    elif args.command == "search":
+        if not args.file:
+            parser.error("search requires search terms")
+        do_search(args.file, args.kind, args.page, user_id)
+    elif args.command == "synth":
+        do_synth(args, args.user)
+    elif args.command == "snapshot":
+        do_snapshot(args.rebuild)
+    elif args.command == "reclassify":
+        from src.services.reclassify import reclassify
+        reclassify(since=args.since, until=args.until, user_id=args.user, apply=args.apply)
+    elif args.command == "catalog":
+        from src.services.data_loader import sync_catalog
+        sync_catalog(apply=args.apply, prune=args.prune)
+    
+    if profile:
+        print(f"\n{profile.stop()}")
+    query_stats = end_query_stats(query_stats_token)
+    
+    if args.timing:
+        print("\n[TIMING] Stage latency")
+        print(metrics.format_summary())
+        print_query_stats(query_stats)
+
+def print_query_stats(stats, top=5):
+    print(f"\n[DB] {stats.count} queries in {stats.total_seconds * 1000:.1f} ms")
+    for sql, calls, seconds in stats.by_statement()[:top]:
+        print(f"  {calls:>5}x {seconds * 1000:>8.1f} ms  {sql[:80]}")
 
-def do_show_report():
+def do_show_report(user_id):
     conn = get_connection()
     cursor = conn.cursor()
     
@@ -44,11 +117,12 @@ def do_show_report():
     FROM workout_logs l
     JOIN workout_exercises we ON l.id = we.workout_log_id
     JOIN exercises e ON we.exercise_id = e.id
+    WHERE l.user_id = ?
     ORDER BY l.workout_date DESC, l.id DESC
     LIMIT 50
     """
     
-    cursor.execute(sql)
+    cursor.execute(prepared(sql), (user_id,))
     rows = cursor.fetchall()
     
     print("\n[REPORT] Detailed Workout Log")
@@ -71,7 +145,107 @@ def do_show_report():
         
     conn.close()
 
-def do_log_workout(date_str):
+def do_show_diet_summary(days, user_id):
+    from src.services.diet_service import get_daily_summary
+
+    summary = get_daily_summary(days, user_id)
+
+    print("\n[DIET] Daily Totals (7 / 28 calendar-day averages of the logged days)")
+    print("=" * 100)
+    header = f"{'Date':<12} | {'Cals':>6} | {'P':>5} | {'C':>5} | {'F':>5} | {'7d Cals':>8} | {'7d P':>6} | {'28d Cals':>8} | {'28d P':>6}"
+    print(header)
+    print("-" * 100)
+
+    for day in summary:
+        line = (f"{str(day['log_date']):<12} | {day['calories']:>6} | {day['protein']:>5} | {day['carbs']:>5} | {day['fats']:>5} | "
+                f"{day['calories_avg7']:>8} | {day['protein_avg7']:>6} | {day['calories_avg28']:>8} | {day['protein_avg28']:>6}")
+        print(line)
+
+    if not summary:
+        print("No diet logs yet.")
+
+def do_show_llm_stats(days):
+    from src.services.llm_ledger import daily_stats
+
+    stats = daily_stats(days)
+
+    print(f"\n[AI] Gemini calls, last {days} days")
+    print("=" * 100)
+    header = f"{'Date':<12} | {'Service':<11} | {'Calls':>5} | {'Errors':>6} | {'Cached':>6} | {'p50 ms':>8} | {'p95 ms':>8} | {'Tokens in':>9} | {'Tokens out':>10}"
+    print(header)
+    print("-" * 100)
+
+    for s in stats:
+        p50 = f"{s['p50_ms']:.0f}" if s['p50_ms'] is not None else "-"
+        p95 = f"{s['p95_ms']:.0f}" if s['p95_ms'] is not None else "-"
+        print(f"{s['call_date']:<12} | {s['service']:<11} | {s['calls']:>5} | {s['errors']:>6} | {s['cached']:>6} | "
+              f"{p50:>8} | {p95:>8} | {s['prompt_tokens']:>9} | {s['response_tokens']:>10}")
+
+    if not stats:
+        print("No AI calls recorded yet.")
+
+def do_search(text, kind, page, user_id):
+    from src.services.search_service import search, MATCH_START, MATCH_END, PER_PAGE
+
+    results, total = search(text, kind=kind, page=page, user_id=user_id)
+    pages = max(1, -(-total // PER_PAGE))
+
+    print(f"\n[SEARCH] \"{text}\": {total} match(es), page {page} of {pages}")
+    print("=" * 100)
+    print(f"{'Date':<12} | {'Kind':<7} | {'Type':<10} | {'Match'}")
+    print("-" * 100)
+
+    for r in results:
+        snippet = r['snippet'].replace(MATCH_START, "[").replace(MATCH_END, "]").replace("\n", " ")
+        print(f"{r['date']:<12} | {r['kind']:<7} | {str(r['label'] or '-'):<10} | {snippet}")
+
+    if not results:
+        print("No matches.")
+
+def do_synth(args, first_user):
+    from src.services.synth import generate, first_free_user
+
+    if first_user is None:
+        first_user = first_free_user()   # never write synthetic data into existing users
+    start = datetime.date.fromisoformat(args.start)
+    print(f"\n[SYNTH] {args.users} lifter(s) x {args.years} year(s) from {start}, seed {args.seed}, "
+          f"users {first_user}..{first_user + args.users - 1}")
+    totals = generate(users=args.users, years=args.years, seed=args.seed, start=start, first_user=first_user)
+    rows = totals['workouts'] + totals['exercises'] + totals['activations'] + totals['cardio'] + totals['diet']
+    print(f"[OK] Done! {totals['workouts']} workouts, {totals['exercises']} exercises, "
+          f"{totals['activations']} activations, {totals['cardio']} cardio, {totals['diet']} diet entries "
+          f"in {totals['seconds']:.1f}s ({rows / totals['seconds']:.0f} rows/s).")
+
+def do_snapshot(rebuild):
+    import time
+    from src.services.snapshot import export, open_snapshot, sets_per_muscle, SNAPSHOT_DIR
+
+    print(f"\n[SNAPSHOT] Exporting history columns to {SNAPSHOT_DIR}")
+    start = time.perf_counter()
+    added, rebuilt = export(rebuild=rebuild)
+    elapsed = time.perf_counter() - start
+    for table, (new_rows, total) in added.items():
+        print(f"  {table:<12} +{new_rows} rows ({total} total)")
+    print(f"[OK] {'Rebuilt' if rebuilt else 'Updated'} in {elapsed:.2f}s.")
+
+    # Example aggregate straight off the memory-mapped columns
+    start = time.perf_counter()
+    per_muscle = sets_per_muscle(open_snapshot())
+    elapsed = time.perf_counter() - start
+    top = ", ".join(f"{muscle} {sets:.0f}" for muscle, sets in list(per_muscle.items())[:5])
+    print(f"[SNAPSHOT] Sets per muscle (primary), all users, in {elapsed * 1000:.1f} ms: {top or 'no sets yet'}")
+
+def do_import(path, args, user_id):
+    from src.services.importer import import_file
+
+    print(f"\n[IMPORT] Importing {path} ({args.workers} workers, {args.chunk_size} per commit)")
+    stats = import_file(path, use_ai=not args.no_ai, workers=args.workers, chunk_size=args.chunk_size,
+                        user_id=user_id)
+    print(f"[OK] Done! Imported {stats['imported']}, skipped {stats['duplicates']} duplicates, {stats['failed']} failed.")
+    if stats['failed']:
+        print("[WARN] Failed records were not marked as imported; re-run to retry them.")
+
+def do_log_workout(date_str, user_id):
     print(f"\n[LOG] LOG WORKOUT FOR: {date_str}")
     print("Enter exercises separated by commas (e.g., 'bench, squat 3x10 100kg')")
     user_input = input("> ")
@@ -102,7 +276,7 @@ def do_log_workout(date_str):
         clean_name = item.get('name') or "Unknown"
         
         # Database Matching
-        match_result = matcher.match(clean_name) 
+        match_result = matcher.match(clean_name, user_id=user_id)
         
         if match_result:
             # Merge AI details with DB Match
@@ -144,6 +318,12 @@ def do_log_workout(date_str):
             
         print(f" • {full_info['name']:<25} {detail_str:<15} [{full_info['muscle']}]")
         
+    # Local coverage check (instant, no AI needed)
+    from src.services.coverage import check_coverage, coverage_text
+    report['coverage'] = check_coverage(report)
+    print("\n[COVERAGE]")
+    print(coverage_text(report['coverage'], report['day_type']))
+
     # 5. Get AI Analysis
     print("\n[AI ANALYZING] Generating insights...")
     try:
@@ -161,18 +341,19 @@ def do_log_workout(date_str):
     confirm = input("\n[SAVE] Save this workout? (y/n): ")
     if confirm.lower() == 'y':
         from src.services.workout_service import save_workout
-        save_workout(date_str, report['day_type'], user_input, matched_exercises)
+        save_workout(date_str, report['day_type'], user_input, matched_exercises, user_id)
         print("[OK] Saved successfully!")
     else:
         print("[CANCEL] Discarded.")
 
 # save_workout function removed (moved to services)
 
-def do_show_history():
+def do_show_history(user_id):
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("SELECT id, workout_date, day_type, exercises_raw FROM workout_logs ORDER BY workout_date DESC LIMIT 5")
+    cursor.execute(prepared("SELECT id, workout_date, day_type, exercises_raw FROM workout_logs "
+                            "WHERE user_id = ? ORDER BY workout_date DESC LIMIT 5"), (user_id,))
     rows = cursor.fetchall()
     
     print("\n[HISTORY] RECENT HISTORY")
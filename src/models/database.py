@@ -1,5 +1,14 @@
 import os
+import csv
+import io
 import sqlite3
+import time
+import logging
+import contextvars
+import re
+import threading
+from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
 
 try:
@@ -7,110 +16,344 @@ try:
 except ImportError:
     psycopg2 = None
 
-# Database file location (Fallback)
-DB_PATH = Path(__file__).parent.parent.parent / "workout_logger.db"
-SCHEMA_PATH = Path(__file__).parent.parent.parent / "sql" / "schema.sql"
+# Unique/foreign key violations from either backend. psycopg2 raises subclasses
+# such as errors.UniqueViolation, so catch by type, not by class name.
+IntegrityErrors = (sqlite3.IntegrityError,) + ((psycopg2.IntegrityError,) if psycopg2 else ())
 
-class PostgresCursor:
-    def __init__(self, real_cursor):
+# Database file location (Fallback). SQLITE_PATH points a process at another file, e.g. a load-test copy.
+DB_PATH = Path(os.getenv("SQLITE_PATH") or Path(__file__).parent.parent.parent / "workout_logger.db")
+
+# --- QUERY INSTRUMENTATION ---
+# Statements slower than SLOW_QUERY_MS go to the slow-query log (stderr, or the
+# SLOW_QUERY_LOG file). EXPLAIN_SLOW_QUERIES=1 also captures their query plan.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+EXPLAIN_SLOW_QUERIES = os.getenv("EXPLAIN_SLOW_QUERIES") == "1"
+
+slow_query_log = logging.getLogger("workout_logger.slow_sql")
+if os.getenv("SLOW_QUERY_LOG"):
+    slow_query_log.addHandler(logging.FileHandler(os.getenv("SLOW_QUERY_LOG"), encoding="utf-8"))
+
+class QueryStats:
+    """Queries run during one Flask request or CLI command."""
+    MAX_RECORDED = 1000   # keep memory flat during bulk imports
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total_seconds = 0.0
+        self.queries = []   # (sql, params, seconds)
+
+    def add(self, sql, params, seconds):
+        self.count += 1
+        self.total_seconds += seconds
+        if len(self.queries) < self.MAX_RECORDED:
+            self.queries.append((sql, params, seconds))
+
+    def by_statement(self):
+        """[(sql, calls, seconds)] grouped by statement text, most frequent first (spots N+1 loops)."""
+        grouped = defaultdict(lambda: [0, 0.0])
+        for sql, _, seconds in self.queries:
+            entry = grouped[" ".join(sql.split())]
+            entry[0] += 1
+            entry[1] += seconds
+        return sorted(((sql, n, t) for sql, (n, t) in grouped.items()), key=lambda r: (-r[1], -r[2]))
+
+_query_stats = contextvars.ContextVar("query_stats", default=None)
+
+def start_query_stats(name):
+    """Starts counting queries for a request/command. Returns a token for end_query_stats."""
+    return _query_stats.set(QueryStats(name))
+
+def end_query_stats(token):
+    stats = _query_stats.get()
+    _query_stats.reset(token)
+    return stats
+
+class PreparedSQL(str):
+    """A statement worth preparing server-side (Postgres). Plain str everywhere else."""
+
+def prepared(sql):
+    """Marks a hot statement: `cursor.execute(prepared("SELECT ..."), params)`."""
+    return PreparedSQL(sql)
+
+@lru_cache(maxsize=512)
+def translate_placeholders(sql, numbered=False):
+    """
+    Rewrites '?' placeholders for Postgres, skipping quoted literals.
+    numbered=False -> psycopg2 '%s' style (literal '%' doubled)
+    numbered=True  -> '$1, $2, ...' for PREPARE
+    Returns (sql, placeholder_count).
+    """
+    out = []
+    count = 0
+    quote = None
+    for ch in sql:
+        if quote:
+            if ch == quote:
+                quote = None
+            out.append('%%' if ch == '%' and not numbered else ch)
+        elif ch in ("'", '"'):
+            quote = ch
+            out.append(ch)
+        elif ch == '?':
+            count += 1
+            out.append(f"${count}" if numbered else "%s")
+        elif ch == '%' and not numbered:
+            out.append('%%')
+        else:
+            out.append(ch)
+    return "".join(out), count
+
+class InstrumentedCursor:
+    """Times every statement and reports it to the active QueryStats and slow-query log."""
+    def __init__(self, real_cursor, real_conn):
         self.cursor = real_cursor
+        self._conn = real_conn
 
-    def execute(self, sql, params=None):
-        # Translate '?' to '%s'
-        if params:
-            sql = sql.replace('?', '%s')
+    def _translate(self, sql, params):
+        return sql
+
+    def _execute(self, sql, params):
+        if params is None:
+            return self.cursor.execute(sql)
         return self.cursor.execute(sql, params)
-        
+
+    def _executemany(self, sql, rows):
+        return self.cursor.executemany(sql, rows)
+
+    def execute(self, sql, params=None):
+        start = time.perf_counter()
+        try:
+            return self._execute(sql, params)
+        finally:
+            self._record(sql, params, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_params):
+        rows = list(seq_of_params)
+        start = time.perf_counter()
+        try:
+            return self._executemany(sql, rows)
+        finally:
+            self._record(sql, f"<{len(rows)} rows>", time.perf_counter() - start)
+
+    def _record(self, sql, params, seconds):
+        stats = _query_stats.get()
+        if stats is not None:
+            stats.add(sql, params, seconds)
+
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            message = f"[SLOW SQL] {seconds * 1000:.1f}ms: {' '.join(sql.split())} | params={params!r}"
+            if EXPLAIN_SLOW_QUERIES and sql.lstrip().upper().startswith(("SELECT", "WITH")):
+                message += "\n  PLAN: " + "\n  PLAN: ".join(self._explain(sql, params))
+            slow_query_log.warning(message)
+
+    def _explain_prefix(self):
+        return "EXPLAIN QUERY PLAN "
+
+    def _explain(self, sql, params):
+        # Separate cursor so the caller's pending result set is untouched
+        try:
+            cur = self._conn.cursor()
+            explain_sql = self._explain_prefix() + self._translate(sql, params)
+            if params is None:
+                cur.execute(explain_sql)
+            else:
+                cur.execute(explain_sql, params)
+            plan = [" ".join(str(col) for col in row) for row in cur.fetchall()]
+            cur.close()
+            return plan
+        except Exception as e:
+            return [f"(EXPLAIN failed: {e})"]
+
     def fetchone(self): return self.cursor.fetchone()
     def fetchall(self): return self.cursor.fetchall()
+    def fetchmany(self, size): return self.cursor.fetchmany(size)
     def close(self): self.cursor.close()
+    def __iter__(self): return iter(self.cursor)
+
+    @property
+    def rowcount(self): return self.cursor.rowcount
+
+    @property
+    def description(self): return self.cursor.description
+
+    @property
+    def lastrowid(self): return self.cursor.lastrowid
+
+class SQLiteCursor(InstrumentedCursor):
+    # sqlite3 already caches compiled statements per connection, so prepared() is a no-op here
+    pass
+
+class SQLiteConnection:
+    def __init__(self, real_conn):
+        self.conn = real_conn
+
+    def cursor(self):
+        return SQLiteCursor(self.conn.cursor(), self.conn)
+
+    def commit(self): self.conn.commit()
+    def rollback(self): self.conn.rollback()
+    def close(self): self.conn.close()
+
+# Finds the "(?, ?, ...)" row template of an INSERT ... VALUES statement
+VALUES_TEMPLATE = re.compile(r"\bVALUES\s*(\((?:[^()']|'[^']*')*\))", re.IGNORECASE)
+
+class PostgresCursor(InstrumentedCursor):
+    def _translate(self, sql, params):
+        # Parameterless statements go through untouched (psycopg2 only formats when given params)
+        if params is None:
+            return sql
+        return translate_placeholders(sql)[0]
+
+    def _execute(self, sql, params):
+        prepared_names = getattr(self._conn, "prepared", None)
+        if isinstance(sql, PreparedSQL) and prepared_names is not None:
+            return self._execute_prepared(sql, params, prepared_names)
+        return super()._execute(self._translate(sql, params), params)
+
+    def _execute_prepared(self, sql, params, prepared_names):
+        """PREPARE once per connection, then EXECUTE (the server skips parse/plan)."""
+        name = prepared_names.get(sql)
+        numbered_sql, count = translate_placeholders(str(sql), numbered=True)
+        if name is None:
+            name = f"ps_{len(prepared_names) + 1}"
+            self.cursor.execute(f"PREPARE {name} AS {numbered_sql}")
+            prepared_names[sql] = name
+        if not count:
+            return self.cursor.execute(f"EXECUTE {name}")
+        return self.cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * count)})", params)
+
+    def _executemany(self, sql, rows):
+        from psycopg2.extras import execute_values, execute_batch
+
+        match = VALUES_TEMPLATE.search(sql)
+        if match and "RETURNING" not in sql.upper():
+            # Multi-row INSERT ... VALUES (...), (...) in pages instead of one round trip per row
+            prefix = translate_placeholders(sql[:match.start(1)])[0]
+            suffix = translate_placeholders(sql[match.end(1):])[0]
+            template = translate_placeholders(match.group(1))[0]
+            return execute_values(self.cursor, prefix + "%s" + suffix, rows, template=template, page_size=500)
+        return execute_batch(self.cursor, translate_placeholders(sql)[0], rows, page_size=500)
+
+    def _explain_prefix(self):
+        return "EXPLAIN "
+
+    def copy_rows(self, table, columns, rows):
+        """Bulk load rows with COPY (much faster than INSERTs on Postgres)."""
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in rows:
+            writer.writerow(['\\N' if v is None else v for v in row])
+        buf.seek(0)
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        start = time.perf_counter()
+        try:
+            self.cursor.copy_expert(sql, buf)
+        finally:
+            self._record(sql, f"<{len(rows)} rows>", time.perf_counter() - start)
     
     @property
     def lastrowid(self):
-        # Postgres requires RETURNING id + fetchone(), not .lastrowid attr
-        return self.cursor.lastrowid
+        # psycopg2's lastrowid is an OID; ask for the session's last SERIAL value instead
+        cur = self._conn.cursor()
+        try:
+            cur.execute("SELECT lastval()")
+            return cur.fetchone()[0]
+        finally:
+            cur.close()
 
 class PostgresConnection:
-    def __init__(self, real_conn):
+    def __init__(self, real_conn, pool=None):
         self.conn = real_conn
+        self.pool = pool
         
     def cursor(self):
-        return PostgresCursor(self.conn.cursor())
+        return PostgresCursor(self.conn.cursor(), self.conn)
         
     def commit(self): self.conn.commit()
     def rollback(self): self.conn.rollback()
-    def close(self): self.conn.close()
+
+    def close(self):
+        if self.pool is None:
+            self.conn.close()
+            return
+        # Back to the pool (keeping its prepared statements), minus any open transaction
+        if not self.conn.closed:
+            self.conn.rollback()
+        self.pool.putconn(self.conn, close=bool(self.conn.closed))
+
+if psycopg2 is not None:
+    class PreparingConnection(psycopg2.extensions.connection):
+        """psycopg2 connection that remembers which statements it has PREPAREd."""
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.prepared = {}   # original SQL -> statement name
+
+# Postgres connections are pooled per process so prepared statements get reused
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+_pg_pool = None
+_pg_pool_pid = None
+_pg_pool_lock = threading.Lock()
+
+def _get_pg_pool(db_url):
+    global _pg_pool, _pg_pool_pid
+    with _pg_pool_lock:
+        # A forked worker must not share its parent's sockets
+        if _pg_pool is None or _pg_pool_pid != os.getpid():
+            from psycopg2.pool import ThreadedConnectionPool
+            _pg_pool = ThreadedConnectionPool(1, DB_POOL_MAX, db_url, connection_factory=PreparingConnection)
+            _pg_pool_pid = os.getpid()
+        return _pg_pool
+
+def connect_sqlite(path=DB_PATH, **kwargs):
+    """Instrumented connection to a local SQLite file (for modules that always read SQLite)."""
+    return SQLiteConnection(sqlite3.connect(path, **kwargs))
 
 def get_connection():
     """Get a database connection (Postgres or SQLite)."""
     db_url = os.getenv("DATABASE_URL")
     if db_url:
-        real_conn = psycopg2.connect(db_url)
-        return PostgresConnection(real_conn)
-    return sqlite3.connect(DB_PATH)
+        pool = _get_pg_pool(db_url)
+        return PostgresConnection(pool.getconn(), pool)
+    return connect_sqlite(DB_PATH)
 
-def init_database():
-    """Initialize DB (Supports both)."""
-    logs = []
-    db_url = os.getenv("DATABASE_URL")
-    logs.append(f"Initializing database (Mode: {'Postgres' if db_url else 'SQLite'})")
-    logs.append(f"CWD: {os.getcwd()}")
-    
-    # Try multiple paths for schema.sql
-    possible_paths = [
-        Path(__file__).parent.parent.parent / "sql" / "schema.sql",       # Relative to this file
-        Path(os.getcwd()) / "sql" / "schema.sql",                         # Relative to CWD
-        Path("/opt/render/project/src/sql/schema.sql")                    # Absolute Render path
-    ]
-    
-    schema_sql = None
-    used_path = None
-    
-    for p in possible_paths:
-        logs.append(f"Checking path: {p}")
-        if p.exists():
-            try:
-                with open(p, 'r', encoding='utf-8') as f:
-                    schema_sql = f.read()
-                used_path = p
-                logs.append(f"FOUND schema at: {p}")
-                break
-            except Exception as e:
-                logs.append(f"Found but failed to read {p}: {e}")
-    
-    if not schema_sql:
-        return "<br>".join(logs) + "<br>[FATAL] Could not find schema.sql in any expected location."
+def is_postgres(conn):
+    return isinstance(conn, PostgresConnection)
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    try:
-        # Split schema by semi-colon since executemany/script varies
-        statements = schema_sql.split(';')
-        count = 0
-        for stmt in statements:
-            if stmt.strip():
-                if db_url:
-                     # Replace SQLiteisms for Postgres
-                     stmt = stmt.replace("INTEGER PRIMARY KEY AUTOINCREMENT", "SERIAL PRIMARY KEY")
-                     stmt = stmt.replace("AUTOINCREMENT", "") 
-                
-                try:
-                    cursor.execute(stmt)
-                    count += 1
-                except Exception as e:
-                    logs.append(f"Warning executing statement: {str(e)[:100]}...") # Truncate long errors
-                    
-        conn.commit()
-        logs.append(f"[OK] Database initialized. Executed {count} statements.")
-    except Exception as e:
-        logs.append(f"[ERROR] {e}")
-        conn.rollback()
-        # Do not raise, return logs so user sees them
-    finally:
-        conn.close()
-        
-    return "<br>".join(logs)
+def bulk_insert(cursor, table, columns, rows):
+    """
+    Inserts many rows in one call: COPY on Postgres, executemany on SQLite.
+    """
+    if not rows:
+        return
+    if isinstance(cursor, PostgresCursor):
+        cursor.copy_rows(table, columns, rows)
+    else:
+        placeholders = ", ".join("?" * len(columns))
+        cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
 
-if __name__ == "__main__":
-    init_database()
+def allocate_ids(cursor, table, count):
+    """
+    Reserves `count` primary keys for `table` so parent/child rows can be bulk inserted.
+    On SQLite the caller must already hold the write lock (BEGIN IMMEDIATE).
+    """
+    if count <= 0:
+        return []
+    if isinstance(cursor, PostgresCursor):
+        cursor.execute(
+            f"SELECT nextval(pg_get_serial_sequence('{table}', 'id')) FROM generate_series(1, ?)", (count,)
+        )
+        return [row[0] for row in cursor.fetchall()]
+    # AUTOINCREMENT tables never hand out an id twice: start after sqlite_sequence (which
+    # remembers deleted rows) and move it past the reservation, so ids stay increasing
+    # for the snapshot's "id > last_id" export
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+    highest = cursor.fetchone()[0]
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+    row = cursor.fetchone()
+    start = max(highest, row[0] if row else 0) + 1
+    if row:
+        cursor.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (start + count - 1, table))
+    else:
+        cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, start + count - 1))
+    return list(range(start, start + count))
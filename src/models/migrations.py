@@ -0,0 +1,174 @@
+"""
+Versioned schema migrations.
+Migrations are the numbered files in sql/migrations (001_initial_schema.sql, ...).
+Applied versions are recorded in schema_version, and only pending migrations
+run, all in one transaction. ensure_schema() is what the app calls on boot.
+When the schema is current, it costs one indexed read.
+
+Run manually:
+    python src/models/migrations.py            # apply pending migrations
+    python src/models/migrations.py --status   # show applied/pending
+
+Writing a migration: add NNN_description.sql. Statements are split on ';'
+(except inside CREATE TRIGGER ... END), so keep ';' out of comments and
+string literals. Write SQLite syntax. For Postgres, AUTOINCREMENT ids become
+SERIAL and INSERT OR IGNORE becomes ON CONFLICT DO NOTHING. When the backends
+need different SQL, NNN_description.postgres.sql replaces the file on Postgres.
+"""
+import sys
+import os
+sys.path.append(os.getcwd())
+import re
+import argparse
+from pathlib import Path
+from src.models.database import get_connection, is_postgres
+
+MIGRATIONS_DIR = Path(__file__).parent.parent.parent / "sql" / "migrations"
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+TRIGGER_START = re.compile(r"^CREATE\s+TRIGGER\b", re.IGNORECASE)
+TRIGGER_END = re.compile(r"\bEND$", re.IGNORECASE)
+ADD_COLUMN = re.compile(r"^ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(\w+)", re.IGNORECASE)
+
+# Arbitrary key for pg_advisory_xact_lock, so concurrent workers migrate one at a time
+PG_MIGRATION_LOCK = 7351
+
+def list_migrations():
+    """Returns [(version, name, path)] ordered by version."""
+    migrations = []
+    for path in MIGRATIONS_DIR.glob("*.sql"):
+        match = MIGRATION_FILE.match(path.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), path))
+    return sorted(migrations)
+
+def latest_version():
+    migrations = list_migrations()
+    return migrations[-1][0] if migrations else 0
+
+def current_version(cursor):
+    """Highest applied version (0 for a database that predates schema_version)."""
+    cursor.execute("SELECT MAX(version) FROM schema_version")
+    return cursor.fetchone()[0] or 0
+
+def _read_version(conn):
+    cursor = conn.cursor()
+    try:
+        return current_version(cursor)
+    except Exception:
+        # No schema_version table yet (on Postgres this also clears the failed transaction)
+        conn.rollback()
+        return 0
+
+def _statements(path):
+    """Statements of a migration file, without their full-line comments."""
+    pending = ""
+    for chunk in path.read_text(encoding="utf-8").split(";"):
+        stmt = "\n".join(line for line in chunk.splitlines() if not line.strip().startswith("--")).strip()
+        if pending:
+            stmt = f"{pending};\n{stmt}"
+        # A trigger body holds its own ';'-terminated statements: read on to its END
+        if TRIGGER_START.match(stmt) and not TRIGGER_END.search(stmt):
+            pending = stmt
+            continue
+        pending = ""
+        if stmt:
+            yield stmt
+
+def _for_postgres(stmt):
+    """Rewrites the SQLite-isms used in migration files."""
+    stmt = stmt.replace("INTEGER PRIMARY KEY AUTOINCREMENT", "SERIAL PRIMARY KEY")
+    if re.match(r"^INSERT\s+OR\s+IGNORE\b", stmt, re.IGNORECASE):
+        stmt = re.sub(r"^INSERT\s+OR\s+IGNORE\b", "INSERT", stmt, flags=re.IGNORECASE) + "\nON CONFLICT DO NOTHING"
+    return stmt
+
+def _column_exists(conn, cursor, table, column):
+    if is_postgres(conn):
+        cursor.execute("SELECT 1 FROM information_schema.columns WHERE table_name = ? AND column_name = ?",
+                       (table.lower(), column.lower()))
+        return cursor.fetchone() is not None
+    cursor.execute(f"PRAGMA table_info({table})")
+    return any(row[1].lower() == column.lower() for row in cursor.fetchall())
+
+def _apply(conn, cursor, path):
+    if is_postgres(conn):
+        override = path.with_suffix(".postgres.sql")
+        if override.exists():
+            path = override
+    for stmt in _statements(path):
+        # Databases created by the old schema.sql loader may already have the column
+        add_column = ADD_COLUMN.match(stmt)
+        if add_column and _column_exists(conn, cursor, *add_column.groups()):
+            continue
+        cursor.execute(_for_postgres(stmt) if is_postgres(conn) else stmt)
+
+def migrate():
+    """Applies pending migrations in one transaction. Returns the versions applied."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        # Take the write lock first, so two workers booting together cannot both migrate
+        if is_postgres(conn):
+            cursor.execute("SELECT pg_advisory_xact_lock(?)", (PG_MIGRATION_LOCK,))
+        else:
+            cursor.execute("BEGIN IMMEDIATE")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        version = current_version(cursor)
+
+        applied = []
+        for number, name, path in list_migrations():
+            if number <= version:
+                continue
+            print(f"[DB] Applying migration {number:03d}_{name}")
+            _apply(conn, cursor, path)
+            cursor.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (number, name))
+            applied.append(number)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return applied
+
+def ensure_schema():
+    """Boot check: one indexed read when the schema is current, otherwise migrate()."""
+    conn = get_connection()
+    try:
+        version = _read_version(conn)
+    finally:
+        conn.close()
+
+    if version >= latest_version():
+        return []
+    return migrate()
+
+def status():
+    conn = get_connection()
+    try:
+        version = _read_version(conn)
+    finally:
+        conn.close()
+
+    for number, name, _ in list_migrations():
+        state = "applied" if number <= version else "pending"
+        print(f"  {number:03d}_{name:<24} {state}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument("--status", action="store_true", help="Show applied and pending migrations")
+    args = parser.parse_args()
+
+    if args.status:
+        status()
+    else:
+        applied = migrate()
+        print(f"[OK] Schema at version {latest_version()} ({len(applied)} migration(s) applied).")
@@ -0,0 +1,141 @@
+"""
+Write path for the service layer.
+run_write(fn) runs fn(cursor) in a transaction and returns its result.
+
+Normally each call opens its own connection and commits, as before.
+With WRITE_BEHIND=1 (SQLite only) calls are queued to one writer thread per
+process instead. The writer takes whatever jobs have piled up, runs each in a
+SAVEPOINT and commits the group once. Callers block until that commit is done,
+so a returned save is durable. Writers in one process then stop fighting over
+the database lock, and one fsync covers many saves.
+"""
+import contextvars
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from src.models import database
+from src.models.database import get_connection, connect_sqlite
+from src.services.metrics import inc
+
+WRITE_BEHIND = os.getenv("WRITE_BEHIND") == "1"
+WRITE_GROUP_MAX = int(os.getenv("WRITE_GROUP_MAX", "64"))   # jobs per commit
+LOCK_TIMEOUT = 30   # seconds to wait on writers in other processes
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def set_write_behind(enabled):
+    """Switches the mode at runtime (used by the write benchmark)."""
+    global WRITE_BEHIND
+    WRITE_BEHIND = enabled
+
+def _use_writer():
+    return WRITE_BEHIND and not os.getenv("DATABASE_URL")
+
+def run_write(fn):
+    """Runs fn(cursor) in a transaction. Returns fn's result once it is committed."""
+    if _use_writer():
+        return _get_writer().submit(fn).result()
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        result = fn(cursor)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+class Writer:
+    """Single thread that owns the write connection and group-commits queued jobs."""
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, fn):
+        # The job runs in the caller's context, so per-request query stats still count it
+        context = contextvars.copy_context()
+        future = Future()
+        self.jobs.put((lambda cursor: context.run(fn, cursor), future))
+        return future
+
+    def _connect(self):
+        # Autocommit mode: transactions are managed explicitly below
+        conn = connect_sqlite(self.path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        cursor = conn.cursor()
+        # WAL keeps readers (other workers, page loads) unblocked while the writer commits
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=FULL")
+        return conn, cursor
+
+    def _run(self):
+        cursor = None
+        while True:
+            # Whatever queued up during the previous commit goes into this one
+            group = [self.jobs.get()]
+            while len(group) < WRITE_GROUP_MAX:
+                try:
+                    group.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+
+            if cursor is None:
+                try:
+                    _, cursor = self._connect()
+                except sqlite3.Error as e:
+                    for _, future in group:
+                        future.set_exception(e)
+                    continue
+            self._commit_group(cursor, group)
+
+    def _commit_group(self, cursor, group):
+        results = []
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for fn, future in group:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                # A failing job only rolls back its own savepoint
+                cursor.execute("SAVEPOINT job")
+                try:
+                    results.append((future, fn(cursor), None))
+                    cursor.execute("RELEASE job")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO job")
+                    cursor.execute("RELEASE job")
+                    results.append((future, None, e))
+            cursor.execute("COMMIT")
+        except sqlite3.Error as e:
+            try:
+                cursor.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            for fn, future in group:
+                if future.running():
+                    future.set_exception(e)
+            return
+
+        inc("workout_write_commits_total")
+        inc("workout_write_jobs_total", len(results))
+        # Acknowledge only after COMMIT returned, i.e. the group is on disk
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        # Forked workers start their own thread (threads do not survive fork)
+        if _writer is None or _writer.pid != os.getpid():
+            _writer = Writer(database.DB_PATH)
+        return _writer
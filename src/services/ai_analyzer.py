@@ -1,10 +1,16 @@
 """
 AI Analysis Service using Google Gemini API.
 Analyzes workout patterns and suggests improvements.
+Gaps and redundancy come from the local coverage check (coverage.py) and are
+given to the model as facts; the model only turns them into advice.
 """
 import os
 import google.generativeai as genai
 from collections import Counter
+from src.services.gemini import configure as configure_gemini, generate_async
+from src.services.metrics import timed
+from src.services.llm_ledger import llm_call, async_llm_call
+from src.services.coverage import check_coverage, coverage_text
 
 # Set API Key (Prioritize Env Var for Production)
 API_KEY = os.getenv("GEMINI_API_KEY")
@@ -17,14 +23,16 @@ class AIAnalyzer:
                 self.available = False
                 return
                 
-            genai.configure(api_key=API_KEY)
+            configure_gemini(API_KEY)
             # Use 'gemini-2.5-flash' model (as found in list)
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
+            self.model_name = 'gemini-2.5-flash'
+            self.model = genai.GenerativeModel(self.model_name)
             self.available = True
         except Exception as e:
             print(f"[WARN] AI Init failed: {e}")
             self.available = False
 
+    @timed("ai_analyze")
     def analyze(self, workout_report):
         """
         Input: Report dictionary from Categorizer
@@ -33,36 +41,48 @@ class AIAnalyzer:
         if not self.available:
             return "AI Analysis unavailable (API connection failed)."
 
-        # 1. Construct Prompt
-        exercises_text = "\n".join([
-            f"- {ex['name']} (Target: {ex['muscle']})" 
-            for ex in workout_report['exercises']
-        ])
+        try:
+            # 2. Get Response
+            with llm_call("ai_analyze", self.model_name) as call:
+                response = call.response = self.model.generate_content(self._prompt(workout_report))
+                return response.text.strip()
+        except Exception as e:
+            return f"Error analyzing workout: {e}"
+
+    @timed("ai_analyze")
+    async def analyze_async(self, workout_report):
+        """analyze() for the async app: awaits the SDK's async call instead of blocking a worker."""
+        if not self.available:
+            return "AI Analysis unavailable (API connection failed)."
+
+        try:
+            async with async_llm_call("ai_analyze", self.model_name) as call:
+                response = call.response = await generate_async(self.model, self._prompt(workout_report))
+                return response.text.strip()
+        except Exception as e:
+            return f"Error analyzing workout: {e}"
+
+    def _facts(self, workout_report):
+        findings = workout_report.get('coverage')
+        if findings is None:
+            findings = check_coverage(workout_report)
+        return coverage_text(findings, workout_report['day_type'])
+
+    def _prompt(self, workout_report):
+        # 1. Construct Prompt (coverage is already checked locally; the model only advises)
+        exercises_text = ", ".join(f"{ex['name']} ({ex['muscle']})" for ex in workout_report['exercises'])
         
         prompt = f"""
         Act as an elite strength and conditioning coach.
-        Analyze this {workout_report['day_type']} workout session:
+        {workout_report['day_type']} session: {exercises_text}
 
-        EXERCISES PERFORMED:
-        {exercises_text}
+        Coverage check (facts, do not re-derive):
+        {self._facts(workout_report)}
 
-        MUSCLE GROUP VOLUME:
-        {dict(workout_report['muscle_counts'])}
-
-        Provide a brief, bulleted critique (max 3-4 points):
-        1. Identify any MAJOR missing muscle groups for this specific day type (e.g., if Push day, did they miss rear delts or a specific tricep head?).
-        2. Identify any redundancy (too many exercises for same muscle).
-        3. One actionable tip to improve this specific session.
-        
+        Give 2-3 short bullet points: how to fix the gaps or redundancy above with specific exercises, then one tip for this session.
         Keep it concise and encouraging. No formatting, just specific advice.
         """
-
-        try:
-            # 2. Get Response
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
-        except Exception as e:
-            return f"Error analyzing workout: {e}"
+        return prompt
 
 # Test Logic
 if __name__ == "__main__":
@@ -4,24 +4,38 @@ Estimates nutrition (calories/macros) from natural language text.
 """
 import os
 import json
+import math
 import google.generativeai as genai
+from src.services.food_cache import split_diet_text, lookup_foods, count_sources, MACROS
+from src.services.gemini import configure as configure_gemini
+from src.services.metrics import timed, inc
+from src.services.llm_ledger import llm_call, record_call
 
 # API Key (reused)
 API_KEY = os.getenv("GEMINI_API_KEY")
 
+def _macro(value):
+    """A macro from the model's JSON as a number: null/missing -> 0, text or NaN -> ValueError."""
+    value = float(value or 0)
+    if not math.isfinite(value):
+        raise ValueError(f"not a number: {value}")
+    return int(value) if value.is_integer() else round(value, 1)
+
 class AIDietParser:
     def __init__(self):
+        self.model_name = 'gemini-2.5-flash'
         try:
             if not API_KEY:
                 self.available = False
                 return
 
-            genai.configure(api_key=API_KEY)
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
+            configure_gemini(API_KEY)
+            self.model = genai.GenerativeModel(self.model_name)
             self.available = True
         except:
             self.available = False
 
+    @timed("ai_diet")
     def parse_diet(self, full_text):
         """
         Input: "Bf - 2 eggs. Lunch - Rice."
@@ -29,13 +43,56 @@ class AIDietParser:
             {
                 "meal_type": "Breakfast", 
                 "food_raw": "2 eggs", 
-                "calories": 140, "protein": 12, "carbs": 1, "fats": 10
+                "calories": 140, "protein": 12, "carbs": 1, "fats": 10,
+                "source": "cache"   # or "model", or "unknown"
             }, ...
         ]
+        Items confirmed before are answered from the local food cache;
+        only the unknown ones are sent to Gemini, in a single prompt.
+        Items nobody could estimate (Gemini down or no answer) are kept with
+        zero macros and source "unknown", so the user can see and fix them.
         """
-        if not self.available:
+        fragments = split_diet_text(full_text)
+        if not fragments:
             return []
 
+        cached = lookup_foods([food for _, food in fragments])
+        unknown = [(meal, food) for meal, food in fragments if food not in cached]
+
+        if unknown:
+            estimates = self._estimate_batch(unknown)
+        else:
+            # Whole log answered locally: ledger it as a cache hit
+            estimates = {}
+            record_call("ai_diet", self.model_name, 0, "cache", cached=True)
+
+        results = []
+        for meal_type, food in fragments:
+            if food in cached:
+                nutrition, source = cached[food], "cache"
+            elif food in estimates:
+                nutrition, source = estimates[food], "model"
+            else:
+                nutrition, source = dict.fromkeys(MACROS, 0), "unknown"
+            results.append({"meal_type": meal_type, "food_raw": food, **nutrition, "source": source})
+
+        # Shown by /metrics and the --timing summary
+        for source, n in count_sources(results).items():
+            inc("workout_diet_items_total", n, source=source)
+        return results
+
+    def _estimate_batch(self, fragments):
+        """
+        Asks Gemini for the nutrition of each (meal_type, food) fragment at once.
+        Returns {food: {calories, protein, carbs, fats}}.
+        """
+        if not self.available:
+            return {}
+
+        items_text = "\n".join(
+            f"{i}. [{meal}] {food}" for i, (meal, food) in enumerate(fragments, start=1)
+        )
+
         prompt = f"""
         [IMPORTANT CONTEXT]
         The user measures food using a specific "Magnus" container which is **450ml**.
@@ -44,17 +101,15 @@ class AIDietParser:
         - Example: "1 container of Rice" = 450ml of Rice.
         - Please estimate calories/macros based on this specific volume.
 
-        Analyze this food log: "{full_text}"
+        Estimate calories and macros (Protein/Carbs/Fats) for each numbered food item below.
+        Treat each line as ONE entry, even if it mentions several foods.
+
+        {items_text}
 
-        1. Split into separate meal entries if multiple are listed.
-        2. Detect meal type (Breakfast/Lunch/Dinner/Snack) from keywords like "Bf", "Eve", etc. Default to "Snack" if unknown.
-        3. Estimate calories and macros (Protein/Carbs/Fats) for each item.
-        
-        Return ONLY a JSON LIST of objects. Format:
+        Return ONLY a JSON LIST with one object per numbered item. Format:
         [
             {{
-                "meal_type": "Breakfast",
-                "food_raw": "2 eggs and toast",
+                "id": 1,
                 "calories": 250,
                 "protein": 14,
                 "carbs": 30,
@@ -62,13 +117,26 @@ class AIDietParser:
             }}
         ]
         """
-        
+
         try:
-            response = self.model.generate_content(prompt)
-            text = response.text.replace("```json", "").replace("```", "").strip()
-            data = json.loads(text)
+            with llm_call("ai_diet", self.model_name) as call:
+                response = call.response = self.model.generate_content(prompt)
+                text = response.text.replace("```json", "").replace("```", "").strip()
+                data = json.loads(text)
             if isinstance(data, dict): data = [data]
-            return data
         except Exception as e:
             print(f"[WARN] AI Diet Parse failed: {e}")
-            return []
+            return {}
+
+        estimates = {}
+        for entry in data:
+            try:
+                index = int(entry['id']) - 1
+                if index < 0:
+                    continue   # ids start at 1; -1 would wrap to the last fragment
+                _, food = fragments[index]
+                # Non-numeric answers leave the item "unknown" rather than reaching the cache or totals
+                estimates[food] = {m: _macro(entry.get(m)) for m in MACROS}
+            except (KeyError, ValueError, TypeError, IndexError):
+                continue
+        return estimates
@@ -4,6 +4,9 @@ Uses Gemini to extract structured data (Exercise, Sets, Reps, Weight) from natur
 """
 import google.generativeai as genai
 import json
+from src.services.gemini import configure as configure_gemini, generate_async
+from src.services.metrics import timed
+from src.services.llm_ledger import llm_call, async_llm_call
 
 import os
 
@@ -13,12 +16,14 @@ API_KEY = os.getenv("GEMINI_API_KEY")
 class AIParser:
     def __init__(self):
         try:
-            genai.configure(api_key=API_KEY)
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
+            configure_gemini(API_KEY)
+            self.model_name = 'gemini-2.5-flash'
+            self.model = genai.GenerativeModel(self.model_name)
             self.available = True
         except:
             self.available = False
 
+    @timed("ai_parse")
     def parse(self, full_text):
         """
         Input: "bench 3 sets 100, 110, 120 | squats 5x5"
@@ -27,7 +32,32 @@ class AIParser:
         if not self.available:
             return []
 
-        prompt = f"""
+        try:
+            with llm_call("ai_parse", self.model_name) as call:
+                response = call.response = self.model.generate_content(self._prompt(full_text))
+                data = self._decode(response)
+            return data
+        except Exception as e:
+            print(f"[WARN] AI Parse failed: {e}")
+            return []
+
+    @timed("ai_parse")
+    async def parse_async(self, full_text):
+        """parse() for the async app: awaits the SDK's async call instead of blocking a worker."""
+        if not self.available:
+            return []
+
+        try:
+            async with async_llm_call("ai_parse", self.model_name) as call:
+                response = call.response = await generate_async(self.model, self._prompt(full_text))
+                data = self._decode(response)
+            return data
+        except Exception as e:
+            print(f"[WARN] AI Parse failed: {e}")
+            return []
+
+    def _prompt(self, full_text):
+        return f"""
         Extract a list of activities from this workout log: "{full_text}"
         
         Return ONLY a JSON LIST of objects. 
@@ -53,18 +83,14 @@ class AIParser:
             {{"type": "cardio", "name": "Treadmill Run", "duration": "25 mins", "distance": "5km", "speed": null}}
         ]
         """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            # Clean response (remove markdown code blocks if any)
-            text = response.text.replace("```json", "").replace("```", "").strip()
-            # Ensure it is a list
-            data = json.loads(text)
-            if isinstance(data, dict): data = [data]
-            return data
-        except Exception as e:
-            print(f"[WARN] AI Parse failed: {e}")
-            return []
+
+    def _decode(self, response):
+        # Clean response (remove markdown code blocks if any)
+        text = response.text.replace("```json", "").replace("```", "").strip()
+        # Ensure it is a list
+        data = json.loads(text)
+        if isinstance(data, dict): data = [data]
+        return data
 
 if __name__ == "__main__":
     parser = AIParser()
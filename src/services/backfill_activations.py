@@ -2,14 +2,14 @@
 Backfill muscle activations for existing workout exercises.
 Run this once to fix old logs that didn't track activations.
 """
-import sqlite3
+import sys
+import os
+sys.path.append(os.getcwd())
 import json
-from pathlib import Path
-
-DB_PATH = Path(__file__).parent.parent.parent / "workout_logger.db"
+from src.models.database import connect_sqlite, DB_PATH
 
 def backfill():
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_sqlite(DB_PATH)
     cursor = conn.cursor()
     
     print("Checking for exercises missing activations...")
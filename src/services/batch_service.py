@@ -0,0 +1,136 @@
+"""
+Batch upload for API clients (the phone app syncs in bursts).
+Each item carries a client-chosen idempotency key. Items are parsed, matched
+and categorized in parallel, then every item is written in one transaction
+through the same code as save_workout / save_diet_logs. An item's result is
+stored under its key, so a retried upload replays the result and writes
+nothing new. Keys are per user (see users.scoped_key).
+"""
+import datetime
+import json
+from concurrent.futures import ThreadPoolExecutor
+from src.models.database import get_connection, IntegrityErrors
+from src.models.writer import run_write
+from src.services.pipeline import analyze_workout
+from src.services.workout_service import write_workout
+from src.services.diet_service import write_diet_logs
+from src.services.metrics import timed
+from src.services.users import DEFAULT_USER_ID, scoped_key
+
+MAX_BATCH_ITEMS = 100
+MAX_KEY_LENGTH = 128
+MAX_TEXT_LENGTH = 10000
+
+def validate_item(item):
+    """Returns (record, None) for a usable item, else (None, error message)."""
+    if not isinstance(item, dict):
+        return None, "item must be an object"
+    key, record_type, date, text = item.get("key"), item.get("type"), item.get("date"), item.get("text")
+    if not isinstance(key, str) or not key or len(key) > MAX_KEY_LENGTH:
+        return None, f"key must be a non-empty string of at most {MAX_KEY_LENGTH} characters"
+    if record_type not in ("workout", "diet"):
+        return None, "type must be 'workout' or 'diet'"
+    try:
+        datetime.date.fromisoformat(str(date))
+    except ValueError:
+        return None, "date must be YYYY-MM-DD"
+    if not isinstance(text, str) or not text.strip() or len(text) > MAX_TEXT_LENGTH:
+        return None, f"text must be non-empty and at most {MAX_TEXT_LENGTH} characters"
+    return {"key": key, "type": record_type, "date": str(date), "text": text.strip()}, None
+
+def _stored_results(cursor, keys, user_id):
+    """{client key: stored result} for the user's keys that were already uploaded."""
+    if not keys:
+        return {}
+    scoped = {scoped_key(key, user_id): key for key in keys}
+    placeholders = ",".join("?" * len(scoped))
+    cursor.execute(f"SELECT idempotency_key, result FROM api_idempotency WHERE idempotency_key IN ({placeholders})",
+                   list(scoped))
+    return {scoped[row[0]]: json.loads(row[1]) for row in cursor.fetchall()}
+
+class BatchUploader:
+    def __init__(self, ai_parser, matcher, categorizer, ai_diet, workers=4):
+        self.ai_parser = ai_parser
+        self.matcher = matcher
+        self.categorizer = categorizer
+        self.ai_diet = ai_diet
+        self.workers = workers
+
+    @timed("api_batch")
+    def upload(self, records, user_id=DEFAULT_USER_ID):
+        """
+        records: validated items [{key, type, date, text}], saved for user_id.
+        Returns {key: result}. A result has a status of saved, replayed or failed.
+        """
+        keys = {r["key"] for r in records}
+        conn = get_connection()
+        stored = _stored_results(conn.cursor(), keys, user_id)
+        conn.close()
+
+        # One record per new key (a key repeated inside the batch is handled once)
+        pending = {}
+        for record in records:
+            if record["key"] not in stored:
+                pending.setdefault(record["key"], record)
+
+        # AI calls happen outside the transaction so the write lock is held only for the writes
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            analyzed = list(pool.map(lambda record: self._analyze(record, user_id), pending.values()))
+
+        try:
+            saved = run_write(lambda cursor: self._write(cursor, analyzed, user_id))
+        except IntegrityErrors:
+            # A concurrent retry stored some of these keys first: replay those instead
+            saved = run_write(lambda cursor: self._write(cursor, analyzed, user_id))
+
+        results = {key: {**result, "status": "replayed"} for key, result in stored.items()}
+        results.update(saved)
+        return results
+
+    def _analyze(self, record, user_id):
+        try:
+            if record["type"] == "diet":
+                items = self.ai_diet.parse_diet(record["text"])
+                if not items:
+                    return record, None, "no nutrition estimates"
+                unknown = [i["food_raw"] for i in items if i.get("source") == "unknown"]
+                if unknown:
+                    return record, None, "no nutrition estimate for: " + ", ".join(unknown)
+                return record, items, None
+
+            day_type, items = analyze_workout(record["text"], self.ai_parser, self.matcher, self.categorizer,
+                                             user_id)
+            if not day_type:
+                return record, None, "no exercises recognised"
+            return record, (day_type, items), None
+        except Exception as e:
+            return record, None, str(e)
+
+    def _write(self, cursor, analyzed, user_id):
+        stored = _stored_results(cursor, [record["key"] for record, _, _ in analyzed], user_id)
+
+        results = {}
+        for record, parsed, error in analyzed:
+            key = record["key"]
+            if key in stored:
+                results[key] = {**stored[key], "status": "replayed"}
+                continue
+            if error:
+                # Not stored: the client may retry the key once the text or the AI is fixed
+                results[key] = {"type": record["type"], "status": "failed", "error": error}
+                continue
+
+            if record["type"] == "workout":
+                day_type, items = parsed
+                log_id = write_workout(cursor, record["date"], day_type, record["text"], items, user_id)
+                result = {"type": "workout", "id": log_id, "day_type": day_type,
+                          "exercises": [i.get("name") for i in items]}
+            else:
+                created = write_diet_logs(cursor, record["date"], parsed, user_id)
+                result = {"type": "diet", "entries": created,
+                          "calories": sum(i.get("calories", 0) or 0 for i in parsed)}
+
+            cursor.execute("INSERT INTO api_idempotency (idempotency_key, record_type, result) VALUES (?, ?, ?)",
+                           (scoped_key(key, user_id), record["type"], json.dumps(result)))
+            results[key] = {**result, "status": "saved"}
+        return results
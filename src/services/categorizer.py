@@ -2,24 +2,20 @@
 Categorizes a list of exercises into a structured workout report.
 Determines Day Type (Push/Pull/Legs) and groups by muscle.
 """
-import sqlite3
-from pathlib import Path
 from collections import Counter
-
-DB_PATH = Path(__file__).parent.parent.parent / "workout_logger.db"
+from src.models.database import get_connection
+from src.services.metrics import timed
 
 class WorkoutCategorizer:
     def __init__(self):
         pass
         
+    @timed("categorize")
     def categorize(self, exercise_names):
         """
         Input: ["Barbell Bench Press", "Lateral Raise", ...]
         Output: Dictionary with Day Type, Muscle Groups, etc.
         """
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Prepare report structure
         report = {
             "day_type": "UNKNOWN",
@@ -28,17 +24,26 @@ class WorkoutCategorizer:
             "category_counts": Counter() # Push/Pull/Legs counts
         }
         
+        # Details for every exercise in one query (configured backend, SQLite or Postgres)
+        names = list(set(exercise_names))
+        details = {}
+        if names:
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT e.name, m.name, mg.name, mg.category
+                    FROM exercises e
+                    JOIN muscles m ON e.primary_muscle_id = m.id
+                    JOIN muscle_groups mg ON m.muscle_group_id = mg.id
+                    WHERE e.name IN ({",".join("?" * len(names))})
+                """, names)
+                details = {row[0]: row for row in cursor.fetchall()}
+            finally:
+                conn.close()
+        
         for ex_name in exercise_names:
-            # Get details for this exercise
-            cursor.execute("""
-                SELECT e.name, m.name, mg.name, mg.category 
-                FROM exercises e
-                JOIN muscles m ON e.primary_muscle_id = m.id
-                JOIN muscle_groups mg ON m.muscle_group_id = mg.id
-                WHERE e.name = ?
-            """, (ex_name,))
-            
-            row = cursor.fetchone()
+            row = details.get(ex_name)
             if row:
                 real_name, muscle_name, group_name, category = row
                 
@@ -54,8 +59,6 @@ class WorkoutCategorizer:
                 report["category_counts"][category] += 1
             else:
                 pass # Should not happen if name comes from Matcher
-                
-        conn.close()
         
         # Determine Day Type (Majority Rule)
         if report["category_counts"]:
@@ -1,71 +1,180 @@
 """
-Script to cleanup duplicate logs and update dates.
+Duplicate detection for workout and diet logs.
+Hashes each entry's normalized content, finds each user's duplicates across
+the whole database in one grouped query and batch-deletes (or merges) the
+extras, keeping the oldest entry of each group.
+
+Dry-run by default: prints the report and changes nothing.
+    python src/services/cleanup_logs.py            # report only
+    python src/services/cleanup_logs.py --apply    # delete duplicates
+    python src/services/cleanup_logs.py --apply --merge
 """
-import sqlite3
 import sys
-from pathlib import Path
+import os
+sys.path.append(os.getcwd())
+import argparse
+from src.models.database import get_connection
+from src.services.hashing import workout_hash, diet_hash
+from src.services.diet_service import refresh_daily_totals
+from src.services.data_version import bump_version
+
+BATCH_SIZE = 500
+
+# table -> (date column, columns hashed after the date, hash function)
+HASHED_TABLES = {
+    "workout_logs": ("workout_date", ("exercises_raw",), workout_hash),
+    "diet_logs": ("log_date", ("meal_type", "food_raw"), diet_hash),
+}
+
+def _batches(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), BATCH_SIZE):
+        yield ids[i:i + BATCH_SIZE]
+
+def _in_clause(ids):
+    return ",".join("?" * len(ids))
+
+def _stage_hashes(cursor, table):
+    """
+    Computes hashes for rows saved before content hashes existed and stages
+    them in a temp table, so the grouped query sees every row.
+    Returns [(id, hash)] for the staged rows.
+    """
+    date_col, cols, hash_fn = HASHED_TABLES[table]
+    cursor.execute(f"SELECT id, {date_col}, {', '.join(cols)} FROM {table} WHERE content_hash IS NULL")
+    staged = [(row[0], hash_fn(*row[1:])) for row in cursor.fetchall()]
+
+    cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS staged_{table} (id INTEGER, content_hash TEXT)")
+    cursor.execute(f"DELETE FROM staged_{table}")
+    if staged:
+        cursor.executemany(f"INSERT INTO staged_{table} (id, content_hash) VALUES (?, ?)", staged)
+    return staged
+
+def find_duplicates(cursor, table):
+    """
+    Returns [(duplicate_id, keep_id, date, text, user_id)] for every row whose
+    content hash matches an older row of the same user in the same table.
+    """
+    date_col, cols, _ = HASHED_TABLES[table]
+    cursor.execute(f"""
+        WITH hashes AS (
+            SELECT id, user_id, content_hash FROM {table} WHERE content_hash IS NOT NULL
+            UNION ALL
+            SELECT s.id, t.user_id, s.content_hash FROM staged_{table} s JOIN {table} t ON t.id = s.id
+        ),
+        groups AS (
+            SELECT user_id, content_hash, MIN(id) AS keep_id
+            FROM hashes
+            GROUP BY user_id, content_hash
+            HAVING COUNT(*) > 1
+        )
+        SELECT h.id, g.keep_id, t.{date_col}, t.{cols[-1]}, t.user_id
+        FROM hashes h
+        JOIN groups g ON g.user_id = h.user_id AND g.content_hash = h.content_hash
+        JOIN {table} t ON t.id = h.id
+        WHERE h.id <> g.keep_id
+        ORDER BY g.keep_id, h.id
+    """)
+    return cursor.fetchall()
+
+def _merge_workout_children(cursor, pairs):
+    """
+    Keepers that recorded no exercises/cardio adopt them from their first
+    duplicate that did, instead of losing them with the duplicate.
+    """
+    for child_table in ("workout_exercises", "cardio_logs"):
+        log_ids = list({i for pair in pairs for i in pair})
+        with_children = set()
+        for batch in _batches(log_ids):
+            cursor.execute(f"SELECT DISTINCT workout_log_id FROM {child_table} WHERE workout_log_id IN ({_in_clause(batch)})", batch)
+            with_children.update(row[0] for row in cursor.fetchall())
+
+        moves = {}
+        for dup_id, keep_id in pairs:
+            if keep_id not in with_children and keep_id not in moves and dup_id in with_children:
+                moves[keep_id] = dup_id
 
-DB_PATH = Path(__file__).parent.parent.parent / "workout_logger.db"
+        if moves:
+            cursor.executemany(f"UPDATE {child_table} SET workout_log_id = ? WHERE workout_log_id = ?",
+                               list(moves.items()))
 
-def cleanup():
-    conn = sqlite3.connect(DB_PATH)
+def _delete_workouts(cursor, ids):
+    # Children first: SQLite only cascades when foreign_keys is switched on
+    for batch in _batches(ids):
+        marks = _in_clause(batch)
+        cursor.execute(f"""
+            DELETE FROM muscle_activations WHERE workout_exercise_id IN (
+                SELECT id FROM workout_exercises WHERE workout_log_id IN ({marks})
+            )
+        """, batch)
+        cursor.execute(f"DELETE FROM workout_exercises WHERE workout_log_id IN ({marks})", batch)
+        cursor.execute(f"DELETE FROM cardio_logs WHERE workout_log_id IN ({marks})", batch)
+        cursor.execute(f"DELETE FROM workout_logs WHERE id IN ({marks})", batch)
+
+def _delete_diet(cursor, ids):
+    for batch in _batches(ids):
+        cursor.execute(f"DELETE FROM diet_logs WHERE id IN ({_in_clause(batch)})", batch)
+
+def cleanup(apply=False, merge=False):
+    """
+    Finds duplicate workout and diet logs and prints a report.
+    apply: delete the duplicates and store hashes for legacy rows.
+    merge: before deleting, move exercises/cardio of a duplicate onto a keeper that has none.
+    Returns {table: number of duplicates}.
+    """
+    conn = get_connection()
     cursor = conn.cursor()
-    
-    # 1. Get today's logs (using local date from system usually, but just fetching all for now to see)
-    print("\n--- RECENT WORKOUT LOGS ---")
-    cursor.execute("SELECT id, workout_date, exercises_raw FROM workout_logs ORDER BY id DESC LIMIT 5")
-    rows = cursor.fetchall()
-    
-    if not rows:
-        print("No logs found.")
-        return
-
-    for r in rows:
-        print(f"ID: {r[0]} | Date: {r[1]} | {r[2]}")
-        
-    print("-" * 40)
-    keep_id = input("Enter the ID you want to KEEP (others with same date will be deleted? No, let's just pick specific IDs to delete): \nActually, better: Enter the ID of the ONE log you want to KEEP and UPDATE to 2026-01-14: ")
-    
-    if not keep_id.strip().isdigit():
-        print("Invalid ID.")
-        return
-        
-    keep_id = int(keep_id)
-    
-    # 2. Get the date of the one we are keeping to find duplicates
-    cursor.execute("SELECT workout_date FROM workout_logs WHERE id=?", (keep_id,))
-    row = cursor.fetchone()
-    if not row:
-        print("ID not found.")
-        return
-    
-    target_date = row[0]
-    
-    # 3. Find others on that date to delete
-    cursor.execute("SELECT id FROM workout_logs WHERE workout_date=? AND id != ?", (target_date, keep_id))
-    others = cursor.fetchall()
-    other_ids = [o[0] for o in others]
-    
-    if other_ids:
-        print(f"\nFound duplicate/extra logs on {target_date}: IDs {other_ids}")
-        confirm = input("Delete these extra logs? (y/n): ")
-        if confirm.lower() == 'y':
-            ids_str = ','.join(map(str, other_ids))
-            cursor.execute(f"DELETE FROM workout_logs WHERE id IN ({ids_str})")
-            print(f"[OK] Deleted {len(other_ids)} logs.")
-    else:
-        print("No other logs found on that date to delete.")
-
-    # 4. Update the date
-    new_date = "2026-01-14"
-    print(f"\nUpdating Log ID {keep_id} date from {target_date} -> {new_date}")
-    confirm_upd = input("Proceed? (y/n): ")
-    if confirm_upd.lower() == 'y':
-        cursor.execute("UPDATE workout_logs SET workout_date=? WHERE id=?", (new_date, keep_id))
-        conn.commit()
-        print("[OK] Date updated successfully!")
-    
-    conn.close()
+    summary = {}
+
+    try:
+        for table in HASHED_TABLES:
+            staged = _stage_hashes(cursor, table)
+            duplicates = find_duplicates(cursor, table)
+            summary[table] = len(duplicates)
+
+            print(f"\n[{table}] {len(duplicates)} duplicate(s), {len(staged)} row(s) without a stored hash")
+            for dup_id, keep_id, date, text, _ in duplicates:
+                snippet = " ".join(str(text or "").split())[:50]
+                print(f"  {date}: keep #{keep_id}, remove #{dup_id}  {snippet}")
+
+            if not apply:
+                continue
+
+            dup_ids = [d[0] for d in duplicates]
+            if table == "workout_logs":
+                if merge:
+                    _merge_workout_children(cursor, [(d[0], d[1]) for d in duplicates])
+                _delete_workouts(cursor, dup_ids)
+            else:
+                _delete_diet(cursor, dup_ids)
+                for user_id in {d[4] for d in duplicates}:
+                    refresh_daily_totals(cursor, [d[2] for d in duplicates if d[4] == user_id], user_id)
+
+            if dup_ids:
+                bump_version(cursor, "workout" if table == "workout_logs" else "diet")
+
+            # Survivors are unique now, so their hashes fit the unique index
+            removed = set(dup_ids)
+            cursor.executemany(f"UPDATE {table} SET content_hash = ? WHERE id = ?",
+                               [(h, row_id) for row_id, h in staged if row_id not in removed])
+
+        if apply:
+            conn.commit()
+            print("\n[OK] Duplicates removed.")
+        else:
+            conn.rollback()
+            print("\n[DRY RUN] Nothing changed. Re-run with --apply to remove duplicates.")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return summary
 
 if __name__ == "__main__":
-    cleanup()
+    parser = argparse.ArgumentParser(description="Find and remove duplicate workout/diet logs")
+    parser.add_argument("--apply", action="store_true", help="Delete duplicates (default is a dry run)")
+    parser.add_argument("--merge", action="store_true", help="Keep a duplicate's exercises if the kept log has none")
+    args = parser.parse_args()
+    cleanup(apply=args.apply, merge=args.merge)
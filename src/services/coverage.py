@@ -0,0 +1,134 @@
+"""
+Local muscle-coverage check for a categorized workout.
+Every muscle in the database gets one bit, so an exercise is two integers
+(primary mask, secondary mask) and each day type's template is a list of
+target masks (a muscle group, or a few muscles). For one session:
+  - missing:   target & (primary | secondary) == 0
+  - indirect:  target & primary == 0, but a secondary muscle reaches it
+  - redundant: a muscle is the primary of two or more exercises (seen & primary)
+Findings are shown with the parsed workout (web and CLI) straight away, so
+they are there even when Gemini is down, and AIAnalyzer gets them as facts.
+"""
+import json
+from src.models.database import get_connection
+from src.services.data_version import get_version
+
+# Targets per day type: label -> muscle group or muscle names
+TEMPLATES = {
+    "PUSH": {
+        "Chest": ["Chest"],
+        "Front Delts": ["Front Delts"],
+        "Side Delts": ["Lateral Delts"],
+        "Triceps": ["Triceps"],
+    },
+    "PULL": {
+        "Lats": ["Outer Lats", "Inner Lats", "Upper Lats", "Lower Lats"],
+        "Mid Back": ["Rhomboids", "Traps"],
+        "Rear Delts": ["Rear Delts"],
+        "Biceps": ["Biceps"],
+    },
+    "LEGS": {
+        "Quads": ["Quads"],
+        "Hamstrings": ["Hamstrings"],
+        "Glutes": ["Glutes"],
+        "Calves": ["Calves"],
+    },
+}
+SUGGESTIONS = 2   # catalog exercises suggested per missing target
+
+# (data version, taxonomy): rebuilt when a catalog sync bumps the 'aliases' version
+_cache = (None, None)
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def load_taxonomy(cursor):
+    """Muscle bits, per-exercise masks and per-day-type target masks from the database."""
+    cursor.execute("""
+        SELECT m.id, m.name, mg.name
+        FROM muscles m JOIN muscle_groups mg ON mg.id = m.muscle_group_id
+        ORDER BY m.id
+    """)
+    muscles = cursor.fetchall()
+    bit_of = {muscle_id: 1 << i for i, (muscle_id, _, _) in enumerate(muscles)}
+    names = [name for _, name, _ in muscles]
+
+    by_name = {}
+    for muscle_id, name, group in muscles:
+        by_name[group] = by_name.get(group, 0) | bit_of[muscle_id]
+    for muscle_id, name, group in muscles:
+        by_name.setdefault(name, bit_of[muscle_id])   # a group of the same name covers the muscle
+
+    cursor.execute("SELECT name, primary_muscle_id, secondary_muscles FROM exercises ORDER BY name")
+    exercises = {}
+    for name, primary_id, secondary_json in cursor.fetchall():
+        secondary = 0
+        for muscle_id in json.loads(secondary_json or "[]"):
+            secondary |= bit_of.get(muscle_id, 0)
+        exercises[name] = (bit_of.get(primary_id, 0), secondary)
+
+    targets = {day_type: [(label, _mask(by_name, parts)) for label, parts in template.items()]
+               for day_type, template in TEMPLATES.items()}
+    return {"names": names, "exercises": exercises, "targets": targets}
+
+def _mask(by_name, parts):
+    mask = 0
+    for part in parts:
+        mask |= by_name.get(part, 0)
+    return mask
+
+def taxonomy():
+    """The cached taxonomy, reloaded after a catalog change (one version read per call)."""
+    global _cache
+    version = get_version("aliases")
+    if _cache[0] != version:
+        conn = get_connection()
+        try:
+            _cache = (version, load_taxonomy(conn.cursor()))
+        finally:
+            conn.close()
+    return _cache[1]
+
+def check_coverage(report, tax=None):
+    """
+    Findings for a categorizer report: [{kind, target, text}], kind being
+    "missing", "indirect" or "redundant". Day types without a template only get redundancy.
+    """
+    tax = tax or taxonomy()
+    lifts = list(dict.fromkeys(ex['name'] for ex in report.get('exercises', [])))   # repeats are one exercise
+    primary = secondary = repeated = 0
+    for name in lifts:
+        p, s = tax["exercises"].get(name, (0, 0))
+        repeated |= primary & p
+        primary |= p
+        secondary |= s
+
+    findings = []
+    for label, mask in tax["targets"].get(report.get('day_type'), []):
+        if mask & primary:
+            continue
+        if mask & secondary:
+            findings.append({"kind": "indirect", "target": label,
+                             "text": f"{label}: only worked as a secondary muscle"})
+        else:
+            suggest = [n for n, (p, _) in tax["exercises"].items() if p & mask][:SUGGESTIONS]
+            hint = f" (e.g. {', '.join(suggest)})" if suggest else ""
+            findings.append({"kind": "missing", "target": label, "text": f"{label}: not trained{hint}"})
+
+    for bit in _bits(repeated):
+        muscle = tax["names"][bit]
+        same = [n for n in lifts if tax["exercises"].get(n, (0, 0))[0] & (1 << bit)]
+        findings.append({"kind": "redundant", "target": muscle,
+                         "text": f"{muscle}: main target of {len(same)} exercises ({', '.join(same)})"})
+    return findings
+
+def coverage_text(findings, day_type):
+    """Findings as short lines (printed by the CLI, given to the model as facts)."""
+    if not findings:
+        if day_type in TEMPLATES:
+            return f"- Every {day_type} target is covered, no redundant exercises."
+        return "- No redundant exercises."
+    return "\n".join(f"- {f['text']}" for f in findings)
@@ -1,18 +1,34 @@
 """
-Script to load exercises from JSON into the database.
-Handles mapping text names to database IDs.
+Syncs the exercise catalog (src/data/exercises.json) into the database.
+Muscle names are resolved in one query, then each catalog exercise is compared
+with its database row by content hash: new exercises are inserted and changed
+aliases / muscles / type are updated, with batched statements in one
+transaction (SQLite or Postgres). Exercises missing from the catalog are
+reported, and deleted only with --prune (never while a log still uses them).
+Running matchers pick the changes up on their next alias version check.
+
+Dry-run by default, like dedupe and reclassify:
+    python src/services/data_loader.py                 # report only
+    python src/services/data_loader.py --apply [--prune]
 """
+import sys
+import os
+sys.path.append(os.getcwd())
+import argparse
 import json
-import sqlite3
+import time
 from pathlib import Path
+from src.models.database import get_connection, is_postgres
+from src.services.data_version import bump_version
+from src.services.hashing import exercise_hash
 
-DB_PATH = Path(__file__).parent.parent.parent / "workout_logger.db"
 DATA_PATH = Path(__file__).parent.parent / "data" / "exercises.json"
+BATCH_SIZE = 500
 
 # Fuzzy/Direct link when the JSON name implies a group but DB needs a specific muscle
 # This maps "Group Name" -> "Default Specific Muscle"
 MUSCLE_DEFAULTS = {
-    "Quads": "Rectus Femoris", 
+    "Quads": "Rectus Femoris",
     "Hamstrings": "Biceps Femoris",
     "Glutes": "Gluteus Maximus",
     "Calves": "Gastrocnemius",
@@ -26,90 +42,154 @@ MUSCLE_DEFAULTS = {
     "Forearms": None          # We don't track forearms yet, will ignore
 }
 
-def get_db():
-    return sqlite3.connect(DB_PATH)
+def resolve_muscles(cursor):
+    """
+    {muscle name: id} from one query. Exact names win; group names
+    (e.g. Quads) fall back to their MUSCLE_DEFAULTS muscle.
+    """
+    cursor.execute("SELECT name, id FROM muscles")
+    ids = dict(cursor.fetchall())
+    for group, muscle in MUSCLE_DEFAULTS.items():
+        if group not in ids and muscle in ids:
+            ids[group] = ids[muscle]
+    return ids
 
-def find_muscle_id(cursor, muscle_name):
+def catalog_rows(data, muscle_ids):
     """
-    Find muscle ID by name. 
-    1. Try exact match.
-    2. Try mapping default (e.g. Quads -> Rectus Femoris).
-    3. Return None if not found.
+    {name: (aliases, primary_muscle_id, secondary_muscles, exercise_type)} as stored in the
+    exercises table. Exercises whose primary muscle is unknown are skipped with a warning.
     """
-    # 1. Exact Match
-    cursor.execute("SELECT id FROM muscles WHERE name = ?", (muscle_name,))
-    row = cursor.fetchone()
-    if row:
-        return row[0]
-    
-    # 2. Check Defaults/Mapping
-    start_name = muscle_name
-    if muscle_name in MUSCLE_DEFAULTS:
-        mapped_name = MUSCLE_DEFAULTS[muscle_name]
-        if mapped_name:
-            cursor.execute("SELECT id FROM muscles WHERE name = ?", (mapped_name,))
-            row = cursor.fetchone()
-            if row:
-                return row[0]
-            
-    print(f"   [WARN] Muscle '{start_name}' not found in DB.")
-    return None
-
-def load_exercises():
-    print(f"Loading exercises from {DATA_PATH}...")
-    
-    with open(DATA_PATH, 'r') as f:
-        data = json.load(f)
-        
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    added_count = 0
-    skipped_count = 0
-    
+    rows = {}
+    missing = set()
     for ex in data['exercises']:
         name = ex['name']
-        aliases = json.dumps(ex['aliases'])
-        p_muscle = ex['primary_muscle']
-        s_muscles_list = ex.get('secondary_muscles', [])
-        ex_type = ex['type']
-        
-        # Resolve Primary Muscle ID
-        p_id = find_muscle_id(cursor, p_muscle)
+        p_id = muscle_ids.get(ex['primary_muscle'])
         if not p_id:
-            print(f"❌ Skipping '{name}': Primary muscle '{p_muscle}' invalid.")
-            skipped_count += 1
+            print(f"[WARN] Skipping '{name}': Primary muscle '{ex['primary_muscle']}' invalid.")
             continue
-            
-        # Resolve Secondary Muscle IDs
+
         s_ids = []
-        for sm in s_muscles_list:
-            mid = find_muscle_id(cursor, sm)
-            if mid:
-                s_ids.append(mid)
-        
-        try:
-            cursor.execute("""
-                INSERT OR IGNORE INTO exercises 
-                (name, aliases, primary_muscle_id, secondary_muscles, exercise_type)
-                VALUES (?, ?, ?, ?, ?)
-            """, (name, aliases, p_id, json.dumps(s_ids), ex_type))
-            
-            if cursor.rowcount > 0:
-                added_count += 1
+        for sm in ex.get('secondary_muscles', []):
+            if sm in muscle_ids:
+                s_ids.append(muscle_ids[sm])
+            else:
+                missing.add(sm)
+        rows[name] = (json.dumps(ex['aliases']), p_id, json.dumps(s_ids), ex['type'])
+
+    for muscle in sorted(missing):
+        print(f"   [WARN] Muscle '{muscle}' not found in DB.")
+    return rows
+
+def diff_catalog(cursor, wanted):
+    """
+    Compares catalog rows with the exercises table.
+    Returns (inserts, updates, removed): rows to insert, (name, *row, id) to update,
+    and [(id, name)] of database exercises that are not in the catalog.
+    """
+    cursor.execute("SELECT id, name, aliases, primary_muscle_id, secondary_muscles, exercise_type FROM exercises")
+    current = {name: (ex_id, exercise_hash(name, *rest)) for ex_id, name, *rest in cursor.fetchall()}
+
+    inserts, updates = [], []
+    for name, row in wanted.items():
+        if name not in current:
+            inserts.append((name, *row))
+        elif exercise_hash(name, *row) != current[name][1]:
+            updates.append((name, *row, current[name][0]))
+    removed = [(ex_id, name) for name, (ex_id, _) in current.items() if name not in wanted]
+    return inserts, updates, removed
+
+def _logged_ids(cursor, ids):
+    """The exercise ids (of `ids`) that a workout log still uses."""
+    logged = set()
+    for i in range(0, len(ids), BATCH_SIZE):
+        batch = ids[i:i + BATCH_SIZE]
+        cursor.execute(f"SELECT DISTINCT exercise_id FROM workout_exercises "
+                       f"WHERE exercise_id IN ({','.join('?' * len(batch))})", batch)
+        logged.update(row[0] for row in cursor.fetchall())
+    return logged
+
+def _apply(cursor, inserts, updates, deletes):
+    if inserts:
+        cursor.executemany("""
+            INSERT INTO exercises (name, aliases, primary_muscle_id, secondary_muscles, exercise_type)
+            VALUES (?, ?, ?, ?, ?)
+        """, inserts)
+    if updates:
+        cursor.executemany("""
+            UPDATE exercises SET aliases = ?, primary_muscle_id = ?, secondary_muscles = ?, exercise_type = ?
+            WHERE id = ?
+        """, [u[1:] for u in updates])
+    for i in range(0, len(deletes), BATCH_SIZE):
+        batch = deletes[i:i + BATCH_SIZE]
+        placeholders = ','.join('?' * len(batch))
+        cursor.execute(f"DELETE FROM learned_aliases WHERE exercise_id IN ({placeholders})", batch)
+        cursor.execute(f"DELETE FROM exercises WHERE id IN ({placeholders})", batch)
+    if inserts or updates or deletes:
+        # Matchers reload their exercise list and aliases when this moves
+        bump_version(cursor, "aliases")
+
+def sync_catalog(path=DATA_PATH, apply=False, prune=False):
+    """
+    Brings the exercises table in line with the catalog file and prints what changed.
+    apply: write the changes (default is a report only); prune also deletes exercises dropped from the catalog.
+    Returns {"added": n, "updated": n, "deleted": n, "kept": n}.
+    """
+    start = time.perf_counter()
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        # Lock out other writers so the diff is still true when it is applied
+        if is_postgres(conn):
+            cursor.execute("LOCK TABLE exercises IN SHARE ROW EXCLUSIVE MODE")
+        else:
+            cursor.execute("BEGIN IMMEDIATE")
+
+        wanted = catalog_rows(data, resolve_muscles(cursor))
+        inserts, updates, removed = diff_catalog(cursor, wanted)
+        logged = _logged_ids(cursor, [ex_id for ex_id, _ in removed]) if prune else set()
+        deletes = [ex_id for ex_id, _ in removed if prune and ex_id not in logged]
+
+        print(f"\n[CATALOG] {path}: {len(wanted)} exercises")
+        for name, *_ in inserts:
+            print(f"  + {name}")
+        for name, *_ in updates:
+            print(f"  ~ {name}")
+        for ex_id, name in removed:
+            if ex_id in deletes:
+                print(f"  - {name}")
+            elif ex_id in logged:
+                print(f"  = {name} (not in the catalog, kept: used by logged workouts)")
             else:
-                # Already exists
-                pass
-                
-        except Exception as e:
-            print(f"Error inserting {name}: {e}")
-            
-    conn.commit()
-    conn.close()
-    
-    print(f"\n[OK] Done! Added {added_count} new exercises.")
-    if skipped_count > 0:
-        print(f"[WARN] Skipped {skipped_count} exercises due to missing primary muscles.")
+                print(f"  = {name} (not in the catalog, kept: use --prune to delete)")
+
+        if apply:
+            _apply(cursor, inserts, updates, deletes)
+            conn.commit()
+        else:
+            conn.rollback()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    counts = {"added": len(inserts), "updated": len(updates), "deleted": len(deletes),
+              "kept": len(removed) - len(deletes)}
+    elapsed = (time.perf_counter() - start) * 1000
+    if apply:
+        print(f"\n[OK] Added {counts['added']}, updated {counts['updated']}, deleted {counts['deleted']} "
+              f"exercises in {elapsed:.0f} ms.")
+    else:
+        print(f"\n[DRY RUN] Would add {counts['added']}, update {counts['updated']}, delete {counts['deleted']}. "
+              "Nothing changed.")
+    return counts
 
 if __name__ == "__main__":
-    load_exercises()
+    parser = argparse.ArgumentParser(description="Sync the exercise catalog into the database")
+    parser.add_argument("--apply", action="store_true", help="Write the changes (default is a dry run)")
+    parser.add_argument("--prune", action="store_true", help="Delete exercises no longer in the catalog (unless logged)")
+    args = parser.parse_args()
+    sync_catalog(apply=args.apply, prune=args.prune)
@@ -0,0 +1,23 @@
+"""
+Change counters for cached pages.
+Every write to workout or diet logs bumps its scope's version in the same
+transaction. Web workers compare versions (one primary-key read) to answer
+conditional GETs with 304 and to reuse rendered fragments, so they stay in
+sync without talking to each other. Learned exercise aliases use the same
+counter ('aliases') to reach every worker's matcher.
+"""
+from src.models.database import get_connection, prepared
+
+SCOPES = ("workout", "diet", "aliases")
+
+def bump_version(cursor, scope):
+    """Marks `scope` as changed. Call with the cursor of the write itself."""
+    cursor.execute(prepared("UPDATE data_version SET version = version + 1 WHERE scope = ?"), (scope,))
+
+def get_version(scope):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(prepared("SELECT version FROM data_version WHERE scope = ?"), (scope,))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else 0
@@ -1,38 +1,196 @@
 """
 Service for handling diet logs.
 """
-from src.models.database import get_connection
+import datetime
+import sqlite3
+from src.models.database import get_connection, PostgresConnection, prepared
+from src.models.writer import run_write
+from src.services.food_cache import remember_foods, MACROS
+from src.services.hashing import diet_hash
+from src.services.data_version import bump_version
+from src.services.metrics import timed
+from src.services.users import DEFAULT_USER_ID
 
-def save_diet_logs(date, log_items):
+# Rolling windows (in calendar days) reported next to each daily total.
+# Each average is over the logged days inside the window; days without a log are skipped, not counted as 0.
+ROLLING_WINDOWS = (7, 28)
+
+@timed("save_diet")
+def save_diet_logs(date, log_items, user_id=DEFAULT_USER_ID):
     """
     Saves a list of diet entries to the database.
     items: List of dicts {meal_type, food_raw, calories, protein, carbs, fats}
+    Entries the user already logged for that date (same meal and food) are skipped.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    for item in log_items:
-        cursor.execute("""
-            INSERT INTO diet_logs (log_date, meal_type, food_raw, calories, protein, carbs, fats)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
+    run_write(lambda cursor: write_diet_logs(cursor, date, log_items, user_id))
+
+def write_diet_logs(cursor, date, log_items, user_id=DEFAULT_USER_ID):
+    """save_diet_logs inside the caller's transaction. Returns the number of new entries."""
+    # Skip entries already logged (the unique hash index is the backstop for races)
+    hashed = [(diet_hash(date, item.get('meal_type', 'Snack'), item.get('food_raw', '')), item)
+              for item in log_items]
+    existing = set()
+    if hashed:
+        placeholders = ",".join("?" * len(hashed))
+        cursor.execute(f"SELECT content_hash FROM diet_logs WHERE user_id = ? AND content_hash IN ({placeholders})",
+                       [user_id] + [h for h, _ in hashed])
+        existing = {row[0] for row in cursor.fetchall()}
+
+    rows = []
+    for content_hash, item in hashed:
+        if content_hash in existing:
+            continue
+        existing.add(content_hash)
+        rows.append((
+            user_id,
             date,
             item.get('meal_type', 'Snack'),
             item.get('food_raw', ''),
             item.get('calories', 0),
             item.get('protein', 0),
             item.get('carbs', 0),
-            item.get('fats', 0)
+            item.get('fats', 0),
+            content_hash
         ))
-        
-    conn.commit()
-    conn.close()
 
-def get_diet_history():
-    """Returns diet logs ordered by date desc."""
+    if rows:
+        cursor.executemany("""
+            INSERT INTO diet_logs (user_id, log_date, meal_type, food_raw, calories, protein, carbs, fats, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        bump_version(cursor, "diet")
+
+    # Keep the daily rollup and food cache in the same transaction as the raw rows
+    refresh_daily_totals(cursor, [date], user_id)
+    remember_foods(cursor, log_items)
+    return len(rows)
+
+def refresh_daily_totals(cursor, dates, user_id=DEFAULT_USER_ID):
+    """
+    Recomputes the user's diet_daily_totals for the given dates from diet_logs.
+    Uses the caller's cursor so the rollup commits with the change that caused it.
+    """
+    for log_date in set(dates):
+        cursor.execute(prepared("DELETE FROM diet_daily_totals WHERE user_id = ? AND log_date = ?"),
+                       (user_id, log_date))
+        cursor.execute(prepared("""
+            INSERT INTO diet_daily_totals (user_id, log_date, entries, calories, protein, carbs, fats)
+            SELECT user_id, log_date, COUNT(*), SUM(COALESCE(calories, 0)), SUM(COALESCE(protein, 0)),
+                   SUM(COALESCE(carbs, 0)), SUM(COALESCE(fats, 0))
+            FROM diet_logs
+            WHERE user_id = ? AND log_date = ?
+            GROUP BY user_id, log_date
+        """), (user_id, log_date))
+
+def get_diet_history(user_id=DEFAULT_USER_ID):
+    """Returns the user's diet logs ordered by date desc."""
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM diet_logs ORDER BY log_date DESC, id DESC LIMIT 50")
+    cursor.execute(prepared("SELECT * FROM diet_logs WHERE user_id = ? ORDER BY log_date DESC, id DESC LIMIT 50"),
+                   (user_id,))
     rows = cursor.fetchall()
     conn.close()
     return rows
+
+def get_daily_summary(days=14, user_id=DEFAULT_USER_ID):
+    """
+    Returns the user's most recent `days` daily totals (newest first), each with
+    7 and 28 calendar-day rolling averages for every macro.
+    Output: List of dicts {log_date, entries, calories, ..., calories_avg7, calories_avg28, ...}
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    if _supports_window_functions(conn):
+        summary = _daily_summary_sql(cursor, days, user_id, _day_number_sql(conn))
+    else:
+        summary = _daily_summary_numpy(cursor, days, user_id)
+
+    conn.close()
+    return summary
+
+def _supports_window_functions(conn):
+    """RANGE windows with an offset arrived in SQLite 3.28; Postgres (11+) has them."""
+    if isinstance(conn, PostgresConnection):
+        return True
+    return sqlite3.sqlite_version_info >= (3, 28, 0)
+
+def _day_number_sql(conn):
+    """log_date as a day count, so a RANGE window spans calendar days."""
+    if isinstance(conn, PostgresConnection):
+        return "(log_date - DATE '2000-01-01')"
+    return "julianday(log_date)"
+
+def _summary_columns():
+    columns = ["log_date", "entries", *MACROS]
+    for window in ROLLING_WINDOWS:
+        columns += [f"{macro}_avg{window}" for macro in MACROS]
+    return columns
+
+def _daily_summary_sql(cursor, days, user_id, day_number):
+    averages = []
+    for window in ROLLING_WINDOWS:
+        for macro in MACROS:
+            averages.append(
+                f"AVG({macro}) OVER (ORDER BY {day_number} RANGE BETWEEN {window - 1} PRECEDING AND CURRENT ROW)"
+            )
+
+    # Windows are computed over the user's whole rollup (one key range), then trimmed to the newest rows
+    sql = f"""
+    SELECT * FROM (
+        SELECT log_date, entries, {', '.join(MACROS)},
+               {', '.join(averages)}
+        FROM diet_daily_totals
+        WHERE user_id = ?
+    ) rolled
+    ORDER BY log_date DESC
+    LIMIT ?
+    """
+    cursor.execute(prepared(sql), (user_id, days))
+    columns = _summary_columns()
+    return [_round_averages(dict(zip(columns, row))) for row in cursor.fetchall()]
+
+def _daily_summary_numpy(cursor, days, user_id):
+    """Fallback for old SQLite builds: rolling means via cumulative sums."""
+    import numpy as np
+
+    # Only the requested days and the window before the oldest of them are needed
+    cursor.execute(f"""
+        SELECT log_date, entries, {', '.join(MACROS)}
+        FROM diet_daily_totals
+        WHERE user_id = ? AND log_date >= date((
+            SELECT MIN(log_date) FROM (
+                SELECT log_date FROM diet_daily_totals WHERE user_id = ? ORDER BY log_date DESC LIMIT ?
+            )
+        ), '-{max(ROLLING_WINDOWS) - 1} days')
+        ORDER BY log_date
+    """, (user_id, user_id, days))
+    rows = cursor.fetchall()
+    if not rows:
+        return []
+
+    values = np.array([r[2:] for r in rows], dtype=float)
+    cumulative = np.vstack([np.zeros(len(MACROS)), np.cumsum(values, axis=0)])
+    day_numbers = np.array([datetime.date.fromisoformat(str(r[0])).toordinal() for r in rows])
+    idx = np.arange(1, len(rows) + 1)
+
+    averages = []
+    for window in ROLLING_WINDOWS:
+        # First row inside the window of calendar days ending at each row
+        start = np.searchsorted(day_numbers, day_numbers - (window - 1), side="left")
+        averages.append((cumulative[idx] - cumulative[start]) / (idx - start)[:, None])
+
+    columns = _summary_columns()
+    summary = []
+    for i in range(len(rows) - 1, max(len(rows) - days, 0) - 1, -1):
+        row = list(rows[i])
+        for avg in averages:
+            row += avg[i].tolist()
+        summary.append(_round_averages(dict(zip(columns, row))))
+    return summary
+
+def _round_averages(day):
+    for key, value in day.items():
+        if "_avg" in key and value is not None:
+            day[key] = round(float(value), 1)
+    return day
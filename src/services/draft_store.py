@@ -0,0 +1,48 @@
+"""
+Server-side drafts for the log -> confirm flow.
+The parsed, matched and categorized result of a submission is stored once
+under an opaque id. The page only carries that id. Reloading a draft page
+re-renders it without calling the AI again, and confirm saves exactly what
+was previewed. Drafts live in the database so every worker can see them.
+They expire after DRAFT_TTL_SECONDS.
+"""
+import os
+import json
+import time
+import secrets
+from src.models.database import get_connection, prepared
+from src.models.writer import run_write
+from src.services.users import DEFAULT_USER_ID
+
+DRAFT_TTL_SECONDS = int(os.getenv("DRAFT_TTL_SECONDS", str(6 * 3600)))
+
+def create_draft(kind, payload, user_id=DEFAULT_USER_ID):
+    """Stores payload (JSON-serializable) and returns its draft id."""
+    draft_id = secrets.token_urlsafe(16)
+    now = time.time()
+
+    def write(cursor):
+        # Expired drafts are swept on the way in (indexed range delete)
+        cursor.execute(prepared("DELETE FROM drafts WHERE expires_at < ?"), (now,))
+        cursor.execute(prepared("""
+            INSERT INTO drafts (id, user_id, kind, payload, created_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """), (draft_id, user_id, kind, json.dumps(payload), now, now + DRAFT_TTL_SECONDS))
+
+    run_write(write)
+    return draft_id
+
+def get_draft(draft_id, kind, user_id=DEFAULT_USER_ID):
+    """Returns the payload, or None if the id is unknown, of another kind or user, or expired."""
+    if not draft_id:
+        return None
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(prepared("SELECT payload FROM drafts WHERE id = ? AND kind = ? AND user_id = ? AND expires_at >= ?"),
+                   (draft_id, kind, user_id, time.time()))
+    row = cursor.fetchone()
+    conn.close()
+    return json.loads(row[0]) if row else None
+
+def delete_draft(draft_id):
+    run_write(lambda cursor: cursor.execute(prepared("DELETE FROM drafts WHERE id = ?"), (draft_id,)))
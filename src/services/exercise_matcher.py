@@ -1,85 +1,133 @@
 """
 Exercise matching service using fuzzy string matching.
 Handles abbreviations, typos, and exact matches.
+Confirmed fuzzy matches are learned as per-user aliases (see learned_aliases.py),
+so text a user has typed before is an exact dictionary hit for them the next time.
 """
 import json
-import sqlite3
-from pathlib import Path
+import os
+import threading
+import time
 from rapidfuzz import process, fuzz
+from src.models.database import get_connection
+from src.services import metrics
+from src.services.data_version import get_version
+from src.services.learned_aliases import load_learned_aliases
+from src.services.metrics import timed
+from src.services.users import DEFAULT_USER_ID
 
-DB_PATH = Path(__file__).parent.parent.parent / "workout_logger.db"
+# How often a running matcher checks for aliases learned by other workers
+ALIAS_CHECK_SECONDS = float(os.getenv("ALIAS_CHECK_SECONDS", "2"))
 
 class ExerciseMatcher:
     def __init__(self):
         self.exercises = []  # List of exercise names
-        self.aliases = {}    # string alias -> real name
+        self.aliases = {}    # string alias -> real name (catalog aliases)
+        self.learned = {}    # user_id -> {typed text -> real name}
+        self._lock = threading.Lock()
         self.load_exercises()
         
     def load_exercises(self):
         """Load all exercises and aliases from DB into memory for fast matching."""
-        conn = sqlite3.connect(DB_PATH)
+        # Same database the catalog sync and the 'aliases' version live in (Postgres or SQLite)
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Get all exercises with their aliases
         cursor.execute("SELECT name, aliases FROM exercises")
         rows = cursor.fetchall()
         
-        self.exercises = []
-        self.aliases = {}
+        exercises = []
+        static_aliases = {}
         
         for name, aliases_json in rows:
-            self.exercises.append(name)
+            exercises.append(name)
             
             # Map aliases to the real name
             if aliases_json:
                 try:
                     alias_list = json.loads(aliases_json)
                     for alias in alias_list:
-                        self.aliases[alias.lower()] = name
+                        static_aliases[alias.lower()] = name
                 except:
                     pass
                     
         conn.close()
+        self.exercises = exercises
+        self.aliases = static_aliases
+        self._lower_names = {e.lower(): e for e in exercises}
+        # Fuzzy search only scans the shared catalog, never another user's learned text
+        self._choices = list(static_aliases) + list(self._lower_names)
+        self.load_learned()
 
-    def match(self, user_input, threshold=60):
+    def load_learned(self):
+        """(Re)loads learned aliases. Dictionaries are swapped whole, so concurrent matches never see a partial load."""
+        version = get_version("aliases")
+        self.learned = load_learned_aliases()
+        self._alias_version = version
+        self._next_check = time.monotonic() + ALIAS_CHECK_SECONDS
+
+    def _refresh_if_changed(self):
+        """
+        At most every ALIAS_CHECK_SECONDS: one version read, and a reload if another
+        process learned aliases or synced the exercise catalog.
+        """
+        if time.monotonic() < self._next_check or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = time.monotonic() + ALIAS_CHECK_SECONDS
+            if get_version("aliases") != self._alias_version:
+                self.load_exercises()
+        finally:
+            self._lock.release()
+
+    @timed("match")
+    def match(self, user_input, threshold=60, user_id=DEFAULT_USER_ID):
         """
-        Find best matching exercise.
-        Returns: {name: "Name", score: 90} or None
+        Find best matching exercise (the user's learned aliases included).
+        Returns: {name: "Name", score: 90, query: "typed text", path: "alias" | "learned" | "fuzzy"} or None
         """
+        self._refresh_if_changed()
         clean_input = user_input.strip().lower()
+        aliases = self.aliases
+        learned = self.learned.get(user_id, {})
         
-        # 1. Check exact alias match (fastest)
+        # 1. Check exact alias match (fastest); curated aliases win over learned ones
         final_name = None
         final_score = 0
+        path = "alias"
         
-        if clean_input in self.aliases:
-            final_name = self.aliases[clean_input]
+        if clean_input in aliases:
+            final_name = aliases[clean_input]
+            final_score = 100
+        elif clean_input in learned:
+            final_name = learned[clean_input]
+            final_score = 100
+            path = "learned"
+        elif clean_input in self._lower_names:
+            final_name = self._lower_names[clean_input]
             final_score = 100
         else:
             # Fuzzy match against real names AND aliases
-            all_choices = list(self.aliases.keys()) + [e.lower() for e in self.exercises]
-            
             # Use token_set_ratio to handle "row with grip" vs "row"
-            result = process.extractOne(clean_input, all_choices, scorer=fuzz.token_set_ratio)
+            path = "fuzzy"
+            result = process.extractOne(clean_input, self._choices, scorer=fuzz.token_set_ratio)
             
             if result:
                 match_text, score, _ = result
                 
                 if score >= threshold:
-                    final_name = self.aliases.get(match_text, match_text)
-                    
-                    if match_text not in self.aliases:
-                        for original in self.exercises:
-                            if original.lower() == match_text:
-                                final_name = original
-                                break
+                    final_name = aliases.get(match_text) or self._lower_names.get(match_text, match_text)
                     final_score = score
                     
+        metrics.inc("workout_matcher_lookups_total", path=path if final_name else "miss")
         if final_name:
             # Return dict format as expected by new main.py
             return {
                 "name": final_name,
-                "score": final_score
+                "score": final_score,
+                "query": clean_input,
+                "path": path
             }
                 
         return None
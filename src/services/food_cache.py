@@ -0,0 +1,149 @@
+"""
+Local nutrition cache for repeated food items.
+Splits free-text diet logs into items and remembers confirmed macros per
+(normalized food, quantity), so repeat entries like "2 eggs" skip Gemini.
+"""
+import re
+from src.models.database import get_connection
+
+MACROS = ("calories", "protein", "carbs", "fats")
+
+# Meal prefixes such as "Bf - ..." or "Lunch: ..."
+MEAL_KEYWORDS = {
+    "bf": "Breakfast", "breakfast": "Breakfast", "morning": "Breakfast",
+    "lunch": "Lunch",
+    "dinner": "Dinner", "supper": "Dinner", "night": "Dinner",
+    "snack": "Snack", "snacks": "Snack", "eve": "Snack", "evening": "Snack",
+}
+MEAL_PREFIX = re.compile(r"^\s*(" + "|".join(MEAL_KEYWORDS) + r")\b\s*[-:]?\s*", re.IGNORECASE)
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "half": 0.5, "quarter": 0.25,
+}
+
+# All of these mean the 450ml "Magnus" container
+MAGNUS_UNITS = {"magnus", "cup", "cups", "container", "containers", "box", "boxes"}
+
+FILLER_WORDS = {"of", "the", "some"}
+
+def split_diet_text(full_text):
+    """
+    Input: "Bf - 2 eggs, toast. Lunch - 1 container of Rice"
+    Output: [("Breakfast", "2 eggs"), ("Breakfast", "toast"), ("Lunch", "1 container of Rice")]
+    """
+    items = []
+    meal_type = "Snack"
+
+    # Lines, semicolons and sentence-ending periods (not decimals like 7.5) separate meals
+    for segment in re.split(r"[\n;]|\.(?!\d)", full_text):
+        if not segment.strip():
+            continue
+
+        prefix = MEAL_PREFIX.match(segment)
+        if prefix:
+            meal_type = MEAL_KEYWORDS[prefix.group(1).lower()]
+            segment = segment[prefix.end():]
+
+        for fragment in re.split(r"[,+]", segment):
+            fragment = fragment.strip(" -:")
+            if fragment:
+                items.append((meal_type, fragment))
+
+    return items
+
+def normalize_food(text):
+    """
+    Returns (food_key, quantity) for a food fragment.
+    "Two Eggs" -> ("egg", 2.0), "1 container of Rice" -> ("magnus rice", 1.0)
+    """
+    tokens = re.findall(r"\d+/\d+|\d+(?:\.\d+)?|[a-z]+", text.lower())
+
+    quantity = 1.0
+    if tokens:
+        first = tokens[0]
+        if "/" in first:
+            num, den = first.split("/")
+            if int(den):
+                quantity = int(num) / int(den)
+                tokens = tokens[1:]
+        elif first[0].isdigit():
+            quantity = float(first)
+            tokens = tokens[1:]
+        elif first in NUMBER_WORDS:
+            quantity = float(NUMBER_WORDS[first])
+            tokens = tokens[1:]
+
+    words = []
+    for tok in tokens:
+        if tok in FILLER_WORDS:
+            continue
+        if tok in MAGNUS_UNITS:
+            tok = "magnus"
+        elif len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        words.append(tok)
+
+    return " ".join(words), quantity
+
+def lookup_foods(fragments):
+    """
+    Looks up many fragments in one query.
+    Returns {fragment: {calories, protein, carbs, fats}} for the cached ones.
+    """
+    keys = {frag: normalize_food(frag) for frag in fragments}
+    food_keys = sorted({k for k, _ in keys.values() if k})
+    if not food_keys:
+        return {}
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    placeholders = ",".join("?" * len(food_keys))
+    cursor.execute(f"""
+        SELECT food_key, quantity, calories, protein, carbs, fats
+        FROM food_cache
+        WHERE food_key IN ({placeholders})
+    """, food_keys)
+    # `or 0`: rows cached before estimates were coerced may hold NULL macros
+    cached = {(row[0], float(row[1])): {m: v or 0 for m, v in zip(MACROS, row[2:])} for row in cursor.fetchall()}
+    conn.close()
+
+    return {frag: cached[key] for frag, key in keys.items() if key in cached}
+
+def remember_foods(cursor, items):
+    """
+    Records confirmed diet entries in the cache (latest confirmation wins).
+    Uses the caller's cursor so it commits with the diet_logs rows.
+    Items that were never estimated (source "unknown") are not remembered.
+    """
+    for item in items:
+        if item.get('source') == 'unknown':
+            continue
+        food_raw = item.get('food_raw') or ''
+        food_key, quantity = normalize_food(food_raw)
+        if not food_key:
+            continue
+
+        values = tuple(item.get(m) or 0 for m in MACROS)
+        cursor.execute("""
+            UPDATE food_cache
+            SET food_raw = ?, calories = ?, protein = ?, carbs = ?, fats = ?,
+                confirmations = confirmations + 1
+            WHERE food_key = ? AND quantity = ?
+        """, (food_raw, *values, food_key, quantity))
+
+        if cursor.rowcount == 0:
+            cursor.execute("""
+                INSERT INTO food_cache (food_key, quantity, food_raw, calories, protein, carbs, fats)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (food_key, quantity, food_raw, *values))
+
+def count_sources(items):
+    """Returns {"cache": n, "model": m, "unknown": u} for items produced by AIDietParser."""
+    counts = {"cache": 0, "model": 0, "unknown": 0}
+    for item in items:
+        source = item.get('source')
+        if source in counts:
+            counts[source] += 1
+    return counts
@@ -0,0 +1,22 @@
+"""
+Gemini client setup shared by AIParser, AIDietParser and AIAnalyzer.
+GEMINI_ENDPOINT points the SDK at another server speaking the Gemini REST API,
+e.g. the local fake in tests/fake_gemini.py for offline load tests.
+"""
+import asyncio
+import os
+import google.generativeai as genai
+
+GEMINI_ENDPOINT = os.getenv("GEMINI_ENDPOINT")   # e.g. http://127.0.0.1:8089
+
+def configure(api_key):
+    if GEMINI_ENDPOINT:
+        genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": GEMINI_ENDPOINT})
+    else:
+        genai.configure(api_key=api_key)
+
+async def generate_async(model, prompt):
+    """model.generate_content_async(), or the sync call in a thread on the REST transport (no async support)."""
+    if GEMINI_ENDPOINT:
+        return await asyncio.to_thread(model.generate_content, prompt)
+    return await model.generate_content_async(prompt)
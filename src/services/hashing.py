@@ -0,0 +1,25 @@
+"""
+Normalized content hashes for log entries.
+Two entries with the same hash are treated as duplicates, both by the
+unique indexes at save time and by the cleanup_logs dedupe engine.
+The exercise catalog sync (data_loader.py) diffs catalog rows the same way.
+"""
+import hashlib
+
+def normalize_text(text):
+    """Lowercase and collapse whitespace so re-typed copies hash the same."""
+    return " ".join((text or "").lower().split())
+
+def _digest(*parts):
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+def workout_hash(workout_date, exercises_raw):
+    return _digest("workout", str(workout_date), normalize_text(exercises_raw))
+
+def diet_hash(log_date, meal_type, food_raw):
+    return _digest("diet", str(log_date), normalize_text(meal_type), normalize_text(food_raw))
+
+def exercise_hash(name, aliases_json, primary_muscle_id, secondary_json, exercise_type):
+    """Catalog row hash: an exercise is updated by a catalog sync when this differs."""
+    return _digest("exercise", name, aliases_json or "", str(primary_muscle_id), secondary_json or "",
+                   exercise_type or "")
@@ -0,0 +1,309 @@
+"""
+Bulk import of historical workout and diet logs.
+Streams CSV, JSONL or plain-text files through the parser, matcher and
+categorizer with a worker pool, then writes each chunk in one transaction.
+Records are deduplicated by content hash, so an interrupted import can be re-run.
+Everything in one file is imported for one user.
+
+File formats:
+  CSV:   columns date, type (workout/diet, default workout), text
+  JSONL: {"date": "2026-01-14", "type": "diet", "text": "Bf - 2 eggs"}
+  Text:  a "YYYY-MM-DD [workout|diet]" header line followed by the log text
+"""
+import csv
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.models.database import get_connection, is_postgres, bulk_insert, allocate_ids
+from src.services.diet_service import refresh_daily_totals
+from src.services.hashing import normalize_text, workout_hash, diet_hash
+from src.services.data_version import bump_version
+from src.services.pipeline import analyze_workout
+from src.services.users import DEFAULT_USER_ID, scoped_key
+
+TEXT_HEADER = re.compile(r"^\s*(\d{4}-\d{2}-\d{2})\s*(workout|diet)?\s*:?\s*$", re.IGNORECASE)
+
+def record_hash(record_type, date, text):
+    """Hash of a whole import record (one file entry), used to resume imports."""
+    return hashlib.sha256(f"{record_type}|{date}|{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+# --- READERS ---
+
+def read_records(path):
+    """Yields {type, date, text} dicts from a CSV, JSONL or plain-text file."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        yield from _read_csv(path)
+    elif suffix in (".jsonl", ".ndjson"):
+        yield from _read_jsonl(path)
+    else:
+        yield from _read_text(path)
+
+def _make_record(record_type, date, text):
+    record_type = (record_type or "workout").strip().lower()
+    text = (text or "").strip()
+    if record_type not in ("workout", "diet") or not date or not text:
+        return None
+    return {"type": record_type, "date": str(date).strip(), "text": text}
+
+def _read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            record = _make_record(row.get('type'), row.get('date'), row.get('text') or row.get('raw'))
+            if record:
+                yield record
+
+def _read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            record = _make_record(row.get('type'), row.get('date'), row.get('text') or row.get('raw'))
+            if record:
+                yield record
+
+def _read_text(path):
+    record_type, date, lines = None, None, []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            header = TEXT_HEADER.match(line)
+            if header:
+                record = _make_record(record_type, date, "\n".join(lines))
+                if record:
+                    yield record
+                date, record_type, lines = header.group(1), header.group(2), []
+            elif date:
+                lines.append(line.rstrip("\n"))
+    record = _make_record(record_type, date, "\n".join(lines))
+    if record:
+        yield record
+
+# --- PROCESSING ---
+
+class Importer:
+    def __init__(self, use_ai=True, workers=4, chunk_size=200, user_id=DEFAULT_USER_ID):
+        from src.services.exercise_matcher import ExerciseMatcher
+        from src.services.categorizer import WorkoutCategorizer
+        from src.services.ai_parser import AIParser
+        from src.services.ai_diet import AIDietParser
+
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.user_id = user_id
+        self.matcher = ExerciseMatcher()
+        self.categorizer = WorkoutCategorizer()
+        self.ai_parser = AIParser()
+        self.ai_diet = AIDietParser()
+        if not use_ai:
+            # Workouts fall back to local parsing; diet entries only resolve from the food cache
+            self.ai_parser.available = False
+            self.ai_diet.available = False
+
+        self.exercise_info = {}   # name -> (id, primary_muscle_id, secondary_muscles json)
+
+    def run(self, path):
+        """Imports a file. Returns counts {imported, duplicates, failed}."""
+        stats = {"imported": 0, "duplicates": 0, "failed": 0}
+        self._load_exercise_info()
+
+        chunk = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for record in read_records(path):
+                chunk.append(record)
+                if len(chunk) >= self.chunk_size:
+                    self._import_chunk(pool, chunk, stats)
+                    chunk = []
+            if chunk:
+                self._import_chunk(pool, chunk, stats)
+
+        return stats
+
+    def _load_exercise_info(self):
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT name, id, primary_muscle_id, secondary_muscles FROM exercises")
+        self.exercise_info = {row[0]: row[1:] for row in cursor.fetchall()}
+        conn.close()
+
+    def _import_chunk(self, pool, chunk, stats):
+        # 1. Drop records already imported (earlier run) or repeated within the chunk
+        for record in chunk:
+            record['hash'] = scoped_key(record_hash(record['type'], record['date'], record['text']), self.user_id)
+
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            hashes = list({r['hash'] for r in chunk})
+            placeholders = ",".join("?" * len(hashes))
+            cursor.execute(f"SELECT content_hash FROM import_log WHERE content_hash IN ({placeholders})", hashes)
+            seen = {row[0] for row in cursor.fetchall()}
+        finally:
+            conn.close()   # no connection is held while the AI calls run
+
+        pending = []
+        for record in chunk:
+            if record['hash'] in seen:
+                stats['duplicates'] += 1
+                continue
+            seen.add(record['hash'])
+            pending.append(record)
+
+        # 2. Parse/match/categorize in parallel (AI calls dominate)
+        processed = list(pool.map(self._process, pending))
+        ok = [p for p in processed if p]
+        stats['failed'] += len(processed) - len(ok)
+
+        # 3. Write the whole chunk in one transaction
+        if ok:
+            conn = get_connection()
+            try:
+                imported = self._write(conn, conn.cursor(), ok)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+            stats['imported'] += imported
+            stats['duplicates'] += len(ok) - imported   # already in the database
+
+        print(f"[IMPORT] {stats['imported']} imported, {stats['duplicates']} duplicates, {stats['failed']} failed")
+
+    def _process(self, record):
+        try:
+            if record['type'] == 'diet':
+                return self._process_diet(record)
+            return self._process_workout(record)
+        except Exception as e:
+            print(f"  [WARN] Failed to import {record['type']} on {record['date']}: {e}")
+            return None
+
+    def _process_workout(self, record):
+        day_type, items = analyze_workout(record['text'], self.ai_parser, self.matcher, self.categorizer,
+                                         self.user_id)
+        if not day_type:
+            print(f"  [WARN] No exercises recognised for workout on {record['date']}")
+            return None
+
+        return {**record, "day_type": day_type, "items": items}
+
+    def _process_diet(self, record):
+        items = self.ai_diet.parse_diet(record['text'])
+        if not items:
+            print(f"  [WARN] No nutrition estimates for diet on {record['date']}")
+            return None
+        unknown = [i['food_raw'] for i in items if i.get('source') == 'unknown']
+        if unknown:
+            # Not logged as imported, so the next run retries the record
+            print(f"  [WARN] No nutrition estimate for {', '.join(unknown)} (diet on {record['date']})")
+            return None
+        return {**record, "items": items}
+
+    def _write(self, conn, cursor, processed):
+        """Writes the processed records. Returns how many were new (the rest were already saved)."""
+        if not is_postgres(conn):
+            # Hold the write lock so allocated ids cannot be taken by another writer
+            cursor.execute("BEGIN IMMEDIATE")
+
+        # Entries already in the database (e.g. saved from the web form) are left alone
+        workouts = []
+        for p in processed:
+            if p['type'] == 'workout':
+                p['content_hash'] = workout_hash(p['date'], p['text'])
+                workouts.append(p)
+        diet_entries = [(d['date'], i, diet_hash(d['date'], i.get('meal_type', 'Snack'), i.get('food_raw', '')),
+                         d['hash'])
+                        for d in processed if d['type'] == 'diet' for i in d['items']]
+
+        user_id = self.user_id
+        workouts = only_new(cursor, "workout_logs", workouts, lambda w: (user_id, w['content_hash']))
+        diet_entries = only_new(cursor, "diet_logs", diet_entries, lambda e: (user_id, e[2]))
+
+        log_rows, exercise_rows, activation_rows, cardio_rows = [], [], [], []
+        lifts = [(w, i) for w in workouts for i in w['items'] if i.get('type') != 'cardio'
+                 and i.get('name') in self.exercise_info]
+
+        log_ids = iter(allocate_ids(cursor, "workout_logs", len(workouts)))
+        we_ids = iter(allocate_ids(cursor, "workout_exercises", len(lifts)))
+
+        for w in workouts:
+            w['log_id'] = next(log_ids)
+            log_rows.append((w['log_id'], user_id, w['date'], w['day_type'], w['text'], w['content_hash']))
+            for item in w['items']:
+                if item.get('type') == 'cardio':
+                    cardio_rows.append((w['log_id'], item.get('name', 'Cardio'), item.get('duration'),
+                                        item.get('distance'), item.get('speed'), item.get('calories')))
+
+        for w, item in lifts:
+            ex_id, prim_id, sec_json = self.exercise_info[item['name']]
+            we_id = next(we_ids)
+            exercise_rows.append((we_id, w['log_id'], ex_id, item.get('sets'), item.get('reps'), item.get('weight')))
+            activation_rows.append((we_id, prim_id, 'primary'))
+            try:
+                for sid in json.loads(sec_json or "[]"):
+                    activation_rows.append((we_id, sid, 'secondary'))
+            except ValueError:
+                pass
+
+        diet_rows = [
+            (user_id, date, i.get('meal_type', 'Snack'), i.get('food_raw', ''), i.get('calories', 0),
+             i.get('protein', 0), i.get('carbs', 0), i.get('fats', 0), content_hash)
+            for date, i, content_hash, _ in diet_entries
+        ]
+
+        bulk_insert(cursor, "workout_logs",
+                    ("id", "user_id", "workout_date", "day_type", "exercises_raw", "content_hash"), log_rows)
+        bulk_insert(cursor, "workout_exercises",
+                    ("id", "workout_log_id", "exercise_id", "sets", "reps", "weight"), exercise_rows)
+        bulk_insert(cursor, "muscle_activations", ("workout_exercise_id", "muscle_id", "activation_type"),
+                    activation_rows)
+        bulk_insert(cursor, "cardio_logs",
+                    ("workout_log_id", "activity_name", "duration", "distance", "speed", "calories"), cardio_rows)
+        bulk_insert(cursor, "diet_logs",
+                    ("user_id", "log_date", "meal_type", "food_raw", "calories", "protein", "carbs", "fats",
+                     "content_hash"), diet_rows)
+
+        refresh_daily_totals(cursor, [date for date, *_ in diet_entries], user_id)
+        if workouts:
+            bump_version(cursor, "workout")
+        if diet_rows:
+            bump_version(cursor, "diet")
+
+        bulk_insert(cursor, "import_log", ("content_hash", "record_type", "record_date"),
+                    [(p['hash'], p['type'], p['date']) for p in processed])
+        # A diet record counts as imported if any of its entries was new
+        return len(workouts) + len({record for *_, record in diet_entries})
+
+def only_new(cursor, table, entries, key_of):
+    """
+    Drops entries whose (user_id, content hash) key is already in `table` or
+    earlier in the list. The lookup is served by the (user_id, content_hash) index.
+    """
+    if not entries:
+        return []
+    keys = {key_of(e) for e in entries}
+    users = list({user_id for user_id, _ in keys})
+    hashes = list({content_hash for _, content_hash in keys})
+    cursor.execute(f"""
+        SELECT user_id, content_hash FROM {table}
+        WHERE user_id IN ({",".join("?" * len(users))}) AND content_hash IN ({",".join("?" * len(hashes))})
+    """, users + hashes)
+    seen = {tuple(row) for row in cursor.fetchall()}
+
+    new_entries = []
+    for entry in entries:
+        key = key_of(entry)
+        if key in seen:
+            continue
+        seen.add(key)
+        new_entries.append(entry)
+    return new_entries
+
+def import_file(path, use_ai=True, workers=4, chunk_size=200, user_id=DEFAULT_USER_ID):
+    """Convenience wrapper used by `main.py import`."""
+    return Importer(use_ai=use_ai, workers=workers, chunk_size=chunk_size, user_id=user_id).run(path)
@@ -0,0 +1,67 @@
+"""
+Learned aliases: confirmed fuzzy matches become exact-match aliases.
+When a confirmed workout (web /confirm, main.py log) contains an exercise the
+matcher found by fuzzy search, the text the user typed is stored against that
+exercise for that user. The matcher keeps each user's learned aliases in a
+dictionary, so the next time they type the same text it is a hit instead of a scan.
+Saving one bumps the 'aliases' data version; running matchers reload on it.
+"""
+import os
+from src.models.database import get_connection
+from src.models.writer import run_write
+from src.services.data_version import bump_version
+from src.services.users import DEFAULT_USER_ID
+
+# A confirmation only teaches the matcher if the fuzzy score was at least this
+# (a low-scoring match the user let through should not become permanent)
+LEARN_MIN_SCORE = float(os.getenv("LEARN_MIN_SCORE", "75"))
+
+def aliases_to_learn(exercises):
+    """[(alias, exercise name)] for the fuzzy matches among confirmed exercises."""
+    learned = {}
+    for item in exercises:
+        query, name = item.get('query'), item.get('name')
+        if (item.get('type', 'lift') == 'lift' and item.get('path') == 'fuzzy' and query and name
+                and (item.get('score') or 0) >= LEARN_MIN_SCORE and query != name.lower()):
+            learned[query] = name
+    return list(learned.items())
+
+def write_learned_aliases(cursor, exercises, user_id=DEFAULT_USER_ID):
+    """Stores the user's confirmed fuzzy matches inside the caller's transaction. Returns how many."""
+    pairs = aliases_to_learn(exercises)
+    if not pairs:
+        return 0
+    names = list({name for _, name in pairs})
+    cursor.execute(f"SELECT name, id FROM exercises WHERE name IN ({','.join('?' * len(names))})", names)
+    ids = dict(cursor.fetchall())
+
+    rows = [(user_id, alias, ids[name]) for alias, name in pairs if name in ids]
+    # A later confirmation to a different exercise replaces the old mapping
+    cursor.executemany("""
+        INSERT INTO learned_aliases (user_id, alias, exercise_id) VALUES (?, ?, ?)
+        ON CONFLICT (user_id, alias) DO UPDATE SET
+            confirmations = CASE WHEN learned_aliases.exercise_id = excluded.exercise_id
+                                 THEN learned_aliases.confirmations + 1 ELSE 1 END,
+            exercise_id = excluded.exercise_id
+    """, rows)
+    if rows:
+        bump_version(cursor, "aliases")
+    return len(rows)
+
+def learn_aliases(exercises, user_id=DEFAULT_USER_ID):
+    return run_write(lambda cursor: write_learned_aliases(cursor, exercises, user_id))
+
+def load_learned_aliases():
+    """{user_id: {alias: exercise name}} for every learned alias."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT la.user_id, la.alias, e.name
+        FROM learned_aliases la
+        JOIN exercises e ON e.id = la.exercise_id
+    """)
+    learned = {}
+    for user_id, alias, name in cursor.fetchall():
+        learned.setdefault(user_id, {})[alias] = name
+    conn.close()
+    return learned
@@ -0,0 +1,125 @@
+"""
+Ledger of Gemini calls.
+Every generate_content call made by AIParser, AIDietParser and AIAnalyzer is
+recorded in llm_calls with its latency, token counts and outcome, so
+`main.py llm-stats` can show what the AI features cost per day.
+"""
+import asyncio
+import datetime
+import time
+from collections import defaultdict
+from contextlib import contextmanager, asynccontextmanager
+from src.models.database import get_connection
+from src.models.writer import run_write
+from src.services.metrics import inc
+
+class LLMCall:
+    """Handle yielded by llm_call(); set .response so token usage gets recorded."""
+    def __init__(self):
+        self.response = None
+
+def _token_counts(response):
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None, None
+    return getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None)
+
+def record_call(service, model, latency_ms, outcome, prompt_tokens=None, response_tokens=None, cached=False):
+    """Writes one ledger row. Never raises: the ledger must not break the AI features."""
+    inc("workout_llm_calls_total", service=service, outcome=outcome)
+    row = (str(datetime.date.today()), service, model, prompt_tokens, response_tokens,
+           round(latency_ms, 1), outcome, 1 if cached else 0)
+    try:
+        # Same write path as the other saves (group-committed under WRITE_BEHIND=1);
+        # run_write closes the connection even when the INSERT fails
+        run_write(lambda cursor: cursor.execute("""
+            INSERT INTO llm_calls (call_date, service, model, prompt_tokens, response_tokens, latency_ms, outcome, cached)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, row))
+    except Exception as e:
+        print(f"[WARN] Could not record LLM call: {e}")
+
+@contextmanager
+def llm_call(service, model):
+    """
+    Wraps one Gemini request (and the parsing of its reply):
+        with llm_call("ai_parse", self.model_name) as call:
+            call.response = self.model.generate_content(prompt)
+            data = json.loads(call.response.text)
+    Any exception inside the block is recorded as an 'error' (the caller's fallback path).
+    """
+    call = LLMCall()
+    outcome = "ok"
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        prompt_tokens, response_tokens = _token_counts(call.response)
+        record_call(service, model, (time.perf_counter() - start) * 1000, outcome,
+                    prompt_tokens, response_tokens)
+
+@asynccontextmanager
+async def async_llm_call(service, model):
+    """
+    llm_call() for `await model.generate_content_async(...)`.
+    The ledger row is written from a worker thread, keeping the DB off the event loop.
+    """
+    call = LLMCall()
+    outcome = "ok"
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        prompt_tokens, response_tokens = _token_counts(call.response)
+        await asyncio.to_thread(record_call, service, model, (time.perf_counter() - start) * 1000, outcome,
+                                prompt_tokens, response_tokens)
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+def daily_stats(days=14):
+    """
+    Returns per-day, per-service rows (newest first):
+    {call_date, service, calls, errors, cached, p50_ms, p95_ms, prompt_tokens, response_tokens}
+    """
+    since = str(datetime.date.today() - datetime.timedelta(days=days - 1))
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT call_date, service, latency_ms, prompt_tokens, response_tokens, outcome, cached
+        FROM llm_calls
+        WHERE call_date >= ?
+    """, (since,))
+    rows = cursor.fetchall()
+    conn.close()
+
+    groups = defaultdict(list)
+    for row in rows:
+        groups[(str(row[0]), row[1])].append(row[2:])
+
+    stats = []
+    for (call_date, service), calls in groups.items():
+        # Cache hits never reach the model, so they are left out of the latency percentiles
+        latencies = sorted(c[0] for c in calls if not c[4] and c[0] is not None)
+        stats.append({
+            "call_date": call_date,
+            "service": service,
+            "calls": len(calls),
+            "errors": sum(1 for c in calls if c[3] == "error"),
+            "cached": sum(1 for c in calls if c[4]),
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "prompt_tokens": sum(c[1] or 0 for c in calls),
+            "response_tokens": sum(c[2] or 0 for c in calls),
+        })
+    return sorted(stats, key=lambda s: (s["call_date"], s["service"]), reverse=True)
@@ -0,0 +1,178 @@
+"""
+Lightweight timing and counter layer.
+Stages wrapped with @timed feed per-stage latency histograms, exported in
+Prometheus text format at /metrics and printed by `main.py ... --timing`.
+Disabled by default, so the CLI pays a single flag check per call.
+"""
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Histogram buckets in seconds (local SQLite calls up to slow Gemini responses)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HELP = {
+    "workout_stage_seconds": "Time spent in each logging pipeline stage",
+    "workout_stage_errors_total": "Pipeline stage calls that raised an exception",
+    "workout_http_request_seconds": "Web request latency by route",
+    "workout_diet_items_total": "Diet items resolved, by source (cache, model or unknown)",
+    "workout_db_queries_total": "SQL statements executed, by web route",
+    "workout_llm_calls_total": "Gemini requests, by service and outcome",
+    "workout_db_request_seconds": "Total SQL time per web request, by route",
+    "workout_write_commits_total": "Group commits made by the write-behind writer",
+    "workout_write_jobs_total": "Saves committed by the write-behind writer",
+    "workout_fragment_cache_total": "Rendered page fragments reused (hit) or re-rendered (miss)",
+    "workout_matcher_lookups_total": "Exercise lookups by path (alias, learned, fuzzy scan, miss)",
+}
+
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}   # (name, labels) -> [bucket counts..., sum, count, max]
+_counters = {}     # (name, labels) -> value
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def observe(name, seconds, **labels):
+    """Records one latency sample."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * len(BUCKETS) + [0.0, 0, 0.0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+        hist[-3] += seconds
+        hist[-2] += 1
+        hist[-1] = max(hist[-1], seconds)
+
+def inc(name, amount=1, **labels):
+    """Increments a counter."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+@contextmanager
+def track(stage):
+    """Times a block: `with track("db"): ...`"""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc("workout_stage_errors_total", stage=stage)
+        raise
+    finally:
+        observe("workout_stage_seconds", time.perf_counter() - start, stage=stage)
+
+def timed(stage):
+    """Decorator form of track() (works on async functions too)."""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await fn(*args, **kwargs)
+                with track(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with track(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# --- EXPORT ---
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+def render_prometheus():
+    """Returns all metrics in Prometheus text exposition format."""
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = []
+    for name in sorted({k[0] for k in histograms}):
+        lines.append(f"# HELP {name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} histogram")
+        for (hname, labels), hist in sorted(histograms.items()):
+            if hname != name:
+                continue
+            for bound, count in zip(BUCKETS, hist):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {hist[-2]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist[-3]:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist[-2]}")
+
+    for name in sorted({k[0] for k in counters}):
+        lines.append(f"# HELP {name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} counter")
+        for (cname, labels), value in sorted(counters.items()):
+            if cname == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+def format_summary():
+    """Stage timing table for the CLI --timing flag."""
+    with _lock:
+        rows = [(dict(labels).get("stage"), hist[-2], hist[-3], hist[-1])
+                for (name, labels), hist in _histograms.items() if name == "workout_stage_seconds"]
+        counters = dict(_counters)
+    errors = {dict(labels).get("stage"): v for (name, labels), v in counters.items()
+              if name == "workout_stage_errors_total"}
+    lookups = {dict(labels).get("path"): v for (name, labels), v in counters.items()
+               if name == "workout_matcher_lookups_total"}
+    diet_items = {dict(labels).get("source"): v for (name, labels), v in counters.items()
+                  if name == "workout_diet_items_total"}
+
+    lines = [f"{'Stage':<16} | {'Calls':>5} | {'Total ms':>9} | {'Avg ms':>8} | {'Max ms':>8} | {'Errors':>6}",
+             "-" * 70]
+    for stage, count, total, worst in sorted(rows, key=lambda r: -r[2]):
+        lines.append(f"{stage:<16} | {count:>5} | {total * 1000:>9.1f} | {total / count * 1000:>8.1f} | "
+                     f"{worst * 1000:>8.1f} | {errors.get(stage, 0):>6}")
+    if lookups:
+        exact = lookups.get("alias", 0) + lookups.get("learned", 0)
+        lines.append(f"\nExercise lookups: {exact} exact ({lookups.get('learned', 0)} learned), "
+                     f"{lookups.get('fuzzy', 0)} fuzzy, {lookups.get('miss', 0)} missed "
+                     f"({exact / sum(lookups.values()):.0%} exact)")
+    if any(diet_items.values()):
+        if not lookups:
+            lines.append("")
+        lines.append(f"Diet items: {diet_items.get('cache', 0)} from cache, {diet_items.get('model', 0)} "
+                     f"from model, {diet_items.get('unknown', 0)} not estimated")
+    return "\n".join(lines)
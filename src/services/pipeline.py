@@ -0,0 +1,52 @@
+"""
+Workout text -> structured log (parse, match, categorize).
+Shared by the bulk importer and the JSON API, which run it without a preview step.
+"""
+import re
+from src.services.users import DEFAULT_USER_ID
+
+def local_parse(text):
+    """Offline fallback: one exercise per line (or per comma on a single line)."""
+    lines = [l for l in text.splitlines() if l.strip()]
+    if len(lines) <= 1:
+        lines = text.split(",")
+
+    parsed = []
+    for line in lines:
+        # Keep the name, drop details like "- 3 sets: 35kg" or "(4 sets)"
+        name = re.split(r"\s[-:(]|\d", line.strip(), maxsplit=1)[0].strip()
+        if name:
+            parsed.append({"name": name})
+    return parsed
+
+def analyze_workout(text, ai_parser, matcher, categorizer, user_id=DEFAULT_USER_ID):
+    """
+    Returns (day_type, items) ready for save_workout, matched with user_id's learned aliases.
+    day_type is None when nothing in the text was recognised.
+    """
+    parsed_list = ai_parser.parse(text)
+    if not parsed_list:
+        parsed_list = local_parse(text)
+
+    items = []
+    for item in parsed_list:
+        if item.get('type') == 'cardio':
+            items.append(item)
+            continue
+
+        match_result = matcher.match(item.get('name') or "Unknown", user_id=user_id)
+        if match_result:
+            final_obj = match_result
+            final_obj['type'] = 'lift'
+            if item.get('sets'): final_obj['sets'] = item['sets']
+            if item.get('reps'): final_obj['reps'] = item['reps']
+            if item.get('weight'): final_obj['weight'] = item['weight']
+            items.append(final_obj)
+
+    lift_names = [i['name'] for i in items if i.get('type') != 'cardio']
+    report = categorizer.categorize(lift_names)
+    day_type = report['day_type']
+    if day_type == "UNKNOWN":
+        day_type = "CARDIO" if items else None
+
+    return day_type, items
@@ -0,0 +1,104 @@
+"""
+On-demand profiling of one CLI command or one web request.
+Captures cProfile stats and the top tracemalloc allocations for that call and
+writes them to PROFILE_DIR:
+  <stamp>-<name>-<pid>-<n>.pstats      cProfile stats (python -m pstats, snakeviz)
+  <stamp>-<name>-<pid>-<n>.alloc.txt   top allocations by line
+A short table of the top functions by cumulative time is returned for printing.
+
+CLI:  python src/main.py log --profile
+Web:  PROFILE_REQUESTS=1, then send `X-Profile: 1` (or add ?profile=1)
+"""
+import cProfile
+import itertools
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR") or Path(__file__).resolve().parents[2] / "profiles")
+TOP_FUNCTIONS = 15   # rows in the printed summary
+TOP_ALLOCATIONS = 25 # rows in the .alloc.txt file (the summary shows 5)
+
+# cProfile allows one active profiler per process (3.12+), so concurrent requests are not profiled
+_active = threading.Lock()
+_sequence = itertools.count(1)   # keeps names unique within a second
+
+# Allocations made by the profilers themselves
+_ALLOC_FILTERS = [tracemalloc.Filter(False, tracemalloc.__file__),
+                  tracemalloc.Filter(False, cProfile.__file__),
+                  tracemalloc.Filter(False, __file__),
+                  tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+
+def _slug(name):
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")[:60] or "run"
+
+class Profile:
+    """start() before the work, stop() after it. stop() returns the summary text."""
+    def __init__(self, name):
+        self.name = name
+        self.profiler = None
+        self.started_tracing = False
+        self.paths = []
+
+    def start(self):
+        if not _active.acquire(blocking=False):
+            return None   # another call is being profiled
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        self.profiler = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def stop(self):
+        self.profiler.disable()
+        elapsed = time.perf_counter() - self.started
+        try:
+            snapshot = tracemalloc.take_snapshot().filter_traces(_ALLOC_FILTERS)
+            peak = tracemalloc.get_traced_memory()[1]
+            if self.started_tracing:
+                tracemalloc.stop()
+        finally:
+            _active.release()
+        return self._write(elapsed, snapshot, peak)
+
+    def _write(self, elapsed, snapshot, peak):
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stem = PROFILE_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{_slug(self.name)}-{os.getpid()}-{next(_sequence)}"
+        stats_path, alloc_path = stem.with_suffix(".pstats"), stem.with_suffix(".alloc.txt")
+
+        self.profiler.dump_stats(stats_path)
+        allocations = snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+        with open(alloc_path, "w", encoding="utf-8") as f:
+            f.write(f"{self.name}: peak traced memory {peak / 1024:.0f} KiB\n")
+            for stat in allocations:
+                f.write(f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  {stat.traceback}\n")
+        self.paths = [stats_path, alloc_path]
+
+        return summarize(pstats.Stats(self.profiler), self.name, elapsed, peak, allocations[:5], self.paths)
+
+def _where(func):
+    filename, line, name = func
+    if filename == "~":
+        return name   # built-in, e.g. <built-in method time.sleep>
+    return f"{name} ({Path(filename).name}:{line})"
+
+def summarize(stats, name, elapsed, peak, allocations, paths):
+    """Top functions by cumulative time, the largest allocations, and where the files went."""
+    rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:TOP_FUNCTIONS]
+    lines = [f"[PROFILE] {name}: {elapsed * 1000:.1f} ms, peak traced memory {peak / 1024:.0f} KiB",
+             f"{'Cum ms':>9} | {'Own ms':>9} | {'Calls':>7} | Function",
+             "-" * 70]
+    for func, (_, calls, own, cumulative, _) in rows:
+        lines.append(f"{cumulative * 1000:>9.1f} | {own * 1000:>9.1f} | {calls:>7} | {_where(func)}")
+    if allocations:
+        lines.append("Top allocations:")
+        for stat in allocations:
+            lines.append(f"  {stat.size / 1024:>8.1f} KiB  {stat.traceback}")
+    lines.append("Saved: " + ", ".join(str(p) for p in paths))
+    return "\n".join(lines)
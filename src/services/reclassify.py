@@ -0,0 +1,132 @@
+"""
+Recomputes the day type of logged workouts from their stored exercises.
+A log's day type is decided once, when it is saved. After exercise -> muscle
+mappings change (e.g. fix_exercises.py, a catalog reload), old logs keep the
+type they were saved with. This recomputes it for every log (or a date range
+/ one user) in one grouped query, with the same rules as the logging path:
+  - each lift votes for its primary muscle's category (PUSH / PULL / LEGS)
+  - most votes wins; a tie goes to the category logged first (as WorkoutCategorizer)
+  - no recognised lifts but cardio -> CARDIO (as pipeline.analyze_workout)
+  - nothing recognised -> left as it is
+Only logs whose type changes are updated, in batches, in one transaction.
+
+Dry-run by default: prints the diff and changes nothing.
+    python src/services/reclassify.py                          # report only
+    python src/services/reclassify.py --since 2025-01-01 --apply
+"""
+import sys
+import os
+sys.path.append(os.getcwd())
+import argparse
+from collections import Counter
+from src.models.database import get_connection
+from src.services.data_version import bump_version
+
+BATCH_SIZE = 500
+SAMPLE_ROWS = 20   # changed logs listed in the report
+
+# Lift votes per (log, category). first_id orders ties like the categorizer's Counter.
+RECLASSIFY_SQL = """
+WITH scope AS (
+    SELECT id, user_id, workout_date, day_type FROM workout_logs l
+    WHERE {scope}
+),
+votes AS (
+    SELECT we.workout_log_id AS log_id, mg.category, COUNT(*) AS n, MIN(we.id) AS first_id
+    FROM scope s
+    JOIN workout_exercises we ON we.workout_log_id = s.id
+    JOIN exercises e ON e.id = we.exercise_id
+    JOIN muscles m ON m.id = e.primary_muscle_id
+    JOIN muscle_groups mg ON mg.id = m.muscle_group_id
+    GROUP BY we.workout_log_id, mg.category
+),
+winners AS (
+    SELECT v.log_id, v.category AS day_type
+    FROM votes v
+    WHERE NOT EXISTS (
+        SELECT 1 FROM votes w
+        WHERE w.log_id = v.log_id AND (w.n > v.n OR (w.n = v.n AND w.first_id < v.first_id))
+    )
+    UNION ALL
+    SELECT DISTINCT cl.workout_log_id, 'CARDIO'
+    FROM scope s
+    JOIN cardio_logs cl ON cl.workout_log_id = s.id
+    WHERE NOT EXISTS (SELECT 1 FROM votes v WHERE v.log_id = s.id)
+)
+SELECT s.id, s.user_id, s.workout_date, s.day_type, w.day_type
+FROM scope s
+JOIN winners w ON w.log_id = s.id
+WHERE s.day_type IS NULL OR s.day_type <> w.day_type
+ORDER BY s.workout_date, s.id
+"""
+
+def find_changes(cursor, since=None, until=None, user_id=None):
+    """Returns [(log_id, user_id, date, old day type, new day type)] for logs whose type would change."""
+    conditions, params = ["1 = 1"], []
+    if since:
+        conditions.append("l.workout_date >= ?")
+        params.append(since)
+    if until:
+        conditions.append("l.workout_date <= ?")
+        params.append(until)
+    if user_id is not None:
+        conditions.append("l.user_id = ?")
+        params.append(user_id)
+    cursor.execute(RECLASSIFY_SQL.format(scope=" AND ".join(conditions)), params)
+    return cursor.fetchall()
+
+def _apply(cursor, changes):
+    by_type = {}
+    for log_id, _, _, _, new_type in changes:
+        by_type.setdefault(new_type, []).append(log_id)
+    for new_type, ids in by_type.items():
+        for i in range(0, len(ids), BATCH_SIZE):
+            batch = ids[i:i + BATCH_SIZE]
+            cursor.execute(f"UPDATE workout_logs SET day_type = ? WHERE id IN ({','.join('?' * len(batch))})",
+                           [new_type] + batch)
+    if changes:
+        bump_version(cursor, "workout")
+
+def reclassify(since=None, until=None, user_id=None, apply=False):
+    """
+    Recomputes day types (optionally for dates since..until and/or one user) and prints a diff.
+    apply: write the changed day types. Returns {(old, new): count}.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        changes = find_changes(cursor, since, until, user_id)
+        diff = Counter((old or "NULL", new) for _, _, _, old, new in changes)
+
+        scope = f"{since or 'start'} .. {until or 'today'}" + (f", user {user_id}" if user_id is not None else "")
+        print(f"\n[RECLASSIFY] {len(changes)} log(s) change day type ({scope})")
+        for (old, new), count in diff.most_common():
+            print(f"  {old:>6} -> {new:<6} {count:>6}")
+        for log_id, owner, date, old, new in changes[:SAMPLE_ROWS]:
+            print(f"  {date}: #{log_id} (user {owner}) {old or 'NULL'} -> {new}")
+        if len(changes) > SAMPLE_ROWS:
+            print(f"  ... and {len(changes) - SAMPLE_ROWS} more")
+
+        if apply:
+            _apply(cursor, changes)
+            conn.commit()
+            print("\n[OK] Day types updated.")
+        else:
+            conn.rollback()
+            print("\n[DRY RUN] Nothing changed. Re-run with --apply to update day types.")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return dict(diff)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute day types of logged workouts")
+    parser.add_argument("--since", help="First workout date to recompute (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Last workout date to recompute (YYYY-MM-DD)")
+    parser.add_argument("--user", type=int, help="Only this user's logs (default: every user)")
+    parser.add_argument("--apply", action="store_true", help="Update the day types (default is a dry run)")
+    args = parser.parse_args()
+    reclassify(since=args.since, until=args.until, user_id=args.user, apply=args.apply)
@@ -0,0 +1,106 @@
+"""
+Full-text search over workout and diet history.
+SQLite uses the FTS5 tables from migration 010 (ranked by bm25). Postgres
+uses the stored tsvector columns with GIN indexes (ranked by ts_rank).
+Matched words in a snippet are wrapped in MATCH_START / MATCH_END.
+Only the given user's logs are returned.
+"""
+import re
+from src.models.database import get_connection, is_postgres
+from src.services.users import DEFAULT_USER_ID
+
+MATCH_START, MATCH_END = "\x02", "\x03"
+PER_PAGE = 20
+KINDS = ("all", "workout", "diet")
+
+def fts_query(text):
+    """
+    User text -> FTS5 query: every word must appear, each as a prefix
+    ("preacher curl" also finds "preacher curls"). Returns None without words.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+def tsquery(text):
+    """User text -> to_tsquery() input with the same prefix/AND semantics as fts_query()."""
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    return " & ".join(f"{word}:*" for word in words)
+
+def _sqlite_parts(kind):
+    snippet_args = f"'{MATCH_START}', '{MATCH_END}', '...', 16"
+    parts = []
+    if kind in ("all", "workout"):
+        parts.append(f"""
+        SELECT 'workout', l.id, l.workout_date, l.day_type,
+               snippet(workout_search, 0, {snippet_args}), bm25(workout_search)
+        FROM workout_search JOIN workout_logs l ON l.id = workout_search.rowid
+        WHERE workout_search MATCH ? AND l.user_id = ?""")
+    if kind in ("all", "diet"):
+        parts.append(f"""
+        SELECT 'diet', d.id, d.log_date, d.meal_type,
+               snippet(diet_search, 0, {snippet_args}), bm25(diet_search)
+        FROM diet_search JOIN diet_logs d ON d.id = diet_search.rowid
+        WHERE diet_search MATCH ? AND d.user_id = ?""")
+    return parts
+
+def _postgres_parts(kind):
+    # Lower score ranks first on both backends
+    headline = f"ts_headline('english', {{column}}, to_tsquery('english', ?), " \
+               f"'StartSel={MATCH_START}, StopSel={MATCH_END}, MaxWords=16, MinWords=6')"
+    parts = []
+    if kind in ("all", "workout"):
+        parts.append(f"""
+        SELECT 'workout', l.id, l.workout_date, l.day_type,
+               {headline.format(column='l.exercises_raw')},
+               -ts_rank(l.search_vector, to_tsquery('english', ?))
+        FROM workout_logs l
+        WHERE l.search_vector @@ to_tsquery('english', ?) AND l.user_id = ?""")
+    if kind in ("all", "diet"):
+        parts.append(f"""
+        SELECT 'diet', d.id, d.log_date, d.meal_type,
+               {headline.format(column='d.food_raw')},
+               -ts_rank(d.search_vector, to_tsquery('english', ?))
+        FROM diet_logs d
+        WHERE d.search_vector @@ to_tsquery('english', ?) AND d.user_id = ?""")
+    return parts
+
+def search(text, kind="all", page=1, per_page=PER_PAGE, user_id=DEFAULT_USER_ID):
+    """
+    Ranked matches for `text` in the user's workout (exercises_raw) and/or diet (food_raw) logs.
+    Returns (results, total). results: [{kind, id, date, label, snippet}], best first.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}")
+    page = max(page, 1)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        if is_postgres(conn):
+            query = tsquery(text)
+            parts = _postgres_parts(kind)
+            part_params = [query, query, query, user_id]
+        else:
+            query = fts_query(text)
+            parts = _sqlite_parts(kind)
+            part_params = [query, user_id]
+        if query is None:
+            return [], 0
+
+        union = " UNION ALL ".join(parts)
+        params = part_params * len(parts)
+
+        cursor.execute(f"SELECT COUNT(*) FROM ({union}) AS matches", params)
+        total = cursor.fetchone()[0]
+
+        cursor.execute(f"SELECT * FROM ({union}) AS matches ORDER BY 6, 3 DESC LIMIT ? OFFSET ?",
+                       params + [per_page, (page - 1) * per_page])
+        results = [{"kind": row[0], "id": row[1], "date": str(row[2]), "label": row[3], "snippet": row[4]}
+                   for row in cursor.fetchall()]
+    finally:
+        conn.close()
+    return results, total
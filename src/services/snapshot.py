@@ -0,0 +1,289 @@
+"""
+Columnar snapshot of the training history for analytics.
+Exports the joined history into one .npy file per column, so notebooks and
+analytics code can memory-map millions of rows (np.load(..., mmap_mode="r"))
+and aggregate them with NumPy without touching the live database.
+
+Tables (one directory each under SNAPSHOT_DIR):
+  sets:        one row per workout_exercises row, with its log's user, date and day type
+  activations: one row per muscle_activations row, with its set's user, date and sets
+Text columns are dictionary-encoded: the .npy holds int32 codes into
+manifest.json's "strings" lists, which only ever grow, so codes stay stable.
+
+Exports are incremental: each run appends the rows whose id is above the last
+exported id. If rows at or below it were deleted (e.g. by dedupe), the
+snapshot is rebuilt. Edits to already-exported rows (a reclassified day
+type) need --rebuild.
+
+Run: python src/main.py snapshot [--rebuild]
+"""
+import io
+import os
+import re
+import json
+import math
+import time
+from pathlib import Path
+import numpy as np
+from src.models.database import get_connection
+
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR") or Path(__file__).resolve().parents[2] / "snapshot")
+FETCH_ROWS = 50000   # rows converted and appended per step
+FORMAT_VERSION = 1
+
+NUMBER = re.compile(r"\d+(?:\.\d+)?")
+LB_TO_KG = 0.45359237
+
+def _first_number(text):
+    """'8-10' -> 8.0, '3' -> 3.0, None/'-' -> NaN."""
+    match = NUMBER.search(str(text or ""))
+    return float(match.group()) if match else math.nan
+
+def _top_weight_kg(text):
+    """Heaviest weight in a weight string ('60kg, 62.5kg' -> 62.5), lbs converted to kg."""
+    text = str(text or "")
+    numbers = [float(n) for n in NUMBER.findall(text)]
+    if not numbers:
+        return math.nan
+    top = max(numbers)
+    return top * LB_TO_KG if "lb" in text.lower() else top
+
+# Column kinds: "int" / "date" / "bool" are stored as is, "num" and "weight" are
+# parsed out of free text (NaN when there is no number), "str" is dictionary-encoded.
+TABLES = {
+    "sets": {
+        "source": "workout_exercises",
+        "sql": """
+            SELECT we.id, we.workout_log_id, l.user_id, l.workout_date, l.day_type, e.name,
+                   we.sets, we.reps, we.weight
+            FROM workout_exercises we
+            JOIN workout_logs l ON l.id = we.workout_log_id
+            JOIN exercises e ON e.id = we.exercise_id
+            WHERE we.id > ?
+            ORDER BY we.id
+        """,
+        "columns": [
+            ("id", "int", np.int64),
+            ("workout_log_id", "int", np.int64),
+            ("user_id", "int", np.int32),
+            ("date", "date", "datetime64[D]"),
+            ("day_type", "str", np.int32),
+            ("exercise", "str", np.int32),
+            ("sets", "num", np.float32),
+            ("reps", "num", np.float32),
+            ("weight_kg", "weight", np.float32),
+        ],
+    },
+    "activations": {
+        "source": "muscle_activations",
+        "sql": """
+            SELECT ma.id, ma.workout_exercise_id, l.user_id, l.workout_date, m.name, mg.name,
+                   ma.activation_type = 'primary', we.sets
+            FROM muscle_activations ma
+            JOIN workout_exercises we ON we.id = ma.workout_exercise_id
+            JOIN workout_logs l ON l.id = we.workout_log_id
+            JOIN muscles m ON m.id = ma.muscle_id
+            JOIN muscle_groups mg ON mg.id = m.muscle_group_id
+            WHERE ma.id > ?
+            ORDER BY ma.id
+        """,
+        "columns": [
+            ("id", "int", np.int64),
+            ("workout_exercise_id", "int", np.int64),
+            ("user_id", "int", np.int32),
+            ("date", "date", "datetime64[D]"),
+            ("muscle", "str", np.int32),
+            ("muscle_group", "str", np.int32),
+            ("primary", "bool", np.bool_),
+            ("sets", "num", np.float32),
+        ],
+    },
+}
+
+# --- COLUMN FILES ---
+
+_HEADER_IO = {
+    (1, 0): (np.lib.format.read_array_header_1_0, np.lib.format.write_array_header_1_0),
+    (2, 0): (np.lib.format.read_array_header_2_0, np.lib.format.write_array_header_2_0),
+}
+
+def _read_header(f):
+    """(shape, fortran_order, dtype, version) of an open .npy file, positioned at its data."""
+    version = np.lib.format.read_magic(f)
+    read_header, _ = _HEADER_IO[version]
+    return (*read_header(f), version)
+
+def _append_column(path, values):
+    """
+    Appends values to a 1-D .npy file in place. NumPy pads the header so the
+    length can grow without moving the data; if it would move, the file is rewritten.
+    """
+    if not path.exists():
+        np.save(path, values)
+        return
+    with open(path, "r+b") as f:
+        shape, fortran_order, dtype, version = _read_header(f)
+        data_start = f.tell()
+        header = io.BytesIO()
+        _HEADER_IO[version][1](header, {"descr": np.lib.format.dtype_to_descr(dtype),
+                                        "fortran_order": fortran_order, "shape": (shape[0] + len(values),)})
+        if header.tell() == data_start:
+            f.seek(0)
+            f.write(header.getvalue())
+            f.seek(0, os.SEEK_END)
+            f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+            return
+    np.save(path, np.concatenate([np.load(path), values.astype(dtype)]))
+
+def _column_length(path):
+    with open(path, "rb") as f:
+        return _read_header(f)[0][0]
+
+def _encode(values, strings, lookup):
+    codes = []
+    for value in values:
+        value = "" if value is None else str(value)
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(strings)
+            strings.append(value)
+        codes.append(code)
+    return codes
+
+def _to_columns(rows, columns, manifest, lookups):
+    """Converts fetched rows into one NumPy array per column."""
+    arrays = {}
+    for i, (name, kind, dtype) in enumerate(columns):
+        values = [row[i] for row in rows]
+        if kind == "str":
+            strings = manifest["strings"].setdefault(name, [])
+            values = _encode(values, strings, lookups.setdefault(name, {s: n for n, s in enumerate(strings)}))
+        elif kind == "date":
+            values = [str(v)[:10] for v in values]
+        elif kind == "num":
+            values = [_first_number(v) for v in values]
+        elif kind == "weight":
+            values = [_top_weight_kg(v) for v in values]
+        elif kind == "bool":
+            values = [bool(v) for v in values]
+        arrays[name] = np.array(values, dtype=dtype)
+    return arrays
+
+# --- EXPORT ---
+
+def _load_manifest(path):
+    manifest_path = path / "manifest.json"
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    return manifest if manifest.get("format") == FORMAT_VERSION else None
+
+def _save_manifest(path, manifest):
+    # Written last (and atomically): columns longer than the manifest says are a half-finished run
+    manifest["exported_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    tmp = path / "manifest.json.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, path / "manifest.json")
+
+def _is_consistent(cursor, path, manifest):
+    """False if the snapshot no longer matches the database below its last ids."""
+    for table, spec in TABLES.items():
+        state = manifest["tables"].get(table)
+        if state is None:
+            return False
+        for name, _, _ in spec["columns"]:
+            column = path / table / f"{name}.npy"
+            if not column.exists() or _column_length(column) != state["rows"]:
+                return False
+        # Deleted source rows (dedupe, cleanup) change the count below the last id
+        cursor.execute(f"SELECT COUNT(*) FROM {spec['source']} WHERE id <= ?", (state["last_id"],))
+        if cursor.fetchone()[0] != state["source_rows"]:
+            return False
+    return True
+
+def _clear(path):
+    for table, spec in TABLES.items():
+        for name, _, _ in spec["columns"]:
+            (path / table / f"{name}.npy").unlink(missing_ok=True)
+    (path / "manifest.json").unlink(missing_ok=True)
+
+def export(path=SNAPSHOT_DIR, rebuild=False):
+    """
+    Appends history rows added since the last export (everything on the first run,
+    or with rebuild). Returns {table: (new rows, total rows)} and whether it rebuilt.
+    """
+    path = Path(path)
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        manifest = None if rebuild else _load_manifest(path)
+        if manifest is not None and not _is_consistent(cursor, path, manifest):
+            print("[SNAPSHOT] Exported rows changed in the database since the last run; rebuilding.")
+            manifest = None
+        if manifest is None:
+            rebuild = True
+            _clear(path)
+            manifest = {"format": FORMAT_VERSION, "tables": {}, "strings": {}}
+
+        lookups = {}
+        added = {}
+        for table, spec in TABLES.items():
+            (path / table).mkdir(parents=True, exist_ok=True)
+            state = manifest["tables"].setdefault(table, {"rows": 0, "last_id": 0, "source_rows": 0})
+            start_id, new_rows = state["last_id"], 0
+
+            cursor.execute(spec["sql"], (start_id,))
+            while True:
+                rows = cursor.fetchmany(FETCH_ROWS)
+                if not rows:
+                    break
+                arrays = _to_columns(rows, spec["columns"], manifest, lookups)
+                for name, values in arrays.items():
+                    _append_column(path / table / f"{name}.npy", values)
+                new_rows += len(rows)
+                state["last_id"] = int(arrays["id"][-1])
+
+            state["rows"] += new_rows
+            cursor.execute(f"SELECT COUNT(*) FROM {spec['source']} WHERE id <= ?", (state["last_id"],))
+            state["source_rows"] = cursor.fetchone()[0]
+            added[table] = (new_rows, state["rows"])
+
+        _save_manifest(path, manifest)
+    finally:
+        conn.close()
+    return added, rebuild
+
+# --- READING ---
+
+def open_snapshot(path=SNAPSHOT_DIR):
+    """
+    Memory-maps a snapshot: {"sets": {column: array}, "activations": {...},
+    "strings": {column: array of text}}. Decode a text column with
+    snap["strings"]["exercise"][snap["sets"]["exercise"]].
+    """
+    path = Path(path)
+    manifest = _load_manifest(path)
+    if manifest is None:
+        raise FileNotFoundError(f"No snapshot at {path}. Run: python src/main.py snapshot")
+    snap = {"strings": {name: np.array(values, dtype=object) for name, values in manifest["strings"].items()}}
+    for table, spec in TABLES.items():
+        rows = manifest["tables"][table]["rows"]
+        # Trimmed to the manifest in case a run was interrupted mid-append
+        snap[table] = {name: np.load(path / table / f"{name}.npy", mmap_mode="r")[:rows]
+                       for name, _, _ in spec["columns"]}
+    return snap
+
+def sets_per_muscle(snap, user_id=None, primary_only=True):
+    """Total working sets per muscle (example aggregate). Returns {muscle: sets}, largest first."""
+    act = snap["activations"]
+    mask = ~np.isnan(act["sets"])
+    if primary_only:
+        mask &= act["primary"]
+    if user_id is not None:
+        mask &= act["user_id"] == user_id
+    names = snap["strings"]["muscle"]
+    totals = np.bincount(act["muscle"][mask], weights=act["sets"][mask], minlength=len(names))
+    order = np.argsort(totals)[::-1]
+    return {names[i]: float(totals[i]) for i in order if totals[i] > 0}
@@ -0,0 +1,298 @@
+"""
+Synthetic history generator for scale testing.
+Builds realistic training histories from the real exercise catalog: a
+push/pull/legs program per user, progressive per-set weights with deloads,
+cardio sessions and daily meals. Lifter n is saved as user first_user + n;
+by default first_user is the first id above every existing user, so real
+history (user 1) is never mixed with synthetic data.
+Rows are bulk-inserted CHUNK_ROWS records per transaction, the same way the
+importer writes.
+The same seed always produces the same history.
+
+Run: python src/main.py synth --users 5 --years 2 --seed 42
+"""
+import datetime
+import json
+import random
+import time
+from src.models.database import get_connection, is_postgres, bulk_insert, allocate_ids
+from src.services.diet_service import refresh_daily_totals
+from src.services.hashing import workout_hash, diet_hash
+from src.services.data_version import bump_version
+from src.services.importer import only_new
+from src.services.users import DEFAULT_USER_ID
+
+SYNTH_START = datetime.date(2020, 1, 1)
+CHUNK_ROWS = 2000   # workouts + diet entries written per transaction
+
+CARDIO = [
+    # (activity, km/h range, kcal per minute)
+    ("Treadmill Run", (8.0, 12.0), 11),
+    ("Incline Walk", (4.5, 6.0), 7),
+    ("Cycling", (18.0, 28.0), 9),
+    ("Rowing", (9.0, 13.0), 10),
+]
+
+FOODS = {
+    # meal: [(food, grams range, kcal/protein/carbs/fats per 100g)]
+    "Breakfast": [("oats", (50, 100), (389, 17, 66, 7)), ("eggs", (100, 200), (143, 13, 1, 10)),
+                  ("greek yogurt", (150, 300), (97, 9, 4, 5)), ("banana", (100, 150), (89, 1, 23, 0)),
+                  ("whole wheat toast", (60, 120), (247, 13, 41, 3))],
+    "Lunch": [("chicken breast", (150, 250), (165, 31, 0, 4)), ("white rice", (150, 300), (130, 3, 28, 0)),
+              ("lentil curry", (200, 350), (116, 9, 20, 0)), ("tuna salad", (150, 250), (132, 20, 3, 5)),
+              ("paneer wrap", (200, 300), (240, 12, 22, 12))],
+    "Dinner": [("salmon", (150, 220), (208, 20, 0, 13)), ("sweet potato", (150, 300), (86, 2, 20, 0)),
+               ("beef stir fry", (200, 350), (180, 16, 8, 9)), ("pasta bolognese", (250, 400), (150, 8, 18, 5)),
+               ("tofu and vegetables", (250, 350), (95, 8, 6, 5))],
+    "Snack": [("protein shake", (300, 400), (60, 10, 3, 1)), ("almonds", (20, 40), (579, 21, 22, 50)),
+              ("apple", (150, 200), (52, 0, 14, 0)), ("cottage cheese", (100, 200), (98, 11, 3, 4))],
+}
+
+def load_catalog():
+    """Real exercises by day category: {"PUSH": [(name, id, primary_muscle_id, secondary_json, type, aliases)]}."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT e.name, e.id, e.primary_muscle_id, e.secondary_muscles, e.exercise_type, e.aliases, mg.category
+        FROM exercises e
+        JOIN muscles m ON e.primary_muscle_id = m.id
+        JOIN muscle_groups mg ON m.muscle_group_id = mg.id
+        ORDER BY e.id
+    """)
+    catalog = {}
+    for name, ex_id, prim_id, sec_json, ex_type, aliases, category in cursor.fetchall():
+        catalog.setdefault(category, []).append((name, ex_id, prim_id, sec_json, ex_type,
+                                                 json.loads(aliases or "[]")))
+    conn.close()
+    return catalog
+
+class SyntheticUser:
+    """One lifter: a fixed program, a weekly schedule and per-exercise strength that grows over time."""
+    def __init__(self, number, seed, catalog):
+        self.number = number
+        self.rng = random.Random(f"{seed}-{number}")
+        rng = self.rng
+
+        # 4-6 exercises per day type, compounds first
+        self.program = {}
+        for category, exercises in catalog.items():
+            picks = rng.sample(exercises, min(len(exercises), rng.randint(4, 6)))
+            self.program[category] = sorted(picks, key=lambda e: e[4] != "compound")
+        self.categories = sorted(self.program)
+
+        self.training_days = set(rng.sample(range(7), rng.randint(3, 6)))   # weekdays
+        self.cardio_days = set(rng.sample(range(7), rng.randint(1, 3)))
+        self.diet_logging = rng.uniform(0.5, 0.95)   # share of days with meals logged
+        self.strength = {}   # exercise name -> [working weight, ceiling] (kg)
+        self.next_category = 0
+
+    def _weight(self, exercise, week):
+        name, _, _, _, ex_type, _ = exercise
+        rng = self.rng
+        if name not in self.strength:
+            start = rng.uniform(30, 80) if ex_type == "compound" else rng.uniform(8, 25)
+            self.strength[name] = [start, start * rng.uniform(1.4, 2.0)]   # current, genetic ceiling
+        # Quick early gains that slow down near the ceiling, with a deload every 8th week
+        current, ceiling = self.strength[name]
+        current += (ceiling - current) * rng.uniform(0.0, 0.02)
+        self.strength[name][0] = current
+        working = current * (0.85 if week % 8 == 7 else 1.0)
+        step = 2.5 if ex_type == "compound" else 1.0
+        return max(step, round(working / step) * step)
+
+    def workout(self, date):
+        """Returns (day_type, raw text, items) for `date`, or None on a rest day."""
+        rng = self.rng
+        lifting = date.weekday() in self.training_days
+        cardio = date.weekday() in self.cardio_days and rng.random() < 0.8
+        if not lifting and not cardio:
+            return None
+
+        items, lines = [], []
+        if lifting:
+            category = self.categories[self.next_category % len(self.categories)]
+            self.next_category += 1
+            week = date.toordinal() // 7
+            for exercise in self.program[category]:
+                name, _, _, _, ex_type, aliases = exercise
+                if rng.random() < 0.1:
+                    continue   # skipped this session
+                sets = rng.choice((3, 3, 4, 5)) if ex_type == "compound" else rng.choice((2, 3, 3, 4))
+                reps = rng.choice((5, 6, 8)) if ex_type == "compound" else rng.choice((10, 12, 15))
+                top = self._weight(exercise, week)
+                step = 2.5 if ex_type == "compound" else 1.0
+                # Ramp up to the working weight over the first sets
+                ramp = (0.8, 0.9, 1.0, 1.0, 1.0)[-sets:] if rng.random() < 0.5 else (1.0,) * sets
+                weights = [max(step, round(top * f / step) * step) for f in ramp]
+                weight = ", ".join(f"{w:g}kg" for w in weights)
+                items.append({"type": "lift", "name": name, "sets": sets, "reps": str(reps), "weight": weight})
+                typed = rng.choice(aliases) if aliases and rng.random() < 0.6 else name.lower()
+                lines.append(f"{typed} {sets}x{reps} {weight}")
+            if not items:
+                return None
+            day_type = category
+        else:
+            day_type = "CARDIO"
+
+        if cardio:
+            activity, speeds, kcal_per_min = rng.choice(CARDIO)
+            minutes = rng.choice((15, 20, 25, 30, 40, 45))
+            speed = round(rng.uniform(*speeds), 1)
+            distance = round(speed * minutes / 60, 1)
+            items.append({"type": "cardio", "name": activity, "duration": f"{minutes} mins",
+                          "distance": f"{distance}km", "speed": f"{speed} km/h",
+                          "calories": int(minutes * kcal_per_min * rng.uniform(0.9, 1.1))})
+            lines.append(f"{activity.lower()} {minutes} mins {distance}km")
+
+        return day_type, "\n".join(lines), items
+
+    def meals(self):
+        """Returns the day's diet entries (possibly none)."""
+        rng = self.rng
+        if rng.random() > self.diet_logging:
+            return []
+        entries = []
+        for meal, foods in FOODS.items():
+            if meal == "Snack" and rng.random() < 0.5:
+                continue
+            for food, grams_range, per_100g in rng.sample(foods, rng.randint(1, 2)):
+                grams = rng.randrange(grams_range[0], grams_range[1] + 1, 10)
+                kcal, protein, carbs, fats = (round(v * grams / 100) for v in per_100g)
+                entries.append({"meal_type": meal, "food_raw": f"{grams}g {food}", "calories": kcal,
+                                "protein": protein, "carbs": carbs, "fats": fats})
+        return entries
+
+def _write_chunk(conn, cursor, workouts, diet_entries):
+    """
+    Bulk-inserts one chunk.
+    workouts: [(user_id, date, day_type, text, items)], diet_entries: [(user_id, date, item)].
+    """
+    if not is_postgres(conn):
+        # Hold the write lock so allocated ids cannot be taken by another writer
+        cursor.execute("BEGIN IMMEDIATE")
+
+    workouts = only_new(cursor, "workout_logs", [(*w, workout_hash(w[1], w[3])) for w in workouts],
+                        lambda w: (w[0], w[5]))
+    diet_entries = only_new(cursor, "diet_logs",
+                            [(u, d, i, diet_hash(d, i['meal_type'], i['food_raw'])) for u, d, i in diet_entries],
+                            lambda e: (e[0], e[3]))
+
+    lifts = sum(1 for w in workouts for i in w[4] if i['type'] == 'lift')
+    log_ids = iter(allocate_ids(cursor, "workout_logs", len(workouts)))
+    we_ids = iter(allocate_ids(cursor, "workout_exercises", lifts))
+
+    log_rows, exercise_rows, activation_rows, cardio_rows = [], [], [], []
+    for user_id, date, day_type, text, items, content_hash in workouts:
+        log_id = next(log_ids)
+        log_rows.append((log_id, user_id, str(date), day_type, text, content_hash))
+        for item in items:
+            if item['type'] == 'cardio':
+                cardio_rows.append((log_id, item['name'], item['duration'], item['distance'], item['speed'],
+                                    item['calories']))
+                continue
+            ex_id, prim_id, sec_json = item['catalog']
+            we_id = next(we_ids)
+            exercise_rows.append((we_id, log_id, ex_id, item['sets'], item['reps'], item['weight']))
+            activation_rows.append((we_id, prim_id, 'primary'))
+            for sid in json.loads(sec_json or "[]"):
+                activation_rows.append((we_id, sid, 'secondary'))
+
+    diet_rows = [(user_id, str(date), i['meal_type'], i['food_raw'], i['calories'], i['protein'], i['carbs'],
+                  i['fats'], content_hash) for user_id, date, i, content_hash in diet_entries]
+
+    bulk_insert(cursor, "workout_logs", ("id", "user_id", "workout_date", "day_type", "exercises_raw", "content_hash"),
+                log_rows)
+    bulk_insert(cursor, "workout_exercises",
+                ("id", "workout_log_id", "exercise_id", "sets", "reps", "weight"), exercise_rows)
+    bulk_insert(cursor, "muscle_activations", ("workout_exercise_id", "muscle_id", "activation_type"),
+                activation_rows)
+    bulk_insert(cursor, "cardio_logs",
+                ("workout_log_id", "activity_name", "duration", "distance", "speed", "calories"), cardio_rows)
+    bulk_insert(cursor, "diet_logs",
+                ("user_id", "log_date", "meal_type", "food_raw", "calories", "protein", "carbs", "fats",
+                 "content_hash"), diet_rows)
+
+    dates_by_user = {}
+    for user_id, date, _, _ in diet_entries:
+        dates_by_user.setdefault(user_id, set()).add(str(date))
+    for user_id, dates in sorted(dates_by_user.items()):
+        refresh_daily_totals(cursor, sorted(dates), user_id)
+    if log_rows:
+        bump_version(cursor, "workout")
+    if diet_rows:
+        bump_version(cursor, "diet")
+    conn.commit()
+
+    return {"workouts": len(log_rows), "exercises": len(exercise_rows), "activations": len(activation_rows),
+            "cardio": len(cardio_rows), "diet": len(diet_rows)}
+
+def _flush(workouts, diet_entries, totals):
+    conn = get_connection()
+    try:
+        counts = _write_chunk(conn, conn.cursor(), workouts, diet_entries)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    for table, n in counts.items():
+        totals[table] += n
+
+def first_free_user():
+    """The lowest user id above every user that already has logs (never DEFAULT_USER_ID)."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT MAX(user_id) FROM (
+                SELECT MAX(user_id) AS user_id FROM workout_logs
+                UNION ALL SELECT MAX(user_id) FROM diet_logs
+            ) users
+        """)
+        highest = cursor.fetchone()[0]
+    finally:
+        conn.close()
+    return max(highest or DEFAULT_USER_ID, DEFAULT_USER_ID) + 1
+
+def generate(users=1, years=1, seed=42, start=SYNTH_START, first_user=None):
+    """
+    Writes `years` of history for `users` lifters from `start`, as users
+    first_user.. first_user + users - 1 (default: first_free_user()). Returns row counts per table.
+    """
+    if first_user is None:
+        first_user = first_free_user()
+    catalog = load_catalog()
+    if not catalog:
+        raise RuntimeError("The exercise catalog is empty. Run src/services/data_loader.py --apply first.")
+    catalog_ids = {e[0]: (e[1], e[2], e[3]) for exercises in catalog.values() for e in exercises}
+    lifters = [SyntheticUser(n, seed, catalog) for n in range(users)]
+
+    totals = {"workouts": 0, "exercises": 0, "activations": 0, "cardio": 0, "diet": 0}
+    days = (start.replace(year=start.year + years) - start).days
+    began = time.perf_counter()
+
+    workouts, diet_entries = [], []
+    reported_year = start.year
+    for offset in range(days):
+        date = start + datetime.timedelta(days=offset)
+        for lifter in lifters:
+            session = lifter.workout(date)
+            if session:
+                day_type, text, items = session
+                for item in items:
+                    if item['type'] == 'lift':
+                        item['catalog'] = catalog_ids[item['name']]
+                workouts.append((first_user + lifter.number, date, day_type, text, items))
+            diet_entries.extend((first_user + lifter.number, date, item) for item in lifter.meals())
+
+        if len(workouts) + len(diet_entries) >= CHUNK_ROWS or offset == days - 1:
+            _flush(workouts, diet_entries, totals)
+            workouts, diet_entries = [], []
+            # Progress once per simulated year
+            if date.year != reported_year:
+                reported_year = date.year
+                print(f"[SYNTH] {date}: {totals['workouts']} workouts, {totals['activations']} activations, "
+                      f"{totals['diet']} diet entries")
+
+    totals["seconds"] = time.perf_counter() - began
+    return totals
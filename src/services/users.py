@@ -0,0 +1,23 @@
+"""
+Owners of logs.
+There are no accounts in the app itself: the user id comes from the
+X-User-Id header (set by whatever authenticates requests in front of the
+app), the CLI's --user option, or DEFAULT_USER_ID. Rows written before user
+scoping belong to DEFAULT_USER_ID.
+"""
+DEFAULT_USER_ID = 1
+
+def parse_user_id(value):
+    """Positive int from a header/option value, else DEFAULT_USER_ID."""
+    try:
+        user_id = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_USER_ID
+    return user_id if user_id > 0 else DEFAULT_USER_ID
+
+def scoped_key(key, user_id):
+    """
+    Per-user form of a client or import key. The default user's keys are left
+    as they were, so keys stored before user scoping still match.
+    """
+    return key if user_id == DEFAULT_USER_ID else f"{user_id}:{key}"
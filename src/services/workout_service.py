@@ -3,25 +3,48 @@ Core service for logging workouts.
 Shared by CLI and Web App.
 """
 import json
-from src.models.database import get_connection
+from src.models.database import prepared
+from src.models.writer import run_write
+from src.services.hashing import workout_hash
+from src.services.data_version import bump_version
+from src.services.learned_aliases import write_learned_aliases
+from src.services.metrics import timed
+from src.services.users import DEFAULT_USER_ID
 
-def save_workout(date, day_type, raw_input, exercises):
+@timed("save_workout")
+def save_workout(date, day_type, raw_input, exercises, user_id=DEFAULT_USER_ID):
     """
     Saves a workout to the database.
     exercises: List of dicts {name, sets, reps, weight}
+    Returns the log id (the existing one if this user already saved this exact workout).
+    Confirmed fuzzy matches are learned as aliases in the same transaction.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    def write(cursor):
+        log_id = write_workout(cursor, date, day_type, raw_input, exercises, user_id)
+        write_learned_aliases(cursor, exercises, user_id)
+        return log_id
+    return run_write(write)
+
+def write_workout(cursor, date, day_type, raw_input, exercises, user_id=DEFAULT_USER_ID):
+    """save_workout inside the caller's transaction (used by batch uploads)."""
+    # Skip exact re-submissions (the unique hash index is the backstop for races)
+    content_hash = workout_hash(date, raw_input)
+    cursor.execute(prepared("SELECT id FROM workout_logs WHERE user_id = ? AND content_hash = ?"),
+                   (user_id, content_hash))
+    existing = cursor.fetchone()
+    if existing:
+        return existing[0]
     
     # Save Log
     # standardizing on RETURNING id for Postgres/SQLite compatibility
-    cursor.execute("""
-        INSERT INTO workout_logs (workout_date, day_type, exercises_raw)
-        VALUES (?, ?, ?)
+    cursor.execute(prepared("""
+        INSERT INTO workout_logs (user_id, workout_date, day_type, exercises_raw, content_hash)
+        VALUES (?, ?, ?, ?, ?)
         RETURNING id
-    """, (date, day_type, raw_input))
+    """), (user_id, date, day_type, raw_input, content_hash))
     
     log_id = cursor.fetchone()[0]
+    activations = []
     
     # Save Individual Items (Exercises & Cardio)
     for item in exercises:
@@ -36,10 +59,10 @@ def save_workout(date, day_type, raw_input, exercises):
             c_speed = item.get('speed')
             c_cals = item.get('calories')
             
-            cursor.execute("""
+            cursor.execute(prepared("""
                 INSERT INTO cardio_logs (workout_log_id, activity_name, duration, distance, speed, calories)
                 VALUES (?, ?, ?, ?, ?, ?)
-            """, (log_id, c_name, c_duration, c_distance, c_speed, c_cals))
+            """), (log_id, c_name, c_duration, c_distance, c_speed, c_cals))
             
         else:
             # --- SAVE LIFTING ---
@@ -51,7 +74,7 @@ def save_workout(date, day_type, raw_input, exercises):
             weight = item.get('weight')
             
             # Get ID and muscle info
-            cursor.execute("SELECT id, primary_muscle_id, secondary_muscles FROM exercises WHERE name = ?", (ex_name,))
+            cursor.execute(prepared("SELECT id, primary_muscle_id, secondary_muscles FROM exercises WHERE name = ?"), (ex_name,))
             row = cursor.fetchone()
             
             if not row:
@@ -60,32 +83,30 @@ def save_workout(date, day_type, raw_input, exercises):
             ex_id, prim_id, sec_json = row
             
             # Save workout_exercise with DETAILS
-            cursor.execute("""
+            cursor.execute(prepared("""
                 INSERT INTO workout_exercises (workout_log_id, exercise_id, sets, reps, weight)
                 VALUES (?, ?, ?, ?, ?)
                 RETURNING id
-            """, (log_id, ex_id, sets, reps, weight))
+            """), (log_id, ex_id, sets, reps, weight))
             
             we_id = cursor.fetchone()[0]
             
-            # Save PRIMARY activation
-            cursor.execute("""
-                INSERT INTO muscle_activations (workout_exercise_id, muscle_id, activation_type)
-                VALUES (?, ?, 'primary')
-            """, (we_id, prim_id))
+            # Activations are written in one batch below
+            activations.append((we_id, prim_id, 'primary'))
             
-            # Save SECONDARY activations
             if sec_json:
                 try:
                     sec_ids = json.loads(sec_json)
                     for sid in sec_ids:
-                        cursor.execute("""
-                            INSERT INTO muscle_activations (workout_exercise_id, muscle_id, activation_type)
-                            VALUES (?, ?, 'secondary')
-                        """, (we_id, sid))
+                        activations.append((we_id, sid, 'secondary'))
                 except:
                     pass
-        
-    conn.commit()
-    conn.close()
+    
+    if activations:
+        cursor.executemany("""
+            INSERT INTO muscle_activations (workout_exercise_id, muscle_id, activation_type)
+            VALUES (?, ?, ?)
+        """, activations)
+    
+    bump_version(cursor, "workout")
     return log_id
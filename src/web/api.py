@@ -0,0 +1,52 @@
+"""
+JSON API (/api/v1) for clients that sync in batches.
+
+POST /api/v1/batch
+    {"items": [{"key": "phone-123", "type": "workout", "date": "2026-01-14",
+                "text": "Bench press 3x8 60kg, lateral raises"}, ...]}
+-> 200 {"results": [{"key": "phone-123", "status": "saved", "id": 42, ...}, ...]}
+
+Statuses are saved, replayed (the key was already uploaded), failed (nothing
+recognised, so the key is not stored and may be retried) and invalid.
+All valid items are written in one transaction. Items are saved for the
+user in the X-User-Id header (the default user without it).
+"""
+from flask import Blueprint, jsonify, request
+from src.services.batch_service import BatchUploader, validate_item, MAX_BATCH_ITEMS
+from src.services.users import parse_user_id
+
+def create_api(ai_parser, matcher, categorizer, ai_diet):
+    """Builds the blueprint around the app's shared parser/matcher/categorizer instances."""
+    api = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+    uploader = BatchUploader(ai_parser, matcher, categorizer, ai_diet)
+
+    @api.route('/batch', methods=['POST'])
+    def batch():
+        payload, status = handle_batch(request.get_json(silent=True), uploader, current_user_id())
+        return jsonify(payload), status
+
+    return api
+
+def current_user_id():
+    return parse_user_id(request.headers.get('X-User-Id'))
+
+def handle_batch(body, uploader, user_id):
+    """Validates and uploads one batch body for user_id. Returns (json payload, HTTP status)."""
+    items = body.get("items") if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items:
+        return {"error": "body must be {\"items\": [...]}"}, 400
+    if len(items) > MAX_BATCH_ITEMS:
+        return {"error": f"at most {MAX_BATCH_ITEMS} items per batch"}, 413
+
+    checked = [validate_item(item) for item in items]
+    records = [record for record, error in checked if record]
+    saved = uploader.upload(records, user_id) if records else {}
+
+    results = []
+    for item, (record, error) in zip(items, checked):
+        if error:
+            key = item.get("key") if isinstance(item, dict) else None
+            results.append({"key": key, "status": "invalid", "error": error})
+        else:
+            results.append({"key": record["key"], **saved[record["key"]]})
+    return {"results": results}, 200
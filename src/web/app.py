@@ -1,8 +1,12 @@
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, render_template, request, redirect, url_for, g, Response, make_response
+from markupsafe import Markup, escape
 import datetime
-import json
+import hashlib
+import threading
+import time
 import sys
 import os
+from collections import OrderedDict
 
 # Add root folder to sys.path so we can import services
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
@@ -10,67 +14,164 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'
 from src.services.exercise_matcher import ExerciseMatcher
 from src.services.ai_parser import AIParser
 from src.services.categorizer import WorkoutCategorizer
+from src.services.coverage import check_coverage
 from src.services.ai_analyzer import AIAnalyzer
 from src.services.ai_diet import AIDietParser
-from src.services.diet_service import save_diet_logs, get_diet_history
+from src.services.food_cache import count_sources
+from src.services.diet_service import save_diet_logs, get_daily_summary
 from src.services.workout_service import save_workout
-from src.models.database import get_connection
+from src.models.database import get_connection, start_query_stats, end_query_stats, prepared
+from src.models.migrations import ensure_schema
+from src.services.data_version import get_version
+from src.services.draft_store import create_draft, get_draft, delete_draft
+from src.services.search_service import search as search_logs, MATCH_START, MATCH_END, PER_PAGE, KINDS
+from src.services.users import DEFAULT_USER_ID, parse_user_id
+from src.web.api import create_api
+from src.services import metrics
+from src.services.profiling import Profile
 
 app = Flask(__name__)
 
+# Honour X-Profile / ?profile=1 (writes profile files, so off unless asked for)
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0") == "1"
+
+# Each worker checks the schema on boot (one read when nothing is pending)
+ensure_schema()
+
+# Stage timings feed /metrics (per worker process)
+metrics.enable()
+
 # Initialize Services
 matcher = ExerciseMatcher()
 ai_parser = AIParser()
 categorizer = WorkoutCategorizer()
 ai_diet = AIDietParser()
 
+app.register_blueprint(create_api(ai_parser, matcher, categorizer, ai_diet))
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+    g.query_stats_token = start_query_stats(request.path)
+
+@app.after_request
+def record_request_time(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.observe("workout_http_request_seconds", time.perf_counter() - g.request_start,
+                    route=route, method=request.method)
+
+    stats = end_query_stats(g.pop('query_stats_token'))
+    metrics.inc("workout_db_queries_total", stats.count, route=route)
+    metrics.observe("workout_db_request_seconds", stats.total_seconds, route=route)
+    response.headers['X-Query-Count'] = str(stats.count)
+    return response
+
+@app.teardown_request
+def drop_query_stats(exc):
+    # after_request is skipped when a view raises
+    token = g.pop('query_stats_token', None)
+    if token is not None:
+        end_query_stats(token)
+
+def wants_profile():
+    return PROFILE_REQUESTS and "1" in (request.headers.get('X-Profile'), request.args.get('profile'))
+
+@app.before_request
+def start_profile():
+    if wants_profile():
+        g.profile = Profile(f"{request.method} {request.path}").start()
+
+@app.after_request
+def stop_profile(response):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        print(profile.stop())
+        response.headers['X-Profile'] = profile.paths[0].name
+    return response
+
+@app.teardown_request
+def drop_profile(exc):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        print(profile.stop())
+
+# --- PAGE CACHING ---
+
+# Rendered fragments per worker: name -> (data version, html), least recently used first.
+# Names include the user id, so the cache is bounded to keep memory flat as users grow.
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "512"))
+_fragments = OrderedDict()
+_fragments_lock = threading.Lock()
+
+# Part of every ETag, so a deploy with changed templates invalidates browser copies
+_template_dir = os.path.join(app.root_path, app.template_folder)
+TEMPLATE_TAG = hashlib.sha1(b"".join(
+    open(os.path.join(_template_dir, name), 'rb').read() for name in sorted(os.listdir(_template_dir))
+)).hexdigest()[:8]
+
+def get_fragment(name, version):
+    """Cached html for `name` at this data version, or None."""
+    with _fragments_lock:
+        cached = _fragments.get(name)
+        if cached is not None:
+            _fragments.move_to_end(name)
+    hit = cached is not None and cached[0] == version
+    metrics.inc("workout_fragment_cache_total", fragment=name, result="hit" if hit else "miss")
+    return cached[1] if hit else None
+
+def store_fragment(name, version, html):
+    with _fragments_lock:
+        _fragments[name] = (version, html)
+        _fragments.move_to_end(name)
+        while len(_fragments) > FRAGMENT_CACHE_SIZE:
+            _fragments.popitem(last=False)
+    return html
+
+def cached_fragment(name, version, render):
+    """Reuses `name`'s rendered html until its data version moves on."""
+    html = get_fragment(name, version)
+    if html is None:
+        html = store_fragment(name, version, render())
+    return html
+
+def conditional_page(etag, render):
+    """304 when the browser already has this version of the page, else render() with an ETag."""
+    etag = f"{etag}-{TEMPLATE_TAG}"
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag)
+    # Browsers must revalidate, which is cheap now
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'X-User-Id'
+    return response
+
+def current_user_id():
+    """
+    The user this request acts for, from the X-User-Id header (default user if absent).
+    The app does no authentication: whatever sits in front of it sets the header.
+    """
+    return parse_user_id(request.headers.get('X-User-Id'))
+
+@app.route('/metrics')
+def metrics_route():
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
-    report = None
-    display_exercises = None
-    ai_analysis = None
-    exercises_json = None
-    
     if request.method == 'POST':
         raw_input = request.form.get('raw_input')
         date = request.form.get('date')
         
         # 1. AI Parse
         parsed_list = ai_parser.parse(raw_input)
-        if not parsed_list:
-             parsed_list = [{"name": e.strip()} for e in raw_input.split(",")]
-             
-        # 2. Match
-        matched_exercises = []
-        for item in parsed_list:
-            if item.get('type') == 'cardio':
-                # Direct pass-through for Cardio (no DB match needed)
-                matched_exercises.append(item)
-                continue
-                
-            clean_name = item.get('name') or "Unknown"
-            match_result = matcher.match(clean_name)
-            
-            if match_result:
-                final_obj = match_result
-                final_obj['type'] = 'lift' # Ensure type is set
-                if item.get('sets'): final_obj['sets'] = item['sets']
-                if item.get('reps'): final_obj['reps'] = item['reps']
-                if item.get('weight'): final_obj['weight'] = item['weight']
-                matched_exercises.append(final_obj)
         
-        # 3. Categorize
-        ex_names = [m['name'] for m in matched_exercises]
-        if ex_names:
-            report = categorizer.categorize(ex_names)
+        # 2-4. Match, categorize, prepare display
+        analyzed = match_and_categorize(raw_input, parsed_list, current_user_id())
+        if analyzed:
+            report = analyzed[1]
             
-            # 4. Prepare Display
-            display_exercises = []
-            for i, ex_info in enumerate(report['exercises']):
-                match_info = matched_exercises[i]
-                full_info = {**ex_info, **match_info}
-                display_exercises.append(full_info)
-                
             # 5. AI Analysis
             try:
                 analyzer = AIAnalyzer()
@@ -78,38 +179,107 @@ def index():
             except:
                 ai_analysis = "AI unavailable."
                 
-            exercises_json = json.dumps(matched_exercises)
-            
-            return render_template('index.html', 
-                                   raw_input=raw_input,
-                                   date=date,
-                                   report=report, 
-                                   display_exercises=display_exercises,
-                                   ai_analysis=ai_analysis,
-                                   exercises_json=exercises_json,
-                                   today=date) # Keep same date
+            # 6. Keep the result server-side; reloading the preview won't re-run the pipeline
+            draft_id = create_workout_draft(raw_input, date, analyzed, ai_analysis, current_user_id())
+            return redirect(url_for('index', draft=draft_id))
+    
+    draft_id = request.args.get('draft')
+    draft = get_draft(draft_id, 'workout', current_user_id())
+    if draft:
+        return render_template('index.html', **workout_draft_context(draft_id, draft))
     
     return render_template('index.html', today=str(datetime.date.today()))
 
+def match_and_categorize(raw_input, parsed_list, user_id=DEFAULT_USER_ID):
+    """
+    Steps 2-4 of the log flow (shared with the async app), matched with user_id's learned aliases.
+    Returns (matched_exercises, report, display_exercises), or None if nothing matched.
+    """
+    if not parsed_list:
+         parsed_list = [{"name": e.strip()} for e in raw_input.split(",")]
+         
+    # 2. Match
+    matched_exercises = []
+    for item in parsed_list:
+        if item.get('type') == 'cardio':
+            # Direct pass-through for Cardio (no DB match needed)
+            matched_exercises.append(item)
+            continue
+            
+        clean_name = item.get('name') or "Unknown"
+        match_result = matcher.match(clean_name, user_id=user_id)
+        
+        if match_result:
+            final_obj = match_result
+            final_obj['type'] = 'lift' # Ensure type is set
+            if item.get('sets'): final_obj['sets'] = item['sets']
+            if item.get('reps'): final_obj['reps'] = item['reps']
+            if item.get('weight'): final_obj['weight'] = item['weight']
+            matched_exercises.append(final_obj)
+    
+    # 3. Categorize
+    ex_names = [m['name'] for m in matched_exercises]
+    if not ex_names:
+        return None
+    report = categorizer.categorize(ex_names)
+    report['coverage'] = check_coverage(report)   # local gap / redundancy check, shown before the AI's take
+    
+    # 4. Prepare Display
+    display_exercises = []
+    for i, ex_info in enumerate(report['exercises']):
+        match_info = matched_exercises[i]
+        full_info = {**ex_info, **match_info}
+        display_exercises.append(full_info)
+    
+    return matched_exercises, report, display_exercises
+
+def create_workout_draft(raw_input, date, analyzed, ai_analysis, user_id):
+    matched_exercises, report, display_exercises = analyzed
+    return create_draft('workout', {
+        "raw_input": raw_input,
+        "date": date,
+        "report": report,
+        "display_exercises": display_exercises,
+        "ai_analysis": ai_analysis,
+        "exercises": matched_exercises,
+    }, user_id)
+
+def workout_draft_context(draft_id, draft):
+    return dict(draft_id=draft_id,
+                raw_input=draft['raw_input'],
+                date=draft['date'],
+                report=draft['report'], 
+                display_exercises=draft['display_exercises'],
+                ai_analysis=draft['ai_analysis'],
+                today=draft['date']) # Keep same date
+
 @app.route('/confirm', methods=['POST'])
 def confirm():
-    date = request.form.get('date')
-    day_type = request.form.get('day_type')
-    raw_input = request.form.get('raw_input')
-    exercises_json = request.form.get('exercises_json')
+    draft_id = request.form.get('draft_id')
+    user_id = current_user_id()
+    draft = get_draft(draft_id, 'workout', user_id)
+    if not draft:
+        # Expired or already saved
+        return redirect(url_for('index'))
     
-    exercises = json.loads(exercises_json)
-    
-    save_workout(date, day_type, raw_input, exercises)
+    save_workout(draft['date'], draft['report']['day_type'], draft['raw_input'], draft['exercises'], user_id)
+    delete_draft(draft_id)
     
     return redirect(url_for('report'))
 
 @app.route('/report')
 def report():
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    sql = """
+    user_id = current_user_id()
+    version = get_version("workout")
+    return conditional_page(f"report-{user_id}-{version}", lambda: render_template(
+        'report.html',
+        report_table_html=cached_fragment(f"report_table:{user_id}", version,
+                                          lambda: _render_report_table(user_id))))
+
+def _render_report_table(user_id):
+    return render_template('_report_table.html', rows=report_rows(user_id))
+
+REPORT_SQL = """
     SELECT 
         l.workout_date,
         l.day_type,
@@ -124,6 +294,7 @@ def report():
     FROM workout_logs l
     JOIN workout_exercises we ON l.id = we.workout_log_id
     JOIN exercises e ON we.exercise_id = e.id
+    WHERE l.user_id = ?
     
     UNION ALL
     
@@ -140,22 +311,55 @@ def report():
         cl.speed
     FROM workout_logs l
     JOIN cardio_logs cl ON l.id = cl.workout_log_id
+    WHERE l.user_id = ?
 
     ORDER BY workout_date DESC, item_name ASC
     LIMIT 100
-    """
-    cursor.execute(sql)
+"""
+
+def report_rows(user_id=DEFAULT_USER_ID):
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute(prepared(REPORT_SQL), (user_id, user_id))
     rows = cursor.fetchall()
     conn.close()
-    
-    return render_template('report.html', rows=rows)
+    return rows
+
+# --- SEARCH ---
+
+@app.template_filter('highlight')
+def highlight(snippet):
+    """Search snippet -> html with the matched words in <mark> (the log text itself is escaped)."""
+    return Markup(str(escape(snippet)).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>"))
+
+def search_context(args, user_id):
+    """Template variables for /search from the query string (shared with the async app)."""
+    query = args.get('q', '').strip()
+    kind = args.get('kind', 'all')
+    if kind not in KINDS:
+        kind = 'all'
+    page = max(args.get('page', 1, type=int), 1)
+
+    results, total = search_logs(query, kind=kind, page=page, user_id=user_id) if query else ([], 0)
+    return dict(query=query, kind=kind, page=page, results=results, total=total,
+                pages=max(1, -(-total // PER_PAGE)))
+
+@app.route('/search')
+def search():
+    return render_template('search.html', **search_context(request.args, current_user_id()))
 
 # --- DIET ROUTES ---
 
 @app.route('/diet', methods=['GET', 'POST'])
 def diet():
     today = str(datetime.date.today())
-    history = get_diet_history()
+    user_id = current_user_id()
+    version = get_version("diet")
+    
+    def daily_totals_html():
+        return cached_fragment(f"daily_totals:{user_id}", version, lambda: render_template(
+            '_daily_totals.html', daily_summary=get_daily_summary(user_id=user_id)))
     
     if request.method == 'POST':
         raw_input = request.form.get('raw_input')
@@ -164,46 +368,54 @@ def diet():
         # 1. AI Parse
         preview_items = ai_diet.parse_diet(raw_input)
         
-        # Calculate Totals
-        total_cals = sum(i.get('calories',0) for i in preview_items)
-        total_p = sum(i.get('protein',0) for i in preview_items)
-        total_c = sum(i.get('carbs',0) for i in preview_items)
-        total_f = sum(i.get('fats',0) for i in preview_items)
-        
-        items_json = json.dumps(preview_items)
+        # 2. Keep the estimate server-side; reloading the preview won't call the AI again
+        draft_id = create_draft('diet', {
+            "raw_input": raw_input,
+            "date": date,
+            "items": preview_items,
+        }, user_id)
+        return redirect(url_for('diet', draft=draft_id))
+    
+    draft_id = request.args.get('draft')
+    draft = get_draft(draft_id, 'diet', user_id)
+    if draft:
+        preview_items = draft['items']
         
         return render_template('diet.html',
-                               today=date,
-                               raw_input=raw_input,
+                               today=draft['date'],
+                               raw_input=draft['raw_input'],
                                preview_items=preview_items,
-                               items_json=items_json,
-                               total_cals=total_cals,
-                               total_p=total_p,
-                               total_c=total_c,
-                               total_f=total_f,
-                               date=date, # Pass date for confirm
-                               history=history)
+                               draft_id=draft_id,
+                               **diet_totals(preview_items),
+                               daily_totals_html=daily_totals_html())
+
+    # The form defaults to today's date, so the page changes at midnight too
+    return conditional_page(f"diet-{user_id}-{version}-{today}", lambda: render_template(
+        'diet.html', today=today, daily_totals_html=daily_totals_html()))
 
-    return render_template('diet.html', today=today, history=history)
+def diet_totals(preview_items):
+    """Totals row and cache/model counts for a diet preview."""
+    return {
+        "total_cals": sum(i.get('calories',0) for i in preview_items),
+        "total_p": sum(i.get('protein',0) for i in preview_items),
+        "total_c": sum(i.get('carbs',0) for i in preview_items),
+        "total_f": sum(i.get('fats',0) for i in preview_items),
+        "source_counts": count_sources(preview_items),
+    }
 
 @app.route('/confirm_diet', methods=['POST'])
 def confirm_diet():
-    date = request.form.get('date')
-    items_json = request.form.get('items_json')
-    items = json.loads(items_json)
+    draft_id = request.form.get('draft_id')
+    user_id = current_user_id()
+    draft = get_draft(draft_id, 'diet', user_id)
+    if not draft:
+        # Expired or already saved
+        return redirect(url_for('diet'))
     
-    save_diet_logs(date, items)
+    save_diet_logs(draft['date'], draft['items'], user_id)
+    delete_draft(draft_id)
     
     return redirect(url_for('diet'))
 
-@app.route('/init-db')
-def init_db_route():
-    try:
-        from src.models.database import init_database
-        logs = init_database()
-        return f"<h1>Database Initialization Report</h1><pre>{logs}</pre><p><a href='/'>Go Home</a></p>"
-    except Exception as e:
-        return f"<h1>Initialization Failed</h1><p>{e}</p>"
-
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
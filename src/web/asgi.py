@@ -0,0 +1,242 @@
+"""
+Async (ASGI) serving mode for the same pages as app.py.
+
+Gemini calls are awaited (generate_content_async), so a worker keeps serving
+other requests while one waits on the model. Database work and the CPU-bound
+matching still use the sync services, run in a thread pool (ASYNC_THREADS)
+so they never block the event loop.
+
+Run: hypercorn src.web.asgi:app --bind 0.0.0.0:$PORT
+"""
+from quart import Quart, render_template, request, redirect, url_for, g, Response, make_response, jsonify
+import asyncio
+import datetime
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add root folder to sys.path so we can import services
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from src.services.ai_analyzer import AIAnalyzer
+from src.services.batch_service import BatchUploader
+from src.services.diet_service import save_diet_logs, get_daily_summary
+from src.services.workout_service import save_workout
+from src.services.data_version import get_version
+from src.services.draft_store import create_draft, get_draft, delete_draft
+from src.services.users import parse_user_id
+from src.models.database import start_query_stats, end_query_stats
+from src.services import metrics
+# The sync app owns the shared services, the fragment cache and the page helpers
+from src.web.app import (matcher, ai_parser, categorizer, ai_diet, TEMPLATE_TAG, get_fragment, store_fragment,
+                         match_and_categorize, create_workout_draft, workout_draft_context, report_rows,
+                         diet_totals, highlight, search_context)
+from src.web.api import handle_batch
+
+ASYNC_THREADS = int(os.getenv("ASYNC_THREADS", "32"))   # threads for DB and matching work
+
+app = Quart(__name__)
+app.add_template_filter(highlight)
+
+uploader = BatchUploader(ai_parser, matcher, categorizer, ai_diet)
+
+@app.before_serving
+async def start_executor():
+    # asyncio.to_thread() uses the loop's default executor
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=ASYNC_THREADS))
+
+@app.before_request
+async def start_timer():
+    g.request_start = time.perf_counter()
+    g.query_stats_token = start_query_stats(request.path)
+
+@app.after_request
+async def record_request_time(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.observe("workout_http_request_seconds", time.perf_counter() - g.request_start,
+                    route=route, method=request.method)
+
+    stats = end_query_stats(g.pop('query_stats_token'))
+    metrics.inc("workout_db_queries_total", stats.count, route=route)
+    metrics.observe("workout_db_request_seconds", stats.total_seconds, route=route)
+    response.headers['X-Query-Count'] = str(stats.count)
+    return response
+
+@app.teardown_request
+async def drop_query_stats(exc):
+    # after_request is skipped when a view raises
+    token = g.pop('query_stats_token', None)
+    if token is not None:
+        end_query_stats(token)
+
+def current_user_id():
+    """Same rule as app.current_user_id (X-User-Id header, set in front of the app)."""
+    return parse_user_id(request.headers.get('X-User-Id'))
+
+async def cached_fragment(name, version, render):
+    """Async form of app.cached_fragment (shares its per-worker cache)."""
+    html = get_fragment(name, version)
+    if html is None:
+        html = store_fragment(name, version, await render())
+    return html
+
+async def conditional_page(etag, render):
+    """304 when the browser already has this version of the page, else await render() with an ETag."""
+    etag = f"{etag}-{TEMPLATE_TAG}"
+    if etag in request.if_none_match:
+        response = Response("", status=304)
+    else:
+        response = await make_response(await render())
+    response.set_etag(etag)
+    # Browsers must revalidate, which is cheap now
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'X-User-Id'
+    return response
+
+@app.route('/metrics')
+async def metrics_route():
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/', methods=['GET', 'POST'])
+async def index():
+    user_id = current_user_id()
+    if request.method == 'POST':
+        form = await request.form
+        raw_input = form.get('raw_input')
+        date = form.get('date')
+
+        # 1. AI Parse (awaited, the worker serves other requests meanwhile)
+        parsed_list = await ai_parser.parse_async(raw_input)
+
+        # 2-4. Match, categorize, prepare display
+        analyzed = await asyncio.to_thread(match_and_categorize, raw_input, parsed_list, user_id)
+        if analyzed:
+            report = analyzed[1]
+
+            # 5. AI Analysis
+            try:
+                analyzer = AIAnalyzer()
+                ai_analysis = await analyzer.analyze_async(report)
+            except:
+                ai_analysis = "AI unavailable."
+
+            # 6. Keep the result server-side; reloading the preview won't re-run the pipeline
+            draft_id = await asyncio.to_thread(create_workout_draft, raw_input, date, analyzed, ai_analysis,
+                                               user_id)
+            return redirect(url_for('index', draft=draft_id))
+
+    draft_id = request.args.get('draft')
+    draft = await asyncio.to_thread(get_draft, draft_id, 'workout', user_id)
+    if draft:
+        return await render_template('index.html', **workout_draft_context(draft_id, draft))
+
+    return await render_template('index.html', today=str(datetime.date.today()))
+
+@app.route('/confirm', methods=['POST'])
+async def confirm():
+    user_id = current_user_id()
+    draft_id = (await request.form).get('draft_id')
+    draft = await asyncio.to_thread(get_draft, draft_id, 'workout', user_id)
+    if not draft:
+        # Expired or already saved
+        return redirect(url_for('index'))
+
+    await asyncio.to_thread(save_workout, draft['date'], draft['report']['day_type'], draft['raw_input'],
+                            draft['exercises'], user_id)
+    await asyncio.to_thread(delete_draft, draft_id)
+
+    return redirect(url_for('report'))
+
+@app.route('/report')
+async def report():
+    user_id = current_user_id()
+    version = await asyncio.to_thread(get_version, "workout")
+
+    async def render_table():
+        rows = await asyncio.to_thread(report_rows, user_id)
+        return await render_template('_report_table.html', rows=rows)
+
+    async def render_page():
+        table_html = await cached_fragment(f"report_table:{user_id}", version, render_table)
+        return await render_template('report.html', report_table_html=table_html)
+
+    return await conditional_page(f"report-{user_id}-{version}", render_page)
+
+@app.route('/search')
+async def search():
+    context = await asyncio.to_thread(search_context, request.args, current_user_id())
+    return await render_template('search.html', **context)
+
+# --- DIET ROUTES ---
+
+@app.route('/diet', methods=['GET', 'POST'])
+async def diet():
+    today = str(datetime.date.today())
+    user_id = current_user_id()
+    version = await asyncio.to_thread(get_version, "diet")
+
+    async def daily_totals_html():
+        async def render_totals():
+            summary = await asyncio.to_thread(get_daily_summary, user_id=user_id)
+            return await render_template('_daily_totals.html', daily_summary=summary)
+        return await cached_fragment(f"daily_totals:{user_id}", version, render_totals)
+
+    if request.method == 'POST':
+        form = await request.form
+        raw_input = form.get('raw_input')
+        date = form.get('date')
+
+        # 1. AI Parse (the diet parser also reads and writes the food cache, so it runs in a thread)
+        preview_items = await asyncio.to_thread(ai_diet.parse_diet, raw_input)
+
+        # 2. Keep the estimate server-side; reloading the preview won't call the AI again
+        draft_id = await asyncio.to_thread(create_draft, 'diet', {
+            "raw_input": raw_input,
+            "date": date,
+            "items": preview_items,
+        }, user_id)
+        return redirect(url_for('diet', draft=draft_id))
+
+    draft_id = request.args.get('draft')
+    draft = await asyncio.to_thread(get_draft, draft_id, 'diet', user_id)
+    if draft:
+        preview_items = draft['items']
+
+        return await render_template('diet.html',
+                                     today=draft['date'],
+                                     raw_input=draft['raw_input'],
+                                     preview_items=preview_items,
+                                     draft_id=draft_id,
+                                     **diet_totals(preview_items),
+                                     daily_totals_html=await daily_totals_html())
+
+    # The form defaults to today's date, so the page changes at midnight too
+    async def render_page():
+        return await render_template('diet.html', today=today, daily_totals_html=await daily_totals_html())
+
+    return await conditional_page(f"diet-{user_id}-{version}-{today}", render_page)
+
+@app.route('/confirm_diet', methods=['POST'])
+async def confirm_diet():
+    user_id = current_user_id()
+    draft_id = (await request.form).get('draft_id')
+    draft = await asyncio.to_thread(get_draft, draft_id, 'diet', user_id)
+    if not draft:
+        # Expired or already saved
+        return redirect(url_for('diet'))
+
+    await asyncio.to_thread(save_diet_logs, draft['date'], draft['items'], user_id)
+    await asyncio.to_thread(delete_draft, draft_id)
+
+    return redirect(url_for('diet'))
+
+@app.route('/api/v1/batch', methods=['POST'])
+async def api_batch():
+    body = await request.get_json(silent=True)
+    # The uploader fans out to its own thread pool and writes in one transaction
+    payload, status = await asyncio.to_thread(handle_batch, body, uploader, current_user_id())
+    return jsonify(payload), status
+
+if __name__ == '__main__':
+    app.run(debug=True, port=5000)
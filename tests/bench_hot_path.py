@@ -0,0 +1,247 @@
+"""
+Offline micro-benchmarks for the logging hot path.
+Times ExerciseMatcher.match, WorkoutCategorizer.categorize, save_workout,
+save_diet_logs, backfill and the /report query on scratch databases padded
+to several catalog (exercise) and history (workout log) sizes. No network.
+
+Results are written to JSON. With --compare, each benchmark's median is
+checked against the stored baseline, and the run exits with status 1 if any
+is slower by more than --tolerance. Baselines are machine-specific: record
+one with --update-baseline on the machine that runs the comparison.
+
+Run:
+    python tests/bench_hot_path.py                        # print + write bench_results.json
+    python tests/bench_hot_path.py --compare              # fail on regressions vs tests/bench_baseline.json
+    python tests/bench_hot_path.py --update-baseline      # store this run as the baseline
+"""
+import sys
+import os
+
+# Add root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import argparse
+import contextlib
+import datetime
+import io
+import itertools
+import json
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from src.models import database
+from src.models.migrations import migrate
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "bench_baseline.json")
+NOISE_FLOOR_MS = 0.02   # differences below this are timer noise, never a regression
+
+MATCH_INPUTS = ["bench", "lat raise", "bb row", "squats", "incline db press", "tricep pushdwn",
+                "romanian deadlift", "preacher curl", "face pulls", "leg extention"]
+WORKOUT_TEXT = "Bench press 3x8 60kg, incline db press 3x10, lateral raises 3x15, tricep pushdown"
+
+_unique = itertools.count()
+
+def _point_modules_at(db_path):
+    """get_connection() reads database.DB_PATH; backfill still opens its own DB_PATH, so it is re-pointed too."""
+    from src.services import backfill_activations
+    database.DB_PATH = db_path
+    backfill_activations.DB_PATH = db_path
+
+def _scratch_db(tmp, name):
+    path = os.path.join(tmp, f"{name}.db")
+    shutil.copy(os.path.join(os.path.dirname(__file__), "..", "workout_logger.db"), path)
+    _point_modules_at(path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate()
+    return path
+
+def _pad_catalog(size):
+    """Adds synthetic variants of the real exercises until the catalog has `size` rows."""
+    conn = database.get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, aliases, primary_muscle_id, secondary_muscles, exercise_type FROM exercises")
+    real = cursor.fetchall()
+    rows = []
+    for i in range(max(0, size - len(real))):
+        name, aliases, muscle, secondary, kind = real[i % len(real)]
+        alias_list = [f"{a} v{i}" for a in json.loads(aliases or "[]")]
+        rows.append((f"{name} Variation {i}", json.dumps(alias_list), muscle, secondary, kind))
+    cursor.executemany("""
+        INSERT INTO exercises (name, aliases, primary_muscle_id, secondary_muscles, exercise_type)
+        VALUES (?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+    return len(real) + len(rows)
+
+def _pad_history(size, items):
+    """Writes `size` synthetic workout logs in one transaction."""
+    from src.models.writer import run_write
+    from src.services.workout_service import write_workout
+
+    start = datetime.date(2020, 1, 1)
+    def write_all(cursor):
+        for n in range(size):
+            date = str(start + datetime.timedelta(days=n % 2000))
+            write_workout(cursor, date, "PUSH", f"{WORKOUT_TEXT} #{n}", items)
+    run_write(write_all)
+
+def measure(fn, number, repeat, setup=None):
+    """Median milliseconds per call of fn() over `repeat` samples of `number` calls."""
+    fn()   # warm-up (caches, prepared statements)
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) * 1000 / number)
+    return statistics.median(samples)
+
+def bench_catalog(tmp, size, repeat):
+    """match / categorize against a catalog of `size` exercises."""
+    from src.services.exercise_matcher import ExerciseMatcher
+    from src.services.categorizer import WorkoutCategorizer
+
+    _scratch_db(tmp, f"catalog_{size}")
+    actual = _pad_catalog(size)
+    matcher = ExerciseMatcher()
+    categorizer = WorkoutCategorizer()
+    names = [m["name"] for m in (matcher.match(text) for text in MATCH_INPUTS) if m]
+
+    inputs = itertools.cycle(MATCH_INPUTS)
+    return actual, {
+        "match": measure(lambda: matcher.match(next(inputs)), number=50, repeat=repeat),
+        "categorize": measure(lambda: categorizer.categorize(names), number=20, repeat=repeat),
+    }
+
+def bench_history(tmp, size, repeat):
+    """save_workout / save_diet_logs / backfill / report query with `size` logs already stored."""
+    from src.services.exercise_matcher import ExerciseMatcher
+    from src.services.workout_service import save_workout
+    from src.services.diet_service import save_diet_logs
+    from src.services.backfill_activations import backfill
+    from src.web.app import report_rows
+
+    _scratch_db(tmp, f"history_{size}")
+    matcher = ExerciseMatcher()
+    items = [{**matcher.match(text), "type": "lift", "sets": 3, "reps": "10", "weight": "20kg"}
+             for text in MATCH_INPUTS[:5] if matcher.match(text)]
+    _pad_history(size, items)
+
+    def save_one_workout():
+        save_workout("2026-01-01", "PUSH", f"{WORKOUT_TEXT} bench {next(_unique)}", items)
+
+    def save_one_diet():
+        n = next(_unique)
+        save_diet_logs("2026-01-01", [
+            {"meal_type": "Lunch", "food_raw": f"chicken rice {n}", "calories": 600, "protein": 40, "carbs": 70, "fats": 15},
+            {"meal_type": "Snack", "food_raw": f"greek yogurt {n}", "calories": 150, "protein": 15, "carbs": 10, "fats": 4},
+        ])
+
+    def drop_activations():
+        conn = database.get_connection()
+        conn.cursor().execute("DELETE FROM muscle_activations")
+        conn.commit()
+        conn.close()
+
+    def run_backfill():
+        with contextlib.redirect_stdout(io.StringIO()):
+            backfill()
+
+    return {
+        "save_workout": measure(save_one_workout, number=20, repeat=repeat),
+        "save_diet_logs": measure(save_one_diet, number=20, repeat=repeat),
+        "report_query": measure(report_rows, number=10, repeat=repeat),
+        # Rebuilds every activation of the history (setup drops them first)
+        "backfill": measure(run_backfill, number=1, repeat=repeat, setup=drop_activations),
+    }
+
+def run(catalog_sizes, history_sizes, repeat):
+    database.SLOW_QUERY_MS = float("inf")   # scratch databases, keep the log quiet
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in catalog_sizes:
+            actual, timings = bench_catalog(tmp, size, repeat)
+            for name, ms in timings.items():
+                results[f"{name}[catalog={actual}]"] = ms
+        for size in history_sizes:
+            for name, ms in bench_history(tmp, size, repeat).items():
+                results[f"{name}[history={size}]"] = ms
+    return results
+
+def compare(results, baseline, tolerance):
+    """Prints each benchmark against the baseline. Returns the names that regressed."""
+    regressions = []
+    print(f"\n{'Benchmark':<32} | {'Baseline ms':>11} | {'Now ms':>9} | {'Change':>8}")
+    print("-" * 70)
+    for name, ms in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<32} | {'-':>11} | {ms:>9.3f} | {'new':>8}")
+            continue
+        change = (ms - base) / base if base else 0.0
+        regressed = ms > base * (1 + tolerance) and ms - base > NOISE_FLOOR_MS
+        flag = "  << REGRESSION" if regressed else ""
+        print(f"{name:<32} | {base:>11.3f} | {ms:>9.3f} | {change:>+7.0%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks for the logging hot path")
+    parser.add_argument("--catalog-sizes", default="0,1000,5000",
+                        help="Exercise catalog sizes (0 = the real catalog only)")
+    parser.add_argument("--history-sizes", default="100,2000", help="Workout logs stored before timing")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per benchmark (the median is kept)")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write this run's results")
+    parser.add_argument("--compare", action="store_true", help="Compare against the baseline, exit 1 on regression")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the baseline")
+    args = parser.parse_args()
+
+    catalog_sizes = [int(s) for s in args.catalog_sizes.split(",") if s]
+    history_sizes = [int(s) for s in args.history_sizes.split(",") if s]
+    results = run(catalog_sizes, history_sizes, args.repeat)
+
+    report = {
+        "recorded_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": f"{platform.node()} / {platform.machine()} / Python {platform.python_version()}",
+        "unit": "ms per call (median)",
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] Wrote {len(results)} results to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[OK] Baseline updated: {args.baseline}")
+
+    if not args.compare:
+        for name, ms in results.items():
+            print(f"  {name:<32} {ms:>9.3f} ms")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"[WARN] No baseline at {args.baseline}; record one with --update-baseline.")
+        sys.exit(1)
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("machine") != report["machine"]:
+        print(f"[WARN] Baseline was recorded on {baseline.get('machine')}; timings may not be comparable.")
+
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        print(f"\n[FAIL] {len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\n[OK] No regressions beyond {args.tolerance:.0%}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Concurrency benchmark for the write path.
+Many threads save diet entries into a scratch SQLite database at once, first
+with direct commits, then with WRITE_BEHIND group commit. The script reports
+throughput, lock errors and how many saves each commit carried.
+
+Run: python tests/bench_write_behind.py [--threads 16] [--saves 25]
+"""
+import sys
+import os
+
+# Add root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.models import database, writer
+from src.models.migrations import migrate
+from src.services import metrics
+from src.services.diet_service import save_diet_logs
+
+def _worker(thread_id, saves, mode):
+    ok, locked = 0, 0
+    for n in range(saves):
+        item = {"meal_type": "Snack", "food_raw": f"{mode} item {thread_id}-{n}",
+                "calories": 100, "protein": 5, "carbs": 10, "fats": 3}
+        try:
+            save_diet_logs("2026-01-01", [item])
+            ok += 1
+        except Exception as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+    return ok, locked
+
+def run_mode(mode, threads, saves):
+    writer.set_write_behind(mode == "write-behind")
+    metrics.reset()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda t: _worker(t, saves, mode), range(threads)))
+    elapsed = time.perf_counter() - start
+
+    ok = sum(r[0] for r in results)
+    locked = sum(r[1] for r in results)
+    commits = sum(v for (name, _), v in metrics._counters.items() if name == "workout_write_commits_total")
+    per_commit = f"{ok / commits:.1f}" if commits else "1.0"
+    print(f"{mode:<13} | {ok:>6} | {locked:>6} | {elapsed:>7.2f} | {ok / elapsed:>8.1f} | {per_commit:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Write throughput with and without group commit")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--saves", type=int, default=25, help="Saves per thread")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "bench.db")
+        database.SLOW_QUERY_MS = float("inf")   # lock waits are expected here, keep the log quiet
+        migrate()
+        metrics.enable()
+
+        print(f"\n{args.threads} threads x {args.saves} saves")
+        print(f"{'Mode':<13} | {'Saved':>6} | {'Locked':>6} | {'Seconds':>7} | {'Saves/s':>8} | {'Per commit':>10}")
+        print("-" * 68)
+        run_mode("direct", args.threads, args.saves)
+        run_mode("write-behind", args.threads, args.saves)
+
+if __name__ == "__main__":
+    main()
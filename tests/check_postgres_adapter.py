@@ -0,0 +1,219 @@
+"""
+Checks the Postgres adapter (placeholder translation, prepared statements,
+batched inserts, lastrowid) against a recording fake, so no server is needed.
+Also checks that the exercise matcher loads and reloads its catalog through
+the Postgres connection, not the local SQLite file (the categorizer too), and that a batch upload
+racing another retry on Postgres (UniqueViolation) replays instead of failing.
+Run: python tests/check_postgres_adapter.py
+"""
+import sys
+import os
+
+# Add root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from psycopg2.extensions import adapt
+from src.models.database import PostgresCursor, PostgresConnection, prepared, translate_placeholders
+
+class RecordingCursor:
+    """Stands in for a psycopg2 cursor: records SQL instead of sending it."""
+    def __init__(self, conn):
+        self.connection = conn
+
+    def execute(self, sql, params=None):
+        if isinstance(sql, bytes):
+            sql = sql.decode()
+        self.connection.log.append((sql, params))
+
+    def mogrify(self, sql, args):
+        if isinstance(sql, bytes):
+            sql = sql.decode()
+        return (sql % tuple(adapt(a).getquoted().decode() for a in args)).encode()
+
+    def fetchone(self):
+        return (42,)
+
+    def close(self):
+        pass
+
+class RecordingConnection:
+    encoding = "UTF8"
+
+    def __init__(self):
+        self.log = []
+        self.prepared = {}
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+class ScriptedCursor(RecordingCursor):
+    """Answers SELECTs from the fake connection's tables (EXECUTE resolved through PREPARE)."""
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        sql = sql.decode() if isinstance(sql, bytes) else sql
+        if sql.startswith("PREPARE "):
+            name, statement = sql[len("PREPARE "):].split(" AS ", 1)
+            self.connection.statements[name] = statement
+            self.rows = []
+            return
+        if sql.startswith("EXECUTE "):
+            sql = self.connection.statements[sql.split()[1]]
+        self.rows = next((rows() for table, rows in self.connection.tables.items() if f"FROM {table}" in sql), [])
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+class ScriptedConnection(RecordingConnection):
+    def __init__(self, tables):
+        super().__init__()
+        self.tables = tables   # table name -> callable returning its rows
+        self.statements = {}
+
+    def cursor(self):
+        return ScriptedCursor(self)
+
+    def close(self):
+        pass
+
+def make_cursor():
+    conn = RecordingConnection()
+    return PostgresCursor(conn.cursor(), conn), conn
+
+def check(label, condition):
+    print(f"[{'OK' if condition else 'FAIL'}] {label}")
+    if not condition:
+        sys.exit(1)
+
+def run():
+    # 1. Translation
+    cur, conn = make_cursor()
+    cur.execute("SELECT '?' AS q")
+    check("parameterless statement is sent untouched", conn.log[-1] == ("SELECT '?' AS q", None))
+
+    cur.execute("SELECT * FROM exercises WHERE name LIKE '%?%' AND id = ?", (1,))
+    check("quoted '?' kept, '%' escaped, placeholder translated",
+          conn.log[-1][0] == "SELECT * FROM exercises WHERE name LIKE '%%?%%' AND id = %s")
+
+    before = translate_placeholders.cache_info().hits
+    cur.execute("SELECT * FROM exercises WHERE name LIKE '%?%' AND id = ?", (2,))
+    check("translation served from cache", translate_placeholders.cache_info().hits > before)
+
+    # 2. Prepared statements: PREPARE once per connection, EXECUTE afterwards
+    cur, conn = make_cursor()
+    sql = prepared("SELECT id FROM workout_logs WHERE content_hash = ?")
+    cur.execute(sql, ("abc",))
+    cur.execute(sql, ("def",))
+    statements = [s for s, _ in conn.log]
+    check("PREPARE issued once",
+          statements == ["PREPARE ps_1 AS SELECT id FROM workout_logs WHERE content_hash = $1",
+                         "EXECUTE ps_1 (%s)", "EXECUTE ps_1 (%s)"])
+    check("EXECUTE carries the parameters", conn.log[-1][1] == ("def",))
+
+    cur.execute(prepared("SELECT COUNT(*) FROM workout_logs"))
+    check("parameterless prepared statement", conn.log[-1] == ("EXECUTE ps_2", None))
+
+    # 3. executemany -> one multi-row INSERT
+    cur, conn = make_cursor()
+    cur.executemany("""
+        INSERT INTO muscle_activations (workout_exercise_id, muscle_id, activation_type)
+        VALUES (?, ?, ?)
+    """, [(1, 2, 'primary'), (1, 3, 'secondary'), (1, 4, 'secondary')])
+    check("executemany sent as one statement", len(conn.log) == 1)
+    check("rows rendered into VALUES",
+          "(1, 2, 'primary'),(1, 3, 'secondary'),(1, 4, 'secondary')" in conn.log[0][0])
+
+    cur.executemany("UPDATE diet_logs SET content_hash = ? WHERE id = ?", [("a", 1), ("b", 2)])
+    check("other statements batched", conn.log[-1][0] ==
+          "UPDATE diet_logs SET content_hash = 'a' WHERE id = 1;UPDATE diet_logs SET content_hash = 'b' WHERE id = 2")
+
+    # 4. lastrowid
+    cur, conn = make_cursor()
+    check("lastrowid uses lastval()", cur.lastrowid == 42 and conn.log[-1][0] == "SELECT lastval()")
+
+    # 5. Matcher catalog load and reload go through get_connection (Postgres here)
+    from src.services import exercise_matcher, data_version, learned_aliases
+    catalog = {"rows": [("Barbell Bench Press", '["bench press"]')], "version": 1}
+    conn = ScriptedConnection({
+        "exercises": lambda: catalog["rows"],
+        "learned_aliases": lambda: [(2, "flat bench", "Barbell Bench Press")],
+        "data_version": lambda: [(catalog["version"],)],
+    })
+    connect = lambda: PostgresConnection(conn)
+    originals = (exercise_matcher.get_connection, data_version.get_connection, learned_aliases.get_connection)
+    exercise_matcher.get_connection = data_version.get_connection = learned_aliases.get_connection = connect
+    try:
+        matcher = exercise_matcher.ExerciseMatcher()
+        check("catalog read from the Postgres connection",
+              any("FROM exercises" in sql for sql, _ in conn.log) and matcher.match("bench press")['path'] == "alias")
+
+        catalog["rows"] = [("Barbell Bench Press", '["bench press", "flat bb"]')]
+        catalog["version"] = 2   # what sync_catalog's bump_version does
+        matcher._next_check = 0
+        check("catalog sync picked up after the version check", matcher.match("flat bb")['path'] == "alias")
+        check("learned aliases apply to their own user only",
+              matcher.match("flat bench", user_id=2)['path'] == "learned"
+              and (matcher.match("flat bench") or {}).get('path') != "learned")
+    finally:
+        exercise_matcher.get_connection, data_version.get_connection, learned_aliases.get_connection = originals
+
+    # 6. Categorizer reads the configured backend, one query per workout
+    from src.services import categorizer
+    conn = ScriptedConnection({"exercises": lambda: [("Barbell Bench Press", "Mid Pecs", "Chest", "PUSH")]})
+    original = categorizer.get_connection
+    categorizer.get_connection = lambda: PostgresConnection(conn)
+    try:
+        report = categorizer.WorkoutCategorizer().categorize(["Barbell Bench Press", "Barbell Bench Press"])
+        check("categorize reads the Postgres connection in one IN (...) query",
+              len(conn.log) == 1 and "IN (%s)" in conn.log[0][0]
+              and report["day_type"] == "PUSH" and len(report["exercises"]) == 2)
+    finally:
+        categorizer.get_connection = original
+
+    # 7. Diet rolling averages use a calendar-day RANGE window on Postgres too
+    from src.services import diet_service
+    conn = ScriptedConnection({"diet_daily_totals": lambda: []})
+    original = diet_service.get_connection
+    diet_service.get_connection = lambda: PostgresConnection(conn)
+    try:
+        diet_service.get_daily_summary(14, user_id=1)
+        statement = conn.log[0][0]
+        check("7-day average spans calendar days on Postgres",
+              "ORDER BY (log_date - DATE '2000-01-01') RANGE BETWEEN 6 PRECEDING" in statement)
+    finally:
+        diet_service.get_connection = original
+
+    # 8. Batch upload: Postgres reports a concurrent retry as UniqueViolation, not "IntegrityError"
+    from psycopg2 import errors
+    from src.services import batch_service
+
+    class StubDiet:
+        def parse_diet(self, text):
+            return [{"meal_type": "Snack", "food_raw": text, "calories": 90, "protein": 6, "carbs": 1,
+                     "fats": 6, "source": "model"}]
+
+    attempts = []
+    def racing_write(fn):
+        attempts.append(fn)
+        if len(attempts) == 1:
+            raise errors.UniqueViolation("duplicate key value violates unique constraint \"api_idempotency_pkey\"")
+        return {"k1": {"type": "diet", "status": "replayed"}}
+
+    conn = ScriptedConnection({"api_idempotency": lambda: []})
+    originals = (batch_service.get_connection, batch_service.run_write)
+    batch_service.get_connection = lambda: PostgresConnection(conn)
+    batch_service.run_write = racing_write
+    try:
+        uploader = batch_service.BatchUploader(None, None, None, StubDiet(), workers=1)
+        results = uploader.upload([{"key": "k1", "type": "diet", "date": "2024-01-01", "text": "1 egg"}])
+        check("UniqueViolation on Postgres is retried as a replay",
+              len(attempts) == 2 and results["k1"]["status"] == "replayed")
+    finally:
+        batch_service.get_connection, batch_service.run_write = originals
+
+    print("\nAll adapter checks passed.")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,155 @@
+"""
+Checks that per-user reads stay on the per-user indexes (migration 012).
+Builds a scratch database with synthetic lifters, then:
+  - runs EXPLAIN QUERY PLAN on the report, diet summary, dedupe lookup,
+    history and search queries and fails if any of them scans a log table
+    instead of searching the (user_id, ...) indexes
+  - times the per-user history reads (report, diet summary, diet history)
+    with --users lifters and again after growing to --grow-to lifters; the
+    per-user time should stay flat
+Search is plan-checked only: its full-text match is over every user's logs
+(then filtered by user), so its cost follows the total number of matches.
+
+Run: python tests/check_user_plans.py [--users 20] [--grow-to 200] [--years 1]
+"""
+import sys
+import os
+
+# Add root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import argparse
+import contextlib
+import io
+import shutil
+import statistics
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+# Log tables, and the aliases the queries give them
+LOG_TABLES = {"workout_logs", "diet_logs", "diet_daily_totals", "l", "d"}
+
+def _point_at(db_path):
+    from src.models import database
+    from src.services import backfill_activations
+    database.DB_PATH = db_path
+    backfill_activations.DB_PATH = db_path
+    database.SLOW_QUERY_MS = float("inf")   # scratch database, keep the log quiet
+
+def _synth(users, years, first_user):
+    from src.services.synth import generate
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generate(users=users, years=years, seed=7, first_user=first_user)
+
+def plan_queries(user_id):
+    """(name, sql, params) of the per-user reads, as the services run them."""
+    from src.services.hashing import workout_hash
+    from src.services.search_service import _sqlite_parts, fts_query
+    from src.web.app import REPORT_SQL
+
+    search_sql = " UNION ALL ".join(_sqlite_parts("all"))
+    query = fts_query("bench press")
+    return [
+        ("report", REPORT_SQL, (user_id, user_id)),
+        ("diet summary", "SELECT log_date, entries, calories, protein, carbs, fats FROM diet_daily_totals "
+                         "WHERE user_id = ? ORDER BY log_date DESC LIMIT 41", (user_id,)),
+        ("diet history", "SELECT * FROM diet_logs WHERE user_id = ? ORDER BY log_date DESC, id DESC LIMIT 50",
+         (user_id,)),
+        ("workout dedupe", "SELECT id FROM workout_logs WHERE user_id = ? AND content_hash = ?",
+         (user_id, workout_hash("2020-01-02", "x"))),
+        ("diet dedupe", "SELECT content_hash FROM diet_logs WHERE user_id = ? AND content_hash IN (?, ?)",
+         (user_id, "a", "b")),
+        ("history", "SELECT id, workout_date, day_type, exercises_raw FROM workout_logs "
+                    "WHERE user_id = ? ORDER BY workout_date DESC LIMIT 5", (user_id,)),
+        ("search", search_sql, (query, user_id, query, user_id)),
+    ]
+
+def check_plans(cursor, user_id):
+    """Prints each plan. Returns the names of queries that scan a log table."""
+    failures = []
+    for name, sql, params in plan_queries(user_id):
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        details = [row[3] for row in cursor.fetchall()]
+        # "SCAN l USING COVERING INDEX ..." still reads every user's rows; SEARCH is a key range
+        scans = [d for d in details if d.startswith("SCAN ") and d.split()[1] in LOG_TABLES]
+        print(f"\n[{name}] {'SCANS A LOG TABLE' if scans else 'ok'}")
+        for d in details:
+            print(f"  {d}")
+        if scans:
+            failures.append(name)
+    return failures
+
+def time_reads(user_ids, repeat=5):
+    """Median ms per user for report + diet summary + diet history, over the given users."""
+    from src.web.app import report_rows
+    from src.services.diet_service import get_daily_summary, get_diet_history
+
+    def one_round():
+        for user_id in user_ids:
+            report_rows(user_id)
+            get_daily_summary(user_id=user_id)
+            get_diet_history(user_id)
+
+    one_round()   # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        one_round()
+        samples.append((time.perf_counter() - start) * 1000 / len(user_ids))
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that per-user reads use the per-user indexes")
+    parser.add_argument("--users", type=int, default=20, help="Lifters in the first round")
+    parser.add_argument("--grow-to", type=int, default=200, help="Lifters in the second round")
+    parser.add_argument("--years", type=int, default=1, help="Years of history per lifter")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed per-user slowdown after growing (0.5 = 50%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "users.db")
+        shutil.copy(os.path.join(ROOT, "workout_logger.db"), db_path)
+        _point_at(db_path)
+
+        from src.models.database import get_connection
+        from src.models.migrations import migrate
+        with contextlib.redirect_stdout(io.StringIO()):
+            migrate()
+
+        totals = _synth(args.users, args.years, first_user=1)
+        print(f"[OK] {args.users} lifters: {totals['workouts']} workouts, {totals['diet']} diet entries")
+
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("ANALYZE")
+        failures = check_plans(cursor, user_id=2)
+        conn.close()
+
+        sample = list(range(1, args.users + 1))
+        before = time_reads(sample)
+
+        totals = _synth(args.grow_to - args.users, args.years, first_user=args.users + 1)
+        print(f"\n[OK] Grew to {args.grow_to} lifters (+{totals['workouts']} workouts, +{totals['diet']} diet entries)")
+        conn = get_connection()
+        conn.cursor().execute("ANALYZE")
+        conn.commit()
+        conn.close()
+        after = time_reads(sample)
+
+    change = (after - before) / before
+    print(f"\nPer-user history reads (report + diet summary + diet history), same {len(sample)} users:")
+    print(f"  {args.users:>5} lifters: {before:8.2f} ms/user")
+    print(f"  {args.grow_to:>5} lifters: {after:8.2f} ms/user  ({change:+.0%})")
+
+    if failures:
+        print(f"\n[FAIL] Scans a log table: {', '.join(failures)}")
+        sys.exit(1)
+    if change > args.tolerance:
+        print(f"\n[FAIL] Per-user reads slowed by more than {args.tolerance:.0%} as users were added")
+        sys.exit(1)
+    print("\n[OK] Every per-user query searches its index, and per-user time stays flat.")
+
+if __name__ == "__main__":
+    main()
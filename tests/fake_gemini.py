@@ -0,0 +1,154 @@
+"""
+Local stand-in for the Gemini API (generateContent over REST), for load tests.
+Answers AIParser, AIDietParser and AIAnalyzer prompts offline:
+  - workout parse: the log text split into exercises (same rules as the offline importer)
+  - diet estimates: stable made-up macros per numbered item
+  - analysis: a canned coaching paragraph
+Recorded responses (--responses, a JSON list of {"contains": "...", "text": "..."})
+are checked first. Latency, jitter and injected errors are configurable.
+
+Point the app at it:
+    GEMINI_API_KEY=fake GEMINI_ENDPOINT=http://127.0.0.1:8089 gunicorn src.web.app:app
+
+Run: python tests/fake_gemini.py [--port 8089] [--latency 0.8] [--jitter 0.4] [--error-rate 0.02]
+"""
+import sys
+import os
+
+# Add root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from src.services.pipeline import local_parse
+
+ANALYSIS_TEXT = ("Solid session with good exercise selection. Volume is balanced across the main movers; "
+                 "add one more set for the lagging muscle group next time and keep rest periods under two minutes.")
+
+def _workout_answer(prompt):
+    log = re.search(r'workout log: "(.*?)"\s*\n', prompt, re.DOTALL)
+    items = local_parse(log.group(1) if log else "")
+    return json.dumps([{"type": "lift", "name": i["name"], "sets": 3, "reps": "10", "weight": None} for i in items])
+
+def _diet_answer(prompt):
+    answers = []
+    for number, line in re.findall(r"^\s*(\d+)\.\s*(\[.*)$", prompt, re.MULTILINE):
+        # Stable per food, so repeated loads estimate the same numbers
+        seed = int(hashlib.sha1(line.encode()).hexdigest()[:8], 16)
+        protein, carbs, fats = seed % 40, (seed >> 8) % 80, (seed >> 16) % 30
+        answers.append({"id": int(number), "calories": protein * 4 + carbs * 4 + fats * 9,
+                        "protein": protein, "carbs": carbs, "fats": fats})
+    return json.dumps(answers)
+
+def canned_answer(prompt):
+    if "Extract a list of activities" in prompt:
+        return _workout_answer(prompt)
+    if "Estimate calories and macros" in prompt:
+        return _diet_answer(prompt)
+    if "strength and conditioning coach" in prompt:
+        return ANALYSIS_TEXT
+    return "OK"
+
+class FakeGemini:
+    def __init__(self, port=8089, latency=0.8, jitter=0.4, error_rate=0.0, error_status=503, responses=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.responses = responses or []
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"ok": 0, "error": 0}
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="fake-gemini", daemon=True).start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+
+    def answer(self, prompt):
+        for recorded in self.responses:
+            if recorded["contains"] in prompt:
+                return recorded["text"]
+        return canned_answer(prompt)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                prompt = "".join(part.get("text", "") for content in body.get("contents", [])
+                                 for part in content.get("parts", []))
+
+                with fake.lock:
+                    delay = fake.latency + fake.rng.uniform(0, fake.jitter)
+                    failed = fake.rng.random() < fake.error_rate
+                    fake.counts["error" if failed else "ok"] += 1
+                time.sleep(delay)
+
+                if failed:
+                    self._send(fake.error_status, {"error": {"code": fake.error_status,
+                                                             "message": "Injected by fake_gemini",
+                                                             "status": "UNAVAILABLE"}})
+                    return
+
+                text = fake.answer(prompt)
+                self._send(200, {
+                    "candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                                    "finishReason": "STOP", "index": 0}],
+                    "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(text) // 4,
+                                      "totalTokenCount": (len(prompt) + len(text)) // 4},
+                })
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass   # one line per call would drown the load-test output
+
+        return Handler
+
+def add_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0.8, help="Seconds per model call")
+    parser.add_argument("--jitter", type=float, default=0.4, help="Extra random seconds per call (0..jitter)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls answered with an error")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected errors")
+    parser.add_argument("--responses", help="JSON list of recorded responses [{contains, text}]")
+
+def from_args(args, port):
+    responses = None
+    if args.responses:
+        with open(args.responses, encoding="utf-8") as f:
+            responses = json.load(f)
+    return FakeGemini(port=port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      error_status=args.error_status, responses=responses)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake Gemini server")
+    parser.add_argument("--port", type=int, default=8089)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    fake = from_args(args, args.port)
+    print(f"[OK] Fake Gemini on {fake.url} (latency {args.latency}s + 0..{args.jitter}s, "
+          f"{args.error_rate:.0%} errors). Ctrl+C to stop.")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n[OK] Served {fake.counts['ok']} calls, injected {fake.counts['error']} errors.")
@@ -0,0 +1,153 @@
+"""
+Load test: sync (Flask) vs async (Quart) serving of the log flow.
+Gemini is replaced by a stub that sleeps --latency seconds per call, so the
+test is offline and measures how many slow model calls one worker can keep
+in flight. Each worker is a single process: the Flask app on a non-threaded
+werkzeug server, the Quart app on hypercorn. Both use a scratch copy of the
+database.
+
+Run: python tests/load_async.py [--concurrency 20] [--requests 60] [--latency 0.3]
+"""
+import sys
+import os
+
+# Add root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import argparse
+import asyncio
+import json
+import logging
+import shutil
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import google.generativeai as genai
+
+STUB_LATENCY = 0.3
+
+class _StubResponse:
+    def __init__(self, prompt):
+        if "JSON LIST" in prompt:
+            self.text = json.dumps([{"type": "lift", "name": "Bench Press", "sets": 3, "reps": "8", "weight": "60kg"},
+                                    {"type": "lift", "name": "Lateral Raise", "sets": 3, "reps": "12", "weight": None}])
+        else:
+            self.text = "Solid push session. Add a rear delt movement next time."
+        self.usage_metadata = None
+
+class StubModel:
+    """Stands in for genai.GenerativeModel with a fixed delay per call."""
+    def __init__(self, name):
+        self.name = name
+
+    def generate_content(self, prompt):
+        time.sleep(STUB_LATENCY)
+        return _StubResponse(prompt)
+
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(STUB_LATENCY)
+        return _StubResponse(prompt)
+
+def _setup(tmp):
+    """Points every module at a scratch database and swaps in the stub model. Returns (flask app, quart app)."""
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = StubModel
+
+    from src.models import database
+    db_path = os.path.join(tmp, "load.db")
+    shutil.copy(database.DB_PATH, db_path)
+    database.DB_PATH = db_path
+    database.SLOW_QUERY_MS = float("inf")
+    from src.services import ai_analyzer
+    ai_analyzer.API_KEY = "stub"
+
+    from src.web.app import app as flask_app
+    from src.web.asgi import app as quart_app
+    return flask_app, quart_app
+
+def _serve_sync(app, port):
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)   # no line per request
+    server = make_server("127.0.0.1", port, app, threaded=False)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+def _serve_async(app, port):
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.accesslog = None
+    stop = threading.Event()
+
+    async def run():
+        await serve(app, config, shutdown_trigger=lambda: asyncio.to_thread(stop.wait))
+
+    threading.Thread(target=asyncio.run, args=(run(),), daemon=True).start()
+    return stop.set
+
+def _wait_until_up(port):
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+def _post_log(port, n):
+    body = urllib.parse.urlencode({"raw_input": f"bench press 3x8 60kg, lateral raises #{n}",
+                                   "date": "2026-01-01"}).encode()
+    start = time.perf_counter()
+    # Follows the redirect to the draft preview, like a browser
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/", data=body, timeout=120) as response:
+        response.read()
+        ok = response.status == 200
+    return time.perf_counter() - start, ok
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def run_mode(name, port, concurrency, total):
+    _wait_until_up(port)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda n: _post_log(port, n), range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [r[0] for r in results]
+    ok = sum(1 for r in results if r[1])
+    print(f"{name:<6} | {ok:>4}/{total:<4} | {elapsed:>7.2f} | {total / elapsed:>6.1f} | "
+          f"{_percentile(latencies, 50):>6.2f} | {_percentile(latencies, 95):>6.2f}")
+
+def main():
+    global STUB_LATENCY
+    parser = argparse.ArgumentParser(description="Concurrent capacity of the sync and async apps")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per stubbed model call")
+    args = parser.parse_args()
+    STUB_LATENCY = args.latency
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flask_app, quart_app = _setup(tmp)
+
+        print(f"\n{args.requests} logs, {args.concurrency} concurrent clients, "
+              f"{args.latency}s per model call (2 calls per log), one worker each")
+        print(f"{'Mode':<6} | {'OK':>9} | {'Seconds':>7} | {'Req/s':>6} | {'p50 s':>6} | {'p95 s':>6}")
+        print("-" * 55)
+
+        stop = _serve_sync(flask_app, 5081)
+        run_mode("sync", 5081, args.concurrency, args.requests)
+        stop()
+
+        stop = _serve_async(quart_app, 5082)
+        run_mode("async", 5082, args.concurrency, args.requests)
+        stop()
+
+if __name__ == "__main__":
+    main()
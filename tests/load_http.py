@@ -0,0 +1,188 @@
+"""
+End-to-end HTTP load test of the web app.
+Each virtual user repeats a log flow: preview (POST), view the draft,
+confirm, then load the report (workout) or diet page. Throughput and
+p50/p95/p99 latency are reported per route.
+
+Against a running app (pointed at tests/fake_gemini.py, not the real API):
+    python tests/load_http.py --url http://127.0.0.1:5000 --concurrency 20 --flows 200
+
+Or let the script start the fake model and the app on a scratch copy of the database:
+    python tests/load_http.py --spawn flask --workers 4 --latency 0.8 --error-rate 0.02
+    python tests/load_http.py --spawn asgi
+"""
+import sys
+import os
+
+# Add root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+import argparse
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import fake_gemini
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+
+WORKOUTS = ["bench press 3x8 60kg, incline db press 3x10, lateral raises 3x15, tricep pushdown",
+            "squats 5x5 100kg, romanian deadlift 3x8, leg press 3x12, calf raises",
+            "pull ups 4x8, barbell row 3x8 60kg, face pulls 3x15, preacher curl 3x10"]
+FOODS = ["oats with banana", "chicken rice", "greek yogurt", "paneer wrap", "protein shake", "dal and roti"]
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None   # keep the 302 so its Location (the draft id) can be read
+
+_opener = urllib.request.build_opener(_NoRedirect)
+
+class Recorder:
+    """Latencies and errors per route, shared by all virtual users."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def request(self, base, route, path, form=None):
+        data = urllib.parse.urlencode(form).encode() if form is not None else None
+        start = time.perf_counter()
+        try:
+            with _opener.open(base + path, data=data, timeout=120) as response:
+                response.read()
+                status, location = response.status, response.headers.get("Location")
+        except urllib.error.HTTPError as e:
+            status, location = e.code, e.headers.get("Location")
+        except OSError:
+            status, location = None, None
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            self.latencies[route].append(elapsed)
+            if status is None or status >= 400:
+                self.errors[route] += 1
+        return status, location
+
+def workout_flow(recorder, base, n, rng):
+    text = f"{rng.choice(WORKOUTS)} #{n}"
+    status, location = recorder.request(base, "POST /", "/", {"raw_input": text, "date": "2026-01-01"})
+    if status != 302 or not location or "draft=" not in location:
+        return False   # nothing recognised, or an error
+    draft_id = location.split("draft=")[1]
+    recorder.request(base, "GET /?draft", f"/?draft={draft_id}")
+    recorder.request(base, "POST /confirm", "/confirm", {"draft_id": draft_id})
+    recorder.request(base, "GET /report", "/report")
+    return True
+
+def diet_flow(recorder, base, n, rng):
+    text = "\n".join(f"{meal} - {rng.randint(1, 400)}g {rng.choice(FOODS)}"
+                     for meal in ("Bf", "Lunch", "Dinner"))
+    status, location = recorder.request(base, "POST /diet", "/diet", {"raw_input": text, "date": "2026-01-01"})
+    if status != 302 or not location or "draft=" not in location:
+        return False
+    draft_id = location.split("draft=")[1]
+    recorder.request(base, "GET /diet?draft", f"/diet?draft={draft_id}")
+    recorder.request(base, "POST /confirm_diet", "/confirm_diet", {"draft_id": draft_id})
+    recorder.request(base, "GET /diet", "/diet")
+    return True
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def run_load(base, concurrency, flows, diet_share, seed):
+    recorder = Recorder()
+
+    def one_flow(n):
+        rng = random.Random(f"{seed}-{n}")
+        flow = diet_flow if rng.random() < diet_share else workout_flow
+        return flow(recorder, base, n, rng)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        completed = sum(pool.map(one_flow, range(flows)))
+    elapsed = time.perf_counter() - start
+
+    requests = sum(len(v) for v in recorder.latencies.values())
+    print(f"\n{flows} flows ({completed} completed) at concurrency {concurrency} in {elapsed:.1f}s: "
+          f"{completed / elapsed:.2f} flows/s, {requests / elapsed:.1f} req/s")
+    print(f"{'Route':<20} | {'Requests':>8} | {'Errors':>6} | {'Req/s':>6} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8}")
+    print("-" * 80)
+    for route, values in recorder.latencies.items():
+        p50, p95, p99 = (_percentile(values, p) * 1000 for p in (50, 95, 99))
+        print(f"{route:<20} | {len(values):>8} | {recorder.errors[route]:>6} | {len(values) / elapsed:>6.1f} | "
+              f"{p50:>8.0f} | {p95:>8.0f} | {p99:>8.0f}")
+
+def _wait_until_up(base, process):
+    for _ in range(300):
+        if process.poll() is not None:
+            raise RuntimeError("the app exited during startup")
+        try:
+            urllib.request.urlopen(base + "/metrics", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"the app did not start on {base}")
+
+def spawn_app(kind, port, workers, fake_url, db_path):
+    """Starts the app in a child process on db_path, with Gemini pointed at the fake."""
+    env = {**os.environ, "SQLITE_PATH": db_path, "GEMINI_ENDPOINT": fake_url, "GEMINI_API_KEY": "fake",
+           "PYTHONPATH": ROOT}
+    if kind == "asgi":
+        cmd = [sys.executable, "-m", "hypercorn", "src.web.asgi:app", "--bind", f"127.0.0.1:{port}",
+               "--workers", str(workers)]
+    elif shutil.which("gunicorn"):
+        cmd = ["gunicorn", "src.web.app:app", "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+               "--threads", "4"]
+    else:
+        # No gunicorn (e.g. Windows): one threaded werkzeug process
+        cmd = [sys.executable, "-m", "flask", "--app", "src.web.app:app", "run", "--port", str(port),
+               "--with-threads"]
+    return subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test of the log -> confirm -> report flow")
+    parser.add_argument("--url", help="Base URL of a running app")
+    parser.add_argument("--spawn", choices=["flask", "asgi"], help="Start the fake model and the app instead")
+    parser.add_argument("--port", type=int, default=5090, help="--spawn: app port (the fake model uses port+1)")
+    parser.add_argument("--workers", type=int, default=2, help="--spawn: app worker processes")
+    parser.add_argument("--concurrency", type=int, default=10, help="Virtual users")
+    parser.add_argument("--flows", type=int, default=100, help="Flows to run in total")
+    parser.add_argument("--diet-share", type=float, default=0.3, help="Share of flows that log diet")
+    parser.add_argument("--seed", type=int, default=1)
+    fake_gemini.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.url:
+        run_load(args.url.rstrip("/"), args.concurrency, args.flows, args.diet_share, args.seed)
+        return
+    if not args.spawn:
+        parser.error("give --url of a running app or --spawn flask|asgi")
+
+    fake = fake_gemini.from_args(args, args.port + 1)
+    fake.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "load.db")
+        shutil.copy(os.path.join(ROOT, "workout_logger.db"), db_path)
+        process = spawn_app(args.spawn, args.port, args.workers, fake.url, db_path)
+        base = f"http://127.0.0.1:{args.port}"
+        try:
+            _wait_until_up(base, process)
+            print(f"[OK] {args.spawn} app on {base}, fake Gemini on {fake.url} "
+                  f"({args.latency}s + 0..{args.jitter}s, {args.error_rate:.0%} errors)")
+            run_load(base, args.concurrency, args.flows, args.diet_share, args.seed)
+            print(f"\nFake Gemini: {fake.counts['ok']} calls answered, {fake.counts['error']} errors injected")
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+            fake.stop()
+
+if __name__ == "__main__":
+    main()